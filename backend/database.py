@@ -1,20 +1,118 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError, OperationFailure
+import logging
 import os
 from dotenv import load_dotenv
+from services.technique_query import TECHNIQUE_INDEXES
+from services.asset_store import migrate_inline_profile_pictures
+from services.profile_sync import backfill_team_owner_snapshots
+from services.team_scoring import start_summary_backfill
+from services.follow_graph import FOLLOW_INDEXES, migrate_follow_arrays
+from services.activity_feed import ACTIVITY_INDEXES
+from services.refresh_tokens import REFRESH_TOKEN_INDEXES
+from services.rate_limit import RATE_LIMIT_INDEXES
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# One learn row per (character, technique)
+CHARACTER_TECHNIQUE_KEYS = [("character_id", 1), ("technique_id", 1)]
+
 async def get_database():
     """Get database instance"""
     return db
 
+async def ensure_unique_index(collection, keys):
+    """
+    Create a unique index. Rows written before the constraint existed may
+    collide; then a plain index is built instead and a warning logged, and
+    the unique index replaces it on the first startup after the
+    duplicates are gone.
+    """
+    try:
+        await collection.create_index(keys, unique=True)
+    except DuplicateKeyError:
+        logger.warning("Duplicate %s values in %s; using a non-unique index until they are resolved", keys, collection.name)
+        await collection.create_index(keys)
+    except OperationFailure as e:
+        # 85/86: an index on the same keys exists without the unique option
+        if e.code not in (85, 86):
+            raise
+        await collection.drop_index(keys)
+        await ensure_unique_index(collection, keys)
+
+async def has_unique_index(collection, keys) -> bool:
+    """Whether a unique index on exactly `keys` already exists"""
+    indexes = await collection.index_information()
+    return any(index.get("unique") and list(index["key"]) == keys for index in indexes.values())
+
+async def dedupe_character_techniques():
+    """
+    Remove repeated learn rows for the same (character, technique), left by
+    the learn route before it was constrained. The equipped, most
+    proficient, earliest learned row of each pair is kept.
+
+    One-off: once the unique index is in place no duplicates can exist, so
+    later startups skip the full-collection aggregation.
+    """
+    if await has_unique_index(db.character_techniques, CHARACTER_TECHNIQUE_KEYS):
+        return 0
+    duplicates = await db.character_techniques.aggregate([
+        {"$sort": {"is_equipped": -1, "proficiency_level": -1, "learned_at": 1}},
+        {"$group": {
+            "_id": {"character_id": "$character_id", "technique_id": "$technique_id"},
+            "ids": {"$push": "$_id"},
+            "count": {"$sum": 1}
+        }},
+        {"$match": {"count": {"$gt": 1}}}
+    ], allowDiskUse=True).to_list(length=None)
+    extra_ids = [row_id for group in duplicates for row_id in group["ids"][1:]]
+    if extra_ids:
+        result = await db.character_techniques.delete_many({"_id": {"$in": extra_ids}})
+        logger.warning("Removed %d duplicate character_techniques rows", result.deleted_count)
+    return len(extra_ids)
+
+async def ensure_indexes():
+    """Create indexes backing hot query paths"""
+    await db.gacha_pulls.create_index([("user_id", 1), ("pull_timestamp", -1), ("id", -1)])
+    await db.user_collections.create_index("user_id", unique=True)
+    # Roster imports upsert by name
+    await ensure_unique_index(db.characters, [("name", 1)])
+    await db.import_jobs.create_index("id", unique=True)
+    await ensure_unique_index(db.techniques, [("id", 1)])
+    for keys in TECHNIQUE_INDEXES:
+        await db.techniques.create_index(keys)
+    await db.character_techniques.create_index([("character_id", 1), ("learned_at", 1), ("id", 1)])
+    await dedupe_character_techniques()
+    await ensure_unique_index(db.character_techniques, CHARACTER_TECHNIQUE_KEYS)
+    # Owner team listings and profile snapshot fan-out
+    await db.teams.create_index("user_id")
+    for keys, options in FOLLOW_INDEXES:
+        await db.follows.create_index(keys, **options)
+    await db.users.create_index([("followers_count", -1)])
+    for keys, options in ACTIVITY_INDEXES:
+        await db.activities.create_index(keys, **options)
+    await db.feed_inbox.create_index("user_id", unique=True)
+    await db.follow_suggestions.create_index("user_id", unique=True)
+    for keys, options in REFRESH_TOKEN_INDEXES:
+        await db.refresh_tokens.create_index(keys, **options)
+    for keys, options in RATE_LIMIT_INDEXES:
+        await db.rate_limits.create_index(keys, **options)
+
 async def init_database():
     """Initialize database with default data"""
+    await ensure_indexes()
+    await migrate_inline_profile_pictures(db)
+    await backfill_team_owner_snapshots(db)
+    start_summary_backfill(db)
+    await migrate_follow_arrays(db)
+
     # Check if we need to populate default data
     formations_count = await db.formations.count_documents({})
     if formations_count == 0:
@@ -84,4 +84,24 @@ class CharacterUpdate(BaseModel):
     description: Optional[str] = None
     hissatsu: Optional[List[Hissatsu]] = None
     team_passives: Optional[List[TeamPassive]] = None
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
\ No newline at end of file
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class ImportRowError(BaseModel):
+    row: int
+    errors: List[str] = []
+
+class ImportJob(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    filename: str
+    status: str = "queued"  # queued, running, completed, failed
+    total_bytes: int = 0
+    bytes_processed: int = 0
+    rows_processed: int = 0
+    inserted_count: int = 0
+    updated_count: int = 0
+    error_count: int = 0
+    errors: List[ImportRowError] = []  # First errors only; error_count has the full total
+    detail: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
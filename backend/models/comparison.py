@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional, Literal
+
+MAX_COMPARED_ENTITIES = 50
+
+class ComparedCharacter(BaseModel):
+    character_id: str
+    level: Optional[int] = Field(None, ge=1, le=99)  # Defaults to the character's base level
+    rarity: Optional[str] = None  # Common, Rare, Epic, Legendary; defaults to the base rarity
+    equipment_ids: List[str] = []
+
+class CompareRequest(BaseModel):
+    kind: Literal["characters", "teams"]
+    characters: List[ComparedCharacter] = Field([], max_length=MAX_COMPARED_ENTITIES)
+    team_ids: List[str] = Field([], max_length=MAX_COMPARED_ENTITIES)
+    baseline: int = Field(0, ge=0)  # Row the deltas are computed against
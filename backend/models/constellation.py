@@ -74,4 +74,26 @@ class GachaPullResult(BaseModel):
     kizuna_stars_spent: int
     kizuna_stars_remaining: int
     platform_bonuses_applied: PlatformBonus
-    pull_details: List[GachaPull] = []
\ No newline at end of file
+    pull_details: List[GachaPull] = []
+
+class GachaHistoryPage(BaseModel):
+    pulls: List[GachaPull] = []
+    next_cursor: Optional[str] = None  # Opaque cursor for the next (older) page
+
+class CollectionEntry(BaseModel):
+    character_id: str
+    rarity: str
+    count: int
+    duplicates: int
+    first_pulled_at: Optional[datetime] = None
+    last_pulled_at: Optional[datetime] = None
+
+class CollectionSummary(BaseModel):
+    user_id: str
+    total_pulls: int = 0
+    unique_characters: int = 0
+    duplicates: int = 0
+    pulls_by_rarity: Dict[str, int] = {}    # rarity -> number of pulls
+    unique_by_rarity: Dict[str, int] = {}   # rarity -> distinct characters owned
+    characters: List[CollectionEntry] = []
+    updated_at: Optional[datetime] = None
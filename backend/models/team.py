@@ -79,6 +79,7 @@ class Team(BaseModel):
     user_id: Optional[str] = None
     username: Optional[str] = None  # For display purposes
     user_avatar: Optional[str] = None  # For display purposes
+    owner_profile_version: int = 0  # Owner profile_version the username/avatar copies come from
     formation: str
     players: List[Dict[str, Any]] = []
     bench_players: List[Dict[str, Any]] = []
@@ -95,6 +96,7 @@ class Team(BaseModel):
     detailed_rating: TeamRating = Field(default_factory=TeamRating)
     save_slot: Optional[int] = None
     save_slot_name: Optional[str] = None
+    summary: Optional[Dict[str, Any]] = None  # Derived at save time: stat totals, elements, position balance
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -84,12 +84,27 @@ class CharacterTechnique(BaseModel):
     learned_at: datetime = Field(default_factory=datetime.utcnow)
     proficiency_level: int = 1  # 1-10 scale for technique mastery
     is_equipped: bool = False  # Whether this technique is currently equipped/active
+    slot: Optional[int] = None  # Equipped slot (1-4) when is_equipped
     
 class LearnTechniqueRequest(BaseModel):
-    character_id: str
+    character_id: Optional[str] = None  # Redundant with the path; must match it when sent
     technique_id: str
 
+MAX_TECHNIQUE_SLOTS = 4
+
 class EquipTechniqueRequest(BaseModel):
-    character_id: str
+    character_id: Optional[str] = None  # Redundant with the path; must match it when sent
     technique_id: str
-    slot: int  # Technique slot (1-4, characters can equip multiple techniques)
\ No newline at end of file
+    slot: int  # Technique slot (1-4, characters can equip multiple techniques)
+
+class CharacterTechniquesBatchRequest(BaseModel):
+    character_ids: List[str] = Field(..., min_length=1, max_length=50)  # e.g. a full 16-player roster
+
+class TechniqueSlotAssignment(BaseModel):
+    technique_id: str
+    slot: int = Field(..., ge=1, le=MAX_TECHNIQUE_SLOTS)
+
+class TechniqueBatchRequest(BaseModel):
+    learn: List[str] = []  # Technique IDs to learn; prerequisites may be learned in the same batch
+    equip: List[TechniqueSlotAssignment] = []  # Learned (or just-learned) techniques to equip
+    level: Optional[int] = None  # Level to check min_level against; defaults to the character's base level
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List
 from datetime import datetime
 import uuid
@@ -10,7 +10,7 @@ class UserBase(BaseModel):
     favorite_position: str = "MF"
     favorite_element: str = "Fire"
     favourite_team: str = "Default Team"
-    profile_picture: Optional[str] = None  # Base64 encoded image
+    profile_picture: Optional[str] = None  # Asset URL; base64 uploads are converted on save
     bio: Optional[str] = None
     kizuna_stars: int = 50  # Starting Kizuna Stars for gacha pulls
 
@@ -39,8 +39,9 @@ class User(UserBase):
     updated_at: datetime
     total_teams: int = 0
     total_likes_received: int = 0
-    followers: List[str] = []
-    following: List[str] = []
+    followers_count: int = 0
+    following_count: int = 0
+    profile_version: int = 0  # Bumped when fields copied onto teams (username, avatar) change
     
     class Config:
         from_attributes = True
@@ -68,5 +69,18 @@ class UserPublic(BaseModel):
     following_count: int = 0
     created_at: datetime
 
+class UserCard(BaseModel):
+    """Minimal user fields for follower/following lists"""
+    id: str
+    username: str
+    profile_picture: Optional[str] = None
+    coach_level: int = 1
+    favorite_position: str = "MF"
+    favorite_element: str = "Fire"
+    followers_count: int = 0
+
 class FollowRequest(BaseModel):
-    user_id: str
\ No newline at end of file
+    user_id: str
+
+class FollowStatusBatchRequest(BaseModel):
+    user_ids: List[str] = Field(..., min_length=1, max_length=200)
\ No newline at end of file
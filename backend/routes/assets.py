@@ -0,0 +1,27 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+import re
+
+from database import get_database
+from services.asset_store import THUMBNAIL_SIZES, load_asset, media_type
+
+router = APIRouter()
+
+DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+@router.get("/assets/{digest}/{size}")
+async def get_asset(digest: str, size: str, request: Request):
+    """Serve a stored image thumbnail; content-addressed, so it never changes"""
+    if not DIGEST_PATTERN.match(digest) or size not in THUMBNAIL_SIZES:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    
+    # The digest already identifies the content, so it doubles as the ETag
+    etag = f'"{digest}-{size}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    db = await get_database()
+    data = await load_asset(db, digest, size)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    return Response(content=data, media_type=media_type(data), headers=headers)
@@ -8,13 +8,15 @@ from typing import Optional
 
 from models.user import UserCreate, UserLogin, User, UserInDB, Token, UserUpdate, FollowRequest
 from database import get_database
+from services.asset_store import resolve_image_field, InvalidImageError
+from services.profile_sync import snapshot_changed, start_owner_profile_sync
+from services.refresh_tokens import store_refresh_token, rotate_refresh_token, revoke_refresh_token, ROTATED
+from services.token_verifier import token_verifier
 
 router = APIRouter()
 security = HTTPBearer()
 
-# JWT settings
-SECRET_KEY = "your-secret-key-here-change-in-production"
-ALGORITHM = "HS256"
+# JWT settings (signing keys are configured in services/token_verifier.py)
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 30
 REFRESH_COOKIE_NAME = "refresh_token"
@@ -43,8 +45,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
     to_encode.update({"exp": expire, "type": "access"})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    return token_verifier.sign(to_encode)
 
 
 def create_refresh_token(user_id: str, expires_delta: Optional[timedelta] = None):
@@ -60,38 +61,10 @@ def create_refresh_token(user_id: str, expires_delta: Optional[timedelta] = None
         "type": "refresh",
         "exp": expire,
     }
-    token = jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+    token = token_verifier.sign(payload)
     return token, jti, expire
 
 
-async def store_refresh_token(jti: str, user_id: str, expires_at: datetime):
-    db = await get_database()
-    await db.refresh_tokens.insert_one({
-        "jti": jti,
-        "user_id": user_id,
-        "expires_at": expires_at,
-        "revoked": False,
-        "created_at": datetime.now(timezone.utc)
-    })
-
-
-async def revoke_refresh_token(jti: str):
-    db = await get_database()
-    await db.refresh_tokens.update_one({"jti": jti}, {"$set": {"revoked": True}})
-
-
-async def is_refresh_token_valid(jti: str, user_id: str) -> bool:
-    db = await get_database()
-    doc = await db.refresh_tokens.find_one({"jti": jti, "user_id": user_id})
-    if not doc:
-        return False
-    if doc.get("revoked"):
-        return False
-    if doc.get("expires_at") and datetime.now(timezone.utc) >= doc["expires_at"]:
-        return False
-    return True
-
-
 def set_refresh_cookie(response: Response, token: str):
     # HttpOnly Secure cookie; SameSite Lax to allow top-level navigation
     response.set_cookie(
@@ -109,13 +82,24 @@ def clear_refresh_cookie(response: Response):
     response.delete_cookie(REFRESH_COOKIE_NAME, path="/")
 
 
+async def store_profile_picture(db, value: Optional[str]) -> Optional[str]:
+    """Move an uploaded profile picture into the asset store and return its URL"""
+    try:
+        return await resolve_image_field(db, value)
+    except InvalidImageError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid profile picture: {e}"
+        )
+
+
 # -----------------------------
 # Dependencies
 # -----------------------------
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get the current authenticated user (via access token)"""
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = token_verifier.verify(credentials.credentials)
         token_type: str = payload.get("type")
         if token_type != "access":
             raise HTTPException(
@@ -180,13 +164,13 @@ async def register(user_data: UserCreate, response: Response):
         "favorite_position": user_data.favorite_position,
         "favorite_element": user_data.favorite_element,
         "favourite_team": user_data.favourite_team,
-        "profile_picture": user_data.profile_picture,
+        "profile_picture": await store_profile_picture(db, user_data.profile_picture),
         "bio": user_data.bio,
         "kizuna_stars": user_data.kizuna_stars,
         "total_teams": 0,
         "total_likes_received": 0,
-        "followers": [],
-        "following": [],
+        "followers_count": 0,
+        "following_count": 0,
         "hashed_password": hashed_password,
         "created_at": datetime.now(timezone.utc),
         "updated_at": datetime.now(timezone.utc)
@@ -200,7 +184,7 @@ async def register(user_data: UserCreate, response: Response):
         data={"sub": user_id}, expires_delta=access_token_expires
     )
     refresh_token, jti, exp = create_refresh_token(user_id)
-    await store_refresh_token(jti, user_id, exp)
+    await store_refresh_token(db, jti, user_id, exp)
     set_refresh_cookie(response, refresh_token)
     
     user = User(**user_dict)
@@ -235,7 +219,7 @@ async def login(user_credentials: UserLogin, response: Response):
     # Remember me controls refresh token lifetime
     refresh_lifetime = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS if (user_credentials.remember_me is None or user_credentials.remember_me) else 7)
     refresh_token, jti, exp = create_refresh_token(user_doc["id"], expires_delta=refresh_lifetime)
-    await store_refresh_token(jti, user_doc["id"], exp)
+    await store_refresh_token(db, jti, user_doc["id"], exp)
     set_refresh_cookie(response, refresh_token)
     
     user = User(**user_doc)
@@ -250,7 +234,7 @@ async def refresh_token_endpoint(request: Request, response: Response):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="No refresh token")
 
     try:
-        payload = jwt.decode(cookie, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = token_verifier.verify(cookie, cache=False)
         if payload.get("type") != "refresh":
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token type")
         user_id = payload.get("sub")
@@ -261,15 +245,12 @@ async def refresh_token_endpoint(request: Request, response: Response):
     except jwt.PyJWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
 
-    # Check DB validity
-    valid = await is_refresh_token_valid(jti, user_id)
-    if not valid:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token revoked or expired")
-
-    # Rotate: revoke old, issue new
-    await revoke_refresh_token(jti)
+    # Rotate: atomically revoke the presented token and issue its successor
+    db = await get_database()
     new_refresh_token, new_jti, new_exp = create_refresh_token(user_id)
-    await store_refresh_token(new_jti, user_id, new_exp)
+    outcome = await rotate_refresh_token(db, jti, user_id, new_jti, new_exp)
+    if outcome != ROTATED:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token revoked or expired")
     set_refresh_cookie(response, new_refresh_token)
 
     # Issue new access token
@@ -285,11 +266,11 @@ async def logout(request: Request, response: Response):
     cookie = request.cookies.get(REFRESH_COOKIE_NAME)
     if cookie:
         try:
-            payload = jwt.decode(cookie, SECRET_KEY, algorithms=[ALGORITHM])
+            payload = token_verifier.verify(cookie, cache=False)
             if payload.get("type") == "refresh":
                 jti = payload.get("jti")
                 if jti:
-                    await revoke_refresh_token(jti)
+                    await revoke_refresh_token(await get_database(), jti)
         except jwt.PyJWTError:
             pass
     clear_refresh_cookie(response)
@@ -315,11 +296,18 @@ async def update_current_user(
         return current_user
     
     update_data["updated_at"] = datetime.now(timezone.utc)
+    if "profile_picture" in update_data:
+        update_data["profile_picture"] = await store_profile_picture(db, update_data["profile_picture"])
     
-    await db.users.update_one(
-        {"id": current_user.id},
-        {"$set": update_data}
-    )
+    # Teams keep a copy of username/avatar; bump the version and fan the change out to them
+    profile_changed = snapshot_changed(current_user.dict(), update_data)
+    update = {"$set": update_data}
+    if profile_changed:
+        update["$inc"] = {"profile_version": 1}
+    
+    await db.users.update_one({"id": current_user.id}, update)
+    if profile_changed:
+        start_owner_profile_sync(db, current_user.id)
     
     updated_user = await db.users.find_one({"id": current_user.id})
     return User(**updated_user)
\ No newline at end of file
@@ -1,15 +1,29 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Request
 from typing import List, Optional
-import pandas as pd
-import io
+import asyncio
+import os
+import tempfile
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from models.character import Character, CharacterCreate, CharacterUpdate, Stats, Stat, Hissatsu, TeamPassive
+from pymongo.errors import DuplicateKeyError
+from models.character import Character, CharacterCreate, CharacterUpdate, Stats, Stat, Hissatsu, TeamPassive, ImportJob
 from database import get_database
+from services.character_import import (
+    read_roster_file, prepare_roster_frame, frame_to_documents, upsert_characters, format_error_report,
+    start_import_job
+)
+from services.search_index import character_index
+from services.facet_index import character_facets
+from services.stat_engine import stat_catalog
+from services.json_response import trusted_response, trusted_documents
+from services.catalog_cache import catalog_responses
+
+UPLOAD_SPOOL_CHUNK = 1024 * 1024  # Bytes copied per read when spooling uploads to disk
 
 router = APIRouter(prefix="/characters", tags=["characters"])
 
 @router.get("/", response_model=List[Character])
 async def get_characters(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     position: Optional[str] = None,
@@ -19,22 +33,82 @@ async def get_characters(
     """Get all characters with optional filtering"""
     db = await get_database()
     
+    if search:
+        # Ranked lookup against the in-memory name index, then fetch the page by id
+        await character_index.ensure_loaded(db)
+        hits = character_index.search(
+            search,
+            limit=skip + limit,
+            predicate=lambda hit: (
+                (not position or position == "all" or hit["position"] == position) and
+                (not element or element == "all" or hit["element"] == element)
+            )
+        )
+        page_ids = [hit["id"] for hit in hits[skip:skip + limit]]
+        if not page_ids:
+            return []
+        characters = await db.characters.find({"id": {"$in": page_ids}}).to_list(length=len(page_ids))
+        by_id = {char["id"]: char for char in characters}
+        return trusted_response(Character, (by_id[char_id] for char_id in page_ids if char_id in by_id))
+    
     # Build query
     query = {}
     if position and position != "all":
         query["position"] = position
     if element and element != "all":
         query["element"] = element
+    
+    async def load():
+        characters = await db.characters.find(query).skip(skip).limit(limit).to_list(length=limit)
+        return trusted_documents(Character, characters)
+    
+    return await catalog_responses.respond(
+        request, "characters", ("list", skip, limit, query.get("position"), query.get("element")), load
+    )
+
+@router.get("/browse")
+async def browse_characters(
+    skip: int = 0,
+    limit: int = 50,
+    position: Optional[str] = None,
+    element: Optional[str] = None,
+    rarity: Optional[str] = None,
+    search: Optional[str] = None
+):
+    """
+    Filtered characters plus counts for every facet value in one call.
+    Facet filters accept comma-separated values; limit=0 returns counts only.
+    """
+    db = await get_database()
+    await character_facets.ensure_loaded(db)
+    
+    filters = {
+        facet: [value for value in raw.split(",") if value and value != "all"]
+        for facet, raw in (("position", position), ("element", element), ("rarity", rarity))
+        if raw
+    }
+    
+    restrict = None
     if search:
-        query["$or"] = [
-            {"name": {"$regex": search, "$options": "i"}},
-            {"nickname": {"$regex": search, "$options": "i"}}
-        ]
+        await character_index.ensure_loaded(db)
+        restrict = character_facets.bitset_for_ids(
+            hit["id"] for hit in character_index.search(search, limit=None)
+        )
+    
+    result = character_facets.query(filters, restrict=restrict)
     
-    cursor = db.characters.find(query).skip(skip).limit(limit)
-    characters = await cursor.to_list(length=limit)
+    characters = []
+    if limit > 0 and result["total"]:
+        page_ids = character_facets.ids(result["bits"])[skip:skip + limit]
+        docs = await db.characters.find({"id": {"$in": page_ids}}).to_list(length=len(page_ids))
+        by_id = {doc["id"]: doc for doc in docs}
+        characters = [Character(**by_id[char_id]) for char_id in page_ids if char_id in by_id]
     
-    return [Character(**char) for char in characters]
+    return {
+        "total": result["total"],
+        "facets": result["counts"],
+        "characters": characters
+    }
 
 @router.get("/{character_id}", response_model=Character)
 async def get_character(character_id: str):
@@ -56,7 +130,15 @@ async def create_character(character: CharacterCreate):
     new_character = Character(**character.dict())
     
     # Insert into database
-    await db.characters.insert_one(new_character.dict())
+    try:
+        await db.characters.insert_one(new_character.dict())
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="A character with this name already exists")
+    
+    character_index.upsert(new_character.dict())
+    catalog_responses.invalidate("characters")
+    character_facets.upsert(new_character.dict())
+    stat_catalog.upsert_character(new_character.dict())
     
     return new_character
 
@@ -73,13 +155,20 @@ async def update_character(character_id: str, character_update: CharacterUpdate)
     # Update only provided fields
     update_data = character_update.dict(exclude_unset=True)
     
-    await db.characters.update_one(
-        {"id": character_id},
-        {"$set": update_data}
-    )
+    try:
+        await db.characters.update_one(
+            {"id": character_id},
+            {"$set": update_data}
+        )
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="A character with this name already exists")
     
     # Return updated character
     updated_character = await db.characters.find_one({"id": character_id})
+    character_index.upsert(updated_character)
+    catalog_responses.invalidate("characters")
+    character_facets.upsert(updated_character)
+    stat_catalog.upsert_character(updated_character)
     return Character(**updated_character)
 
 @router.delete("/{character_id}")
@@ -91,6 +180,11 @@ async def delete_character(character_id: str):
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Character not found")
     
+    character_index.remove(character_id)
+    catalog_responses.invalidate("characters")
+    character_facets.remove(character_id)
+    stat_catalog.remove_character(character_id)
+    
     return {"message": "Character deleted successfully"}
 
 @router.post("/import-excel")
@@ -103,136 +197,88 @@ async def import_characters_from_excel(file: UploadFile = File(...)):
         # Read file content
         content = await file.read()
         
-        # Parse Excel/CSV
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(io.StringIO(content.decode('utf-8')))
-        else:
-            df = pd.read_excel(io.BytesIO(content))
-        
-        db = await get_database()
-        imported_count = 0
-        errors = []
-        
-        for index, row in df.iterrows():
-            try:
-                # Map Excel columns to character model
-                character_data = {
-                    "name": str(row.get('name', row.get('Name', f'Character {index}'))),
-                    "nickname": str(row.get('nickname', row.get('Nickname', row.get('name', 'Unknown')))),
-                    "title": str(row.get('title', row.get('Title', 'Player'))),
-                    "base_level": int(row.get('level', row.get('Level', 1))),
-                    "base_rarity": str(row.get('rarity', row.get('Rarity', 'Common'))),
-                    "position": str(row.get('position', row.get('Position', 'MF'))),
-                    "element": str(row.get('element', row.get('Element', 'Fire'))),
-                    "jersey_number": int(row.get('jersey_number', row.get('Jersey', index + 1))),
-                    "description": str(row.get('description', row.get('Description', 'A talented player'))),
-                    "base_stats": {
-                        "kick": {"main": int(row.get('kick', 50)), "secondary": int(row.get('kick_secondary', 100))},
-                        "control": {"main": int(row.get('control', 50)), "secondary": int(row.get('control_secondary', 100))},
-                        "technique": {"main": int(row.get('technique', 50)), "secondary": int(row.get('technique_secondary', 100))},
-                        "intelligence": {"main": int(row.get('intelligence', 50)), "secondary": int(row.get('intelligence_secondary', 100))},
-                        "pressure": {"main": int(row.get('pressure', 50)), "secondary": int(row.get('pressure_secondary', 100))},
-                        "agility": {"main": int(row.get('agility', 50)), "secondary": int(row.get('agility_secondary', 100))},
-                        "physical": {"main": int(row.get('physical', 50)), "secondary": int(row.get('physical_secondary', 100))}
-                    },
-                    "hissatsu": [
-                        {
-                            "name": str(row.get('hissatsu_1', 'Basic Shot')),
-                            "description": str(row.get('hissatsu_1_desc', 'A basic shooting technique')),
-                            "type": "Shot"
-                        },
-                        {
-                            "name": str(row.get('hissatsu_2', 'Basic Dribble')),
-                            "description": str(row.get('hissatsu_2_desc', 'A basic dribbling technique')),
-                            "type": "Dribble"
-                        },
-                        {
-                            "name": str(row.get('hissatsu_3', 'Basic Pass')),
-                            "description": str(row.get('hissatsu_3_desc', 'A basic passing technique')),
-                            "type": "Pass"
-                        }
-                    ],
-                    "team_passives": [
-                        {
-                            "name": str(row.get('passive_1', 'Team Spirit')),
-                            "description": str(row.get('passive_1_desc', 'Boosts team morale'))
-                        },
-                        {
-                            "name": str(row.get('passive_2', 'Leadership')),
-                            "description": str(row.get('passive_2_desc', 'Enhances team coordination'))
-                        },
-                        {
-                            "name": str(row.get('passive_3', 'Focus')),
-                            "description": str(row.get('passive_3_desc', 'Improves concentration'))
-                        },
-                        {
-                            "name": str(row.get('passive_4', 'Determination')),
-                            "description": str(row.get('passive_4_desc', 'Never gives up'))
-                        },
-                        {
-                            "name": str(row.get('passive_5', 'Synergy')),
-                            "description": str(row.get('passive_5_desc', 'Works well with teammates'))
-                        }
-                    ]
-                }
-                
-                # Create character
-                character = Character(**character_data)
-                
-                # Check if character already exists
-                existing = await db.characters.find_one({"name": character.name})
-                if existing:
-                    # Update existing character
-                    await db.characters.update_one(
-                        {"name": character.name},
-                        {"$set": character.dict()}
-                    )
-                else:
-                    # Insert new character
-                    await db.characters.insert_one(character.dict())
-                
-                imported_count += 1
-                
-            except Exception as e:
-                errors.append(f"Row {index + 1}: {str(e)}")
-        
-        return {
-            "message": f"Successfully imported {imported_count} characters",
-            "imported_count": imported_count,
-            "errors": errors[:10]  # Limit error messages
-        }
+        # Parse, normalize and validate off the event loop
+        def prepare():
+            df = read_roster_file(content, file.filename)
+            return prepare_roster_frame(df)
         
+        frame, errors = await asyncio.to_thread(prepare)
+        documents = frame_to_documents(frame)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
+    
+    db = await get_database()
+    counts = await upsert_characters(db, documents, errors)
+    character_index.invalidate()
+    catalog_responses.invalidate("characters")
+    character_facets.invalidate()
+    stat_catalog.invalidate()
+    imported_count = counts["inserted"] + counts["updated"]
+    
+    return {
+        "message": f"Successfully imported {imported_count} characters",
+        "imported_count": imported_count,
+        "inserted_count": counts["inserted"],
+        "updated_count": counts["updated"],
+        "error_count": len(errors),
+        "errors": format_error_report(errors)
+    }
+
+@router.post("/import-jobs", response_model=ImportJob)
+async def create_import_job(file: UploadFile = File(...)):
+    """Start a streaming import of a large CSV roster; poll the returned job for progress"""
+    if not file.filename.endswith('.csv'):
+        raise HTTPException(status_code=400, detail="Streaming import requires a CSV (.csv) file")
+    
+    # Spool the upload to disk in fixed-size pieces so memory stays flat;
+    # disk writes run in a thread so they don't block the event loop
+    total_bytes = 0
+    spool = tempfile.NamedTemporaryFile(prefix="roster-import-", suffix=".csv", delete=False)
+    try:
+        try:
+            while True:
+                piece = await file.read(UPLOAD_SPOOL_CHUNK)
+                if not piece:
+                    break
+                await asyncio.to_thread(spool.write, piece)
+                total_bytes += len(piece)
+        finally:
+            spool.close()
+        
+        db = await get_database()
+        job = ImportJob(filename=file.filename, total_bytes=total_bytes)
+        await db.import_jobs.insert_one(job.dict())
+    except BaseException:
+        # Includes cancellation when the client disconnects mid-upload
+        os.remove(spool.name)
+        raise
+    
+    start_import_job(db, job.id, spool.name)
+    return job
+
+@router.get("/import-jobs/{job_id}", response_model=ImportJob)
+async def get_import_job(job_id: str):
+    """Get progress of a streaming import job"""
+    db = await get_database()
+    
+    job = await db.import_jobs.find_one({"id": job_id})
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    
+    return ImportJob(**job)
 
 @router.get("/stats/summary")
 async def get_character_stats():
     """Get character statistics summary"""
     db = await get_database()
+    await character_facets.ensure_loaded(db)
     
-    total_characters = await db.characters.count_documents({})
-    
-    # Group by position
-    position_pipeline = [
-        {"$group": {"_id": "$position", "count": {"$sum": 1}}}
-    ]
-    position_stats = await db.characters.aggregate(position_pipeline).to_list(None)
-    
-    # Group by element
-    element_pipeline = [
-        {"$group": {"_id": "$element", "count": {"$sum": 1}}}
-    ]
-    element_stats = await db.characters.aggregate(element_pipeline).to_list(None)
-    
-    # Group by rarity
-    rarity_pipeline = [
-        {"$group": {"_id": "$base_rarity", "count": {"$sum": 1}}}
-    ]
-    rarity_stats = await db.characters.aggregate(rarity_pipeline).to_list(None)
+    # Served from the facet bitsets instead of one $group aggregation per field
+    totals = character_facets.totals()
     
     return {
-        "total_characters": total_characters,
-        "by_position": {stat["_id"]: stat["count"] for stat in position_stats},
-        "by_element": {stat["_id"]: stat["count"] for stat in element_stats},
-        "by_rarity": {stat["_id"]: stat["count"] for stat in rarity_stats}
-    }
\ No newline at end of file
+        "total_characters": totals["total"],
+        "by_position": totals["counts"]["position"],
+        "by_element": totals["counts"]["element"],
+        "by_rarity": totals["counts"]["rarity"]
+    }
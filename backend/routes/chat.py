@@ -6,6 +6,7 @@ import uuid
 from routes.auth import get_current_user
 from models.user import User
 from database import get_database
+from services.follow_graph import is_following
 
 router = APIRouter()
 
@@ -41,8 +42,7 @@ async def start_conversation(
 
     # Basic access rule: user can chat with anyone they follow (as requested)
     # If not following, deny
-    following = (await _get_user(db, current_user.id)).get("following", [])
-    if partner_id not in following:
+    if not await is_following(db, current_user.id, partner_id):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You can only chat with users you follow")
 
     # Check blocks
@@ -1,15 +1,26 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, status, Query
+from typing import List, Optional
 from datetime import datetime
 import uuid
 
-from models.user import User, UserPublic, FollowRequest
+from models.user import User, UserPublic, UserCard, FollowRequest, FollowStatusBatchRequest
 from models.team import Team
 from routes.auth import get_current_user
 from database import get_database
+from services.follow_graph import follow, unfollow, is_following, edge_page, relationships
+from services.activity_feed import read_feed
+from services.follow_suggestions import SUGGESTIONS_PER_USER
+from services.json_response import trusted_response
 
 router = APIRouter()
 
+# Fields UserPublic needs; never loads password hashes or other private fields
+USER_PUBLIC_PROJECTION = {"_id": 0, **{field: 1 for field in UserPublic.model_fields}}
+USER_CARD_PROJECTION = {"_id": 0, **{field: 1 for field in UserCard.model_fields}}
+
+FOLLOW_PAGE_SIZE = 50
+MAX_FOLLOW_PAGE_SIZE = 200
+
 @router.post("/follow")
 async def follow_user(
     follow_data: FollowRequest,
@@ -25,38 +36,18 @@ async def follow_user(
         )
     
     # Check if target user exists
-    target_user = await db.users.find_one({"id": follow_data.user_id})
+    target_user = await db.users.find_one({"id": follow_data.user_id}, {"_id": 1})
     if not target_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    current_user_doc = await db.users.find_one({"id": current_user.id})
-    following = current_user_doc.get("following", [])
-    
-    if follow_data.user_id in following:
-        # Unfollow
-        await db.users.update_one(
-            {"id": current_user.id},
-            {"$pull": {"following": follow_data.user_id}}
-        )
-        await db.users.update_one(
-            {"id": follow_data.user_id},
-            {"$pull": {"followers": current_user.id}}
-        )
+    # Toggle: removing an existing edge means unfollow, otherwise create one
+    if await unfollow(db, current_user.id, follow_data.user_id):
         return {"message": "User unfollowed", "following": False}
-    else:
-        # Follow
-        await db.users.update_one(
-            {"id": current_user.id},
-            {"$addToSet": {"following": follow_data.user_id}}
-        )
-        await db.users.update_one(
-            {"id": follow_data.user_id},
-            {"$addToSet": {"followers": current_user.id}}
-        )
-        return {"message": "User followed", "following": True}
+    await follow(db, current_user.id, follow_data.user_id)
+    return {"message": "User followed", "following": True}
 
 @router.get("/users/{user_id}", response_model=UserPublic)
 async def get_user_profile(
@@ -66,23 +57,14 @@ async def get_user_profile(
     """Get public user profile"""
     db = await get_database()
     
-    user = await db.users.find_one({"id": user_id})
+    user = await db.users.find_one({"id": user_id}, USER_PUBLIC_PROJECTION)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    # Calculate follower and following counts
-    followers_count = len(user.get("followers", []))
-    following_count = len(user.get("following", []))
-    
-    # Add counts to user data
-    user_data = dict(user)
-    user_data["followers_count"] = followers_count
-    user_data["following_count"] = following_count
-    
-    return UserPublic(**user_data)
+    return UserPublic(**user)
 
 @router.get("/users/{user_id}/follow-status")
 async def get_follow_status(
@@ -93,21 +75,64 @@ async def get_follow_status(
     db = await get_database()
     
     # Check if target user exists
-    target_user = await db.users.find_one({"id": user_id})
+    target_user = await db.users.find_one({"id": user_id}, {"_id": 1})
     if not target_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    current_user_doc = await db.users.find_one({"id": current_user.id})
-    following = current_user_doc.get("following", [])
-    
     return {
-        "is_following": user_id in following,
+        "is_following": await is_following(db, current_user.id, user_id),
         "can_follow": user_id != current_user.id  # Cannot follow yourself
     }
 
+@router.post("/follow-status:batch")
+async def get_follow_status_batch(
+    request: FollowStatusBatchRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Follow, followed-by and block flags for up to 200 users in one call, e.g. a list of follow buttons"""
+    db = await get_database()
+    
+    return {"statuses": await relationships(db, current_user.id, request.user_ids)}
+
+@router.get("/feed")
+async def get_activity_feed(
+    cursor: Optional[str] = Query(None, description="Cursor returned by the previous page"),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user)
+):
+    """Recent activity (published teams, ratings received, comments) of followed coaches"""
+    db = await get_database()
+    
+    try:
+        items, next_cursor = await read_feed(db, current_user.id, cursor, limit)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/suggestions")
+async def get_follow_suggestions(
+    limit: int = Query(10, ge=1, le=SUGGESTIONS_PER_USER),
+    current_user: User = Depends(get_current_user)
+):
+    """Coaches followed by the coaches you follow, precomputed by the suggestion job"""
+    db = await get_database()
+    
+    doc = await db.follow_suggestions.find_one(
+        {"user_id": current_user.id},
+        {"_id": 0, "suggestions": {"$slice": limit}, "computed_at": 1}
+    )
+    if not doc:
+        return {"suggestions": [], "computed_at": None}
+    
+    return doc
+
 @router.get("/users/{user_id}/teams", response_model=List[Team])
 async def get_user_public_teams(
     user_id: str,
@@ -116,12 +141,9 @@ async def get_user_public_teams(
     """Get public teams from a specific user"""
     db = await get_database()
     
-    teams_cursor = db.teams.find({"user_id": user_id, "is_public": True})
-    teams = []
-    async for team in teams_cursor:
-        teams.append(Team(**team))
+    teams = await db.teams.find({"user_id": user_id, "is_public": True}).to_list(length=None)
     
-    return teams
+    return trusted_response(Team, teams)
 
 @router.get("/leaderboard")
 async def get_leaderboard(current_user: User = Depends(get_current_user)):
@@ -129,33 +151,26 @@ async def get_leaderboard(current_user: User = Depends(get_current_user)):
     db = await get_database()
     
     # Top users by likes received
-    top_by_likes_cursor = db.users.find().sort([("total_likes_received", -1)]).limit(10)
+    top_by_likes_cursor = db.users.find({}, USER_PUBLIC_PROJECTION).sort([("total_likes_received", -1)]).limit(10)
     top_by_likes = []
     async for user in top_by_likes_cursor:
         top_by_likes.append(UserPublic(**user))
     
     # Top users by total teams
-    top_by_teams_cursor = db.users.find().sort([("total_teams", -1)]).limit(10)
+    top_by_teams_cursor = db.users.find({}, USER_PUBLIC_PROJECTION).sort([("total_teams", -1)]).limit(10)
     top_by_teams = []
     async for user in top_by_teams_cursor:
         top_by_teams.append(UserPublic(**user))
     
-    # Most followed users
-    pipeline = [
-        {"$project": {
-            "_id": 0,  # Exclude ObjectId
-            "username": 1, 
-            "profile_picture": 1, 
-            "coach_level": 1, 
-            "follower_count": {"$size": "$followers"}
-        }},
-        {"$sort": {"follower_count": -1}},
-        {"$limit": 10}
-    ]
-    
-    most_followed_cursor = db.users.aggregate(pipeline)
+    # Most followed users, served by the followers_count index
+    most_followed_cursor = db.users.find(
+        {},
+        {"_id": 0, "username": 1, "profile_picture": 1, "coach_level": 1, "followers_count": 1}
+    ).sort([("followers_count", -1)]).limit(10)
     most_followed = []
     async for user in most_followed_cursor:
+        # follower_count kept for existing clients
+        user["follower_count"] = user.get("followers_count", 0)
         most_followed.append(user)
     
     return {
@@ -164,95 +179,74 @@ async def get_leaderboard(current_user: User = Depends(get_current_user)):
         "most_followed": most_followed
     }
 
-@router.get("/followers")
-async def get_followers(current_user: User = Depends(get_current_user)):
-    """Get current user's followers"""
-    db = await get_database()
-    
-    user_doc = await db.users.find_one({"id": current_user.id})
-    follower_ids = user_doc.get("followers", [])
-    
-    if not follower_ids:
-        return {"followers": []}
+async def follow_listing(db, user_id: str, direction: str, cursor: Optional[str], limit: int) -> dict:
+    """A page of user cards for a followers/following listing, in follow order"""
+    try:
+        ids, next_cursor = await edge_page(db, user_id, direction, cursor, limit)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
     
-    followers_cursor = db.users.find({"id": {"$in": follower_ids}})
-    followers = []
-    async for follower in followers_cursor:
-        followers.append(UserPublic(**follower))
+    cards = {}
+    if ids:
+        cards_cursor = db.users.find({"id": {"$in": ids}}, USER_CARD_PROJECTION)
+        async for card in cards_cursor:
+            cards[card["id"]] = UserCard(**card)
     
-    return {"followers": followers}
+    return {direction: [cards[user_id] for user_id in ids if user_id in cards], "next_cursor": next_cursor}
+
+async def ensure_user_exists(db, user_id: str):
+    if not await db.users.find_one({"id": user_id}, {"_id": 1}):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+@router.get("/followers")
+async def get_followers(
+    cursor: Optional[str] = Query(None, description="Cursor returned by the previous page"),
+    limit: int = Query(FOLLOW_PAGE_SIZE, ge=1, le=MAX_FOLLOW_PAGE_SIZE),
+    current_user: User = Depends(get_current_user)
+):
+    """Get current user's followers, most recent first, with cursor pagination"""
+    db = await get_database()
+    return await follow_listing(db, current_user.id, "followers", cursor, limit)
 
 @router.get("/following")
-async def get_following(current_user: User = Depends(get_current_user)):
-    """Get current user's following"""
+async def get_following(
+    cursor: Optional[str] = Query(None, description="Cursor returned by the previous page"),
+    limit: int = Query(FOLLOW_PAGE_SIZE, ge=1, le=MAX_FOLLOW_PAGE_SIZE),
+    current_user: User = Depends(get_current_user)
+):
+    """Get users the current user follows, most recent first, with cursor pagination"""
     db = await get_database()
-    
-    user_doc = await db.users.find_one({"id": current_user.id})
-    following_ids = user_doc.get("following", [])
-    
-    if not following_ids:
-        return {"following": []}
-    
-    following_cursor = db.users.find({"id": {"$in": following_ids}})
-    following = []
-    async for followed_user in following_cursor:
-        following.append(UserPublic(**followed_user))
-    
-    return {"following": following}
+    return await follow_listing(db, current_user.id, "following", cursor, limit)
 
 @router.get("/users/{user_id}/followers")
 async def get_user_followers(
     user_id: str,
+    cursor: Optional[str] = Query(None, description="Cursor returned by the previous page"),
+    limit: int = Query(FOLLOW_PAGE_SIZE, ge=1, le=MAX_FOLLOW_PAGE_SIZE),
     current_user: User = Depends(get_current_user)
 ):
-    """Get followers of a specific user"""
+    """Get followers of a specific user, most recent first, with cursor pagination"""
     db = await get_database()
-    
-    user_doc = await db.users.find_one({"id": user_id})
-    if not user_doc:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    follower_ids = user_doc.get("followers", [])
-    
-    if not follower_ids:
-        return {"followers": []}
-    
-    followers_cursor = db.users.find({"id": {"$in": follower_ids}})
-    followers = []
-    async for follower in followers_cursor:
-        followers.append(UserPublic(**follower))
-    
-    return {"followers": followers}
+    await ensure_user_exists(db, user_id)
+    return await follow_listing(db, user_id, "followers", cursor, limit)
 
 @router.get("/users/{user_id}/following")
 async def get_user_following(
     user_id: str,
+    cursor: Optional[str] = Query(None, description="Cursor returned by the previous page"),
+    limit: int = Query(FOLLOW_PAGE_SIZE, ge=1, le=MAX_FOLLOW_PAGE_SIZE),
     current_user: User = Depends(get_current_user)
 ):
-    """Get following of a specific user"""
+    """Get users a specific user follows, most recent first, with cursor pagination"""
     db = await get_database()
-    
-    user_doc = await db.users.find_one({"id": user_id})
-    if not user_doc:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    following_ids = user_doc.get("following", [])
-    
-    if not following_ids:
-        return {"following": []}
-    
-    following_cursor = db.users.find({"id": {"$in": following_ids}})
-    following = []
-    async for followed_user in following_cursor:
-        following.append(UserPublic(**followed_user))
-    
-    return {"following": following}
+    await ensure_user_exists(db, user_id)
+    return await follow_listing(db, user_id, "following", cursor, limit)
 
 @router.get("/stats")
 async def get_community_stats(current_user: User = Depends(get_current_user)):
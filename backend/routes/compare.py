@@ -0,0 +1,92 @@
+from fastapi import APIRouter, HTTPException
+
+import numpy as np
+
+from database import get_database
+from models.comparison import CompareRequest
+from services.stat_engine import stat_catalog, stat_row, compare_matrix
+from services.team_scoring import score_team
+
+router = APIRouter()
+
+TEAM_PROJECTION = {
+    "_id": 0, "id": 1, "name": 1, "username": 1, "formation": 1, "summary": 1,
+    "players": 1, "bench_players": 1, "coach": 1
+}
+
+@router.post("/compare")
+async def compare(request: CompareRequest):
+    """Aligned stat matrix, deltas and rankings for up to 50 character builds or public teams"""
+    db = await get_database()
+    
+    if request.kind == "characters":
+        entries = request.characters
+    else:
+        entries = request.team_ids
+    if len(entries) < 2:
+        raise HTTPException(status_code=400, detail="At least two entities are required to compare")
+    if request.baseline >= len(entries):
+        raise HTTPException(status_code=400, detail="baseline must index one of the compared entities")
+    
+    if request.kind == "characters":
+        await stat_catalog.ensure_loaded(db)
+        unknown_characters = sorted({c.character_id for c in entries if c.character_id not in stat_catalog.characters})
+        unknown_equipment = sorted({
+            item_id for c in entries for item_id in c.equipment_ids if item_id not in stat_catalog.equipment
+        })
+        if unknown_characters or unknown_equipment:
+            raise HTTPException(
+                status_code=404,
+                detail={"unknown_characters": unknown_characters, "unknown_equipment": unknown_equipment}
+            )
+        
+        matrix = stat_catalog.character_stats(
+            [c.character_id for c in entries],
+            [c.level for c in entries],
+            [c.rarity for c in entries],
+            [c.equipment_ids for c in entries]
+        )
+        entities = []
+        for entry in entries:
+            character = stat_catalog.characters[entry.character_id]
+            entities.append({
+                "id": entry.character_id,
+                "name": character.get("name"),
+                "position": character.get("position"),
+                "element": character.get("element"),
+                "level": entry.level or character.get("base_level") or 1,
+                "rarity": entry.rarity or character.get("base_rarity"),
+                "equipment_ids": entry.equipment_ids
+            })
+    else:
+        teams = await db.teams.find(
+            {"id": {"$in": list(set(entries))}, "is_public": True},
+            TEAM_PROJECTION
+        ).to_list(length=None)
+        teams_by_id = {team["id"]: team for team in teams}
+        unknown_teams = [team_id for team_id in dict.fromkeys(entries) if team_id not in teams_by_id]
+        if unknown_teams:
+            raise HTTPException(status_code=404, detail={"unknown_teams": unknown_teams})
+        
+        rows = []
+        entities = []
+        for team_id in entries:
+            team = teams_by_id[team_id]
+            summary = team.get("summary")
+            if summary is None:
+                # Teams saved before summaries existed are scored on the fly; unscorable ones compare as zeros
+                summary, _ = await score_team(db, team)
+                team["summary"] = summary
+            rows.append(stat_row((summary or {}).get("stats") or {}))
+            entities.append({
+                "id": team_id,
+                "name": team.get("name"),
+                "username": team.get("username"),
+                "formation": team.get("formation"),
+                "player_count": (summary or {}).get("player_count", 0),
+                "average": (summary or {}).get("average", 0),
+                "scored": summary is not None
+            })
+        matrix = np.array(rows, dtype=np.int64)
+    
+    return {"kind": request.kind, "entities": entities, **compare_matrix(matrix, request.baseline)}
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional, Dict, Any
 import random
 from datetime import datetime
 from models.constellation import (
     Constellation, ConstellationCreate, ConstellationOrb, CharacterPool, DropRates,
-    GachaPull, GachaPullRequest, GachaPullResult, PlatformBonus
+    GachaPull, GachaPullRequest, GachaPullResult, PlatformBonus,
+    GachaHistoryPage, CollectionEntry, CollectionSummary
 )
 from models.character import Character
 from models.user import User
@@ -98,6 +99,47 @@ async def get_constellations():
     
     return [Constellation(**constellation) for constellation in constellations]
 
+@router.get("/history", response_model=GachaHistoryPage)
+async def get_pull_history(
+    cursor: Optional[str] = Query(None, description="Cursor returned by the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_user)
+):
+    """Get the current user's gacha pulls, newest first, with cursor pagination"""
+    db = await get_database()
+    
+    # Served by the (user_id, pull_timestamp, id) index; id breaks ties within a multi-pull
+    query = {"user_id": current_user.id}
+    if cursor:
+        cursor_timestamp, cursor_id = decode_history_cursor(cursor)
+        query["$or"] = [
+            {"pull_timestamp": {"$lt": cursor_timestamp}},
+            {"pull_timestamp": cursor_timestamp, "id": {"$lt": cursor_id}}
+        ]
+    
+    pulls_cursor = db.gacha_pulls.find(query, {"_id": 0}).sort(
+        [("pull_timestamp", -1), ("id", -1)]
+    ).limit(limit + 1)
+    pulls = await pulls_cursor.to_list(length=limit + 1)
+    
+    next_cursor = None
+    if len(pulls) > limit:
+        pulls = pulls[:limit]
+        next_cursor = encode_history_cursor(pulls[-1])
+    
+    return GachaHistoryPage(pulls=[GachaPull(**pull) for pull in pulls], next_cursor=next_cursor)
+
+@router.get("/collection", response_model=CollectionSummary)
+async def get_collection(current_user: User = Depends(get_current_user)):
+    """Get the current user's owned-characters summary"""
+    db = await get_database()
+    
+    summary = await db.user_collections.find_one({"user_id": current_user.id})
+    if not summary or not summary.get("rebuilt"):
+        summary = await rebuild_user_collection(current_user.id)
+    
+    return build_collection_summary(current_user.id, summary)
+
 @router.get("/{constellation_id}", response_model=Constellation)
 async def get_constellation(constellation_id: str):
     """Get a specific constellation by ID"""
@@ -207,9 +249,17 @@ async def pull_gacha(
         {"$set": {"kizuna_stars": new_kizuna_stars}}
     )
     
-    # Save pull records
+    # Save pull records and fold them into the user's collection summary
     if pull_results:
         await db.gacha_pulls.insert_many([pull.dict() for pull in pull_results])
+        # Only summaries built from the full pull history may be incremented
+        result = await db.user_collections.update_one(
+            {"user_id": current_user.id, "rebuilt": True},
+            collection_update_for_pulls(pull_results)
+        )
+        if result.matched_count == 0:
+            # First pull since summaries existed: the rebuild already counts the pulls just saved
+            await rebuild_user_collection(current_user.id)
     
     return GachaPullResult(
         success=True,
@@ -266,6 +316,115 @@ def select_character_from_pool(character_pool: CharacterPool, rarity: str) -> Op
     
     return random.choice(pool)
 
+def encode_history_cursor(pull: Dict[str, Any]) -> str:
+    """Build an opaque history cursor from the last pull of a page"""
+    return f"{pull['pull_timestamp'].isoformat()}|{pull['id']}"
+
+def decode_history_cursor(cursor: str):
+    """Parse a history cursor back into (pull_timestamp, id)"""
+    try:
+        timestamp, pull_id = cursor.split("|", 1)
+        return datetime.fromisoformat(timestamp), pull_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def collection_update_for_pulls(pulls: List[GachaPull]) -> Dict[str, Any]:
+    """Build a single upsert that folds a batch of pulls into a collection summary"""
+    increments: Dict[str, int] = {"total_pulls": 0}
+    rarities: Dict[str, str] = {}
+    first_pulled: Dict[str, datetime] = {}
+    last_pulled: Dict[str, datetime] = {}
+    
+    for pull in pulls:
+        prefix = f"characters.{pull.character_id}"
+        increments["total_pulls"] += 1
+        increments[f"{prefix}.count"] = increments.get(f"{prefix}.count", 0) + 1
+        increments[f"pulls_by_rarity.{pull.character_rarity}"] = increments.get(f"pulls_by_rarity.{pull.character_rarity}", 0) + 1
+        rarities[f"{prefix}.rarity"] = pull.character_rarity
+        first_pulled[f"{prefix}.first_pulled_at"] = min(pull.pull_timestamp, first_pulled.get(f"{prefix}.first_pulled_at", pull.pull_timestamp))
+        last_pulled[f"{prefix}.last_pulled_at"] = max(pull.pull_timestamp, last_pulled.get(f"{prefix}.last_pulled_at", pull.pull_timestamp))
+    
+    return {
+        "$inc": increments,
+        "$set": {**rarities, "updated_at": datetime.utcnow()},
+        "$min": first_pulled,
+        "$max": last_pulled
+    }
+
+async def rebuild_user_collection(user_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Build a collection summary from raw pulls. Summaries built this way are
+    marked `rebuilt`; documents without the flag (e.g. upserted from a
+    user's first increments only) are never trusted.
+    """
+    db = await get_database()
+    
+    pipeline = [
+        {"$match": {"user_id": user_id}},
+        {"$group": {
+            "_id": "$character_id",
+            "count": {"$sum": 1},
+            "rarity": {"$last": "$character_rarity"},
+            "first_pulled_at": {"$min": "$pull_timestamp"},
+            "last_pulled_at": {"$max": "$pull_timestamp"}
+        }}
+    ]
+    groups = await db.gacha_pulls.aggregate(pipeline).to_list(None)
+    if not groups:
+        return None
+    
+    summary = {
+        "user_id": user_id,
+        "total_pulls": 0,
+        "pulls_by_rarity": {},
+        "characters": {},
+        "rebuilt": True,
+        "updated_at": datetime.utcnow()
+    }
+    for group in groups:
+        summary["total_pulls"] += group["count"]
+        summary["pulls_by_rarity"][group["rarity"]] = summary["pulls_by_rarity"].get(group["rarity"], 0) + group["count"]
+        summary["characters"][group["_id"]] = {
+            "count": group["count"],
+            "rarity": group["rarity"],
+            "first_pulled_at": group["first_pulled_at"],
+            "last_pulled_at": group["last_pulled_at"]
+        }
+    
+    await db.user_collections.replace_one({"user_id": user_id}, summary, upsert=True)
+    return summary
+
+def build_collection_summary(user_id: str, summary: Optional[Dict[str, Any]]) -> CollectionSummary:
+    """Shape a stored collection document into the API response"""
+    if not summary:
+        return CollectionSummary(user_id=user_id)
+    
+    entries = []
+    unique_by_rarity: Dict[str, int] = {}
+    for character_id, owned in summary.get("characters", {}).items():
+        unique_by_rarity[owned["rarity"]] = unique_by_rarity.get(owned["rarity"], 0) + 1
+        entries.append(CollectionEntry(
+            character_id=character_id,
+            rarity=owned["rarity"],
+            count=owned["count"],
+            duplicates=owned["count"] - 1,
+            first_pulled_at=owned.get("first_pulled_at"),
+            last_pulled_at=owned.get("last_pulled_at")
+        ))
+    entries.sort(key=lambda entry: entry.count, reverse=True)
+    
+    total_pulls = summary.get("total_pulls", 0)
+    return CollectionSummary(
+        user_id=user_id,
+        total_pulls=total_pulls,
+        unique_characters=len(entries),
+        duplicates=total_pulls - len(entries),
+        pulls_by_rarity=summary.get("pulls_by_rarity", {}),
+        unique_by_rarity=unique_by_rarity,
+        characters=entries,
+        updated_at=summary.get("updated_at")
+    )
+
 async def initialize_sample_constellations():
     """Initialize the database with sample constellations"""
     db = await get_database()
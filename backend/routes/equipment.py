@@ -1,12 +1,16 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from typing import List, Optional
 from models.equipment import EquipmentItem, EquipmentCreate
 from database import get_database
+from services.stat_engine import stat_catalog
+from services.json_response import trusted_documents
+from services.catalog_cache import catalog_responses
 
 router = APIRouter(prefix="/equipment", tags=["equipment"])
 
 @router.get("/", response_model=List[EquipmentItem])
 async def get_equipment(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     category: Optional[str] = None,
@@ -22,10 +26,13 @@ async def get_equipment(
     if rarity and rarity != "all":
         query["rarity"] = rarity
     
-    cursor = db.equipment.find(query).skip(skip).limit(limit)
-    equipment = await cursor.to_list(length=limit)
+    async def load():
+        equipment = await db.equipment.find(query).skip(skip).limit(limit).to_list(length=limit)
+        return trusted_documents(EquipmentItem, equipment)
     
-    return [EquipmentItem(**item) for item in equipment]
+    return await catalog_responses.respond(
+        request, "equipment", ("list", skip, limit, query.get("category"), query.get("rarity")), load
+    )
 
 @router.get("/{equipment_id}", response_model=EquipmentItem)
 async def get_equipment_item(equipment_id: str):
@@ -39,14 +46,15 @@ async def get_equipment_item(equipment_id: str):
     return EquipmentItem(**equipment)
 
 @router.get("/category/{category}", response_model=List[EquipmentItem])
-async def get_equipment_by_category(category: str):
+async def get_equipment_by_category(request: Request, category: str):
     """Get all equipment items in a specific category"""
     db = await get_database()
     
-    cursor = db.equipment.find({"category": category})
-    equipment = await cursor.to_list(length=None)
+    async def load():
+        equipment = await db.equipment.find({"category": category}).to_list(length=None)
+        return trusted_documents(EquipmentItem, equipment)
     
-    return [EquipmentItem(**item) for item in equipment]
+    return await catalog_responses.respond(request, "equipment", ("category", category), load)
 
 @router.post("/", response_model=EquipmentItem)
 async def create_equipment(equipment: EquipmentCreate):
@@ -58,5 +66,7 @@ async def create_equipment(equipment: EquipmentCreate):
     
     # Insert into database
     await db.equipment.insert_one(new_equipment.dict())
+    stat_catalog.invalidate()
+    catalog_responses.invalidate("equipment")
     
     return new_equipment
\ No newline at end of file
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException, Header, Depends, status
+from typing import Optional
+import hmac
+import os
+
+from services.token_verifier import token_verifier, reload_signing_keys
+
+router = APIRouter()
+
+def require_internal_token(x_internal_token: Optional[str] = Header(None)):
+    """
+    Operator endpoints need the INTERNAL_API_TOKEN secret in X-Internal-Token;
+    without the setting they don't exist
+    """
+    expected = os.environ.get("INTERNAL_API_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_internal_token or not hmac.compare_digest(x_internal_token, expected):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid internal token")
+
+@router.get("/token-cache", dependencies=[Depends(require_internal_token)])
+async def get_token_cache_stats():
+    """Claims cache statistics of this worker's token verifier"""
+    return token_verifier.stats()
+
+@router.post("/reload-keys", dependencies=[Depends(require_internal_token)])
+async def reload_keys():
+    """Re-read the JWT signing keys in this worker, evicting claims of removed or changed keys"""
+    evicted = reload_signing_keys()
+    return {"evicted": evicted, "token_cache": token_verifier.stats()}
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+import time
+
+from database import get_database
+from services.search_index import search_indexes
+
+router = APIRouter()
+
+def matches_filter(hit: dict, field: str, value: Optional[str]) -> bool:
+    """Case-insensitive facet filter; kinds without the field are not filtered"""
+    if not value or value == "all" or hit.get(field) is None:
+        return True
+    return hit[field].lower() == value.lower()
+
+@router.get("/search")
+async def typeahead_search(
+    q: str = Query(..., min_length=1, max_length=100, description="Search text"),
+    types: Optional[str] = Query(None, description="Comma-separated subset of characters,techniques,teams"),
+    limit: int = Query(10, ge=1, le=50),
+    position: Optional[str] = None,
+    element: Optional[str] = None
+):
+    """Ranked, typo-tolerant typeahead over characters, techniques and public teams"""
+    kinds = [kind.strip() for kind in types.split(",")] if types else list(search_indexes)
+    unknown = [kind for kind in kinds if kind not in search_indexes]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown search types: {', '.join(unknown)}")
+    
+    db = await get_database()
+    started = time.perf_counter()
+    
+    results = {}
+    for kind in kinds:
+        index = search_indexes[kind]
+        await index.ensure_loaded(db)
+        results[kind] = index.search(
+            q,
+            limit=limit,
+            predicate=lambda hit: matches_filter(hit, "position", position) and matches_filter(hit, "element", element)
+        )
+    
+    return {
+        "query": q,
+        "results": results,
+        "took_ms": round((time.perf_counter() - started) * 1000, 3)
+    }
@@ -1,7 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from typing import List, Optional
 from models.team import Team, TeamCreate, TeamUpdate, Formation, Tactic, Coach
 from database import get_database
+from services.search_index import team_index
+from services.team_similarity import team_similarity
+from services.json_response import trusted_documents
+from services.catalog_cache import catalog_responses
 
 router = APIRouter(prefix="/teams", tags=["teams"])
 
@@ -40,6 +44,8 @@ async def create_team(team: TeamCreate):
     
     # Insert into database
     await db.teams.insert_one(new_team.dict())
+    team_index.upsert(new_team.dict())
+    team_similarity.upsert(new_team.dict())
     
     return new_team
 
@@ -63,6 +69,8 @@ async def update_team(team_id: str, team_update: TeamUpdate):
     
     # Return updated team
     updated_team = await db.teams.find_one({"id": team_id})
+    team_index.upsert(updated_team)
+    team_similarity.upsert(updated_team)
     return Team(**updated_team)
 
 @router.delete("/{team_id}")
@@ -73,12 +81,14 @@ async def delete_team(team_id: str):
     result = await db.teams.delete_one({"id": team_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Team not found")
+    team_index.remove(team_id)
+    team_similarity.remove(team_id)
     
     return {"message": "Team deleted successfully"}
 
 # Formations endpoints
 @router.get("/formations/", response_model=List[Formation])
-async def get_formations():
+async def get_formations(request: Request):
     """Get all available formations"""
     db = await get_database()
     
@@ -93,11 +103,13 @@ async def get_formations():
         
         if formations_to_insert:
             await db.formations.insert_many(formations_to_insert)
+            catalog_responses.invalidate("formations")
     
-    cursor = db.formations.find({})
-    formations = await cursor.to_list(length=None)
+    async def load():
+        formations = await db.formations.find({}).to_list(length=None)
+        return trusted_documents(Formation, formations)
     
-    return [Formation(**formation) for formation in formations]
+    return await catalog_responses.respond(request, "formations", "all", load)
 
 @router.get("/formations/{formation_id}", response_model=Formation)
 async def get_formation(formation_id: str):
@@ -112,14 +124,15 @@ async def get_formation(formation_id: str):
 
 # Tactics endpoints
 @router.get("/tactics/", response_model=List[Tactic])
-async def get_tactics():
+async def get_tactics(request: Request):
     """Get all available tactics"""
     db = await get_database()
     
-    cursor = db.tactics.find({})
-    tactics = await cursor.to_list(length=None)
+    async def load():
+        tactics = await db.tactics.find({}).to_list(length=None)
+        return trusted_documents(Tactic, tactics)
     
-    return [Tactic(**tactic) for tactic in tactics]
+    return await catalog_responses.respond(request, "tactics", "all", load)
 
 @router.get("/tactics/{tactic_id}", response_model=Tactic)
 async def get_tactic(tactic_id: str):
@@ -134,14 +147,15 @@ async def get_tactic(tactic_id: str):
 
 # Coaches endpoints
 @router.get("/coaches/", response_model=List[Coach])
-async def get_coaches():
+async def get_coaches(request: Request):
     """Get all available coaches"""
     db = await get_database()
     
-    cursor = db.coaches.find({})
-    coaches = await cursor.to_list(length=None)
+    async def load():
+        coaches = await db.coaches.find({}).to_list(length=None)
+        return trusted_documents(Coach, coaches)
     
-    return [Coach(**coach) for coach in coaches]
+    return await catalog_responses.respond(request, "coaches", "all", load)
 
 @router.get("/coaches/{coach_id}", response_model=Coach)
 async def get_coach(coach_id: str):
@@ -1,19 +1,26 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, status, Query, Response
+from typing import List, Optional, Dict, Any
 from models.technique import (
     Technique, TechniqueCreate, TechniqueUpdate, 
-    CharacterTechnique, LearnTechniqueRequest, EquipTechniqueRequest
+    CharacterTechnique, LearnTechniqueRequest, EquipTechniqueRequest,
+    CharacterTechniquesBatchRequest, TechniqueBatchRequest, TechniqueSlotAssignment, MAX_TECHNIQUE_SLOTS
 )
 from models.user import User
 from routes.auth import get_current_user
 from database import get_database
+from pymongo import UpdateOne, UpdateMany
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from data.sample_techniques import sample_techniques
+from services.search_index import technique_index
+from services.technique_catalog import technique_catalog
+from services.technique_query import TechniqueQueryPlan
 import uuid
 
 router = APIRouter()
 
 @router.get("/techniques/", response_model=List[Technique])
 async def get_all_techniques(
+    response: Response,
     technique_type: Optional[str] = None,
     category: Optional[str] = None,
     element: Optional[str] = None,
@@ -21,10 +28,15 @@ async def get_all_techniques(
     min_power: Optional[int] = None,
     max_power: Optional[int] = None,
     position: Optional[str] = None,  # Filter by allowed position
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    sort_by: Optional[str] = Query(None, description="power or name; search results default to relevance"),
+    order: Optional[str] = Query(None, description="asc or desc; power defaults to desc"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; all matches when omitted")
 ):
     """
-    Get all techniques with optional filtering
+    Get all techniques with optional filtering, sorting and cursor pagination.
+    The next page's cursor is returned in the X-Next-Cursor header.
     """
     db = await get_database()
     collection = db.techniques
@@ -39,47 +51,66 @@ async def get_all_techniques(
         
         if techniques_to_insert:
             await collection.insert_many(techniques_to_insert)
+            technique_index.invalidate()
+            technique_catalog.invalidate()
     
-    # Build filter query
-    query = {}
-    
-    if technique_type:
-        query["technique_type"] = technique_type
-    
-    if category:
-        query["category"] = category
-        
-    if element:
-        query["element"] = element
-        
-    if rarity:
-        query["rarity"] = rarity
-        
-    if min_power:
-        query["power"] = {"$gte": min_power}
-        
-    if max_power:
-        if "power" in query:
-            query["power"]["$lte"] = max_power
-        else:
-            query["power"] = {"$lte": max_power}
+    ranked_ids = None
+    if search:
+        # Ranked name/description match from the in-memory index instead of a regex scan;
+        # every match is kept so the remaining filters and pages see all of them
+        await technique_index.ensure_loaded(db)
+        ranked_ids = [hit["id"] for hit in technique_index.search(search, limit=None)]
+        if not ranked_ids:
+            return []
     
-    if position:
-        # Find techniques that either allow all positions (empty array) or include this position
-        query["$or"] = [
-            {"allowed_positions": []},
-            {"allowed_positions": position}
-        ]
+    try:
+        plan = TechniqueQueryPlan(
+            {"technique_type": technique_type, "category": category, "element": element, "rarity": rarity},
+            position=position,
+            min_power=min_power,
+            max_power=max_power,
+            ranked_ids=ranked_ids,
+            sort_by=sort_by,
+            order=order,
+            cursor=cursor,
+            limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
-    if search:
-        query["$or"] = [
-            {"name": {"$regex": search, "$options": "i"}},
-            {"description": {"$regex": search, "$options": "i"}}
-        ]
+    if technique_catalog.is_fresh():
+        # Warm worker: evaluate the plan against the cached catalog
+        techniques = [tech for tech in technique_catalog.techniques.values() if plan.matches(tech)]
+    else:
+        query = collection.find(plan.mongo_filter(), {"_id": 0})
+        if plan.sort:
+            query = query.sort(plan.sort)
+        hint = plan.hint()
+        if hint:
+            query = query.hint(hint)
+        if plan.limit is not None and not plan.by_relevance:
+            query = query.limit(plan.limit + 1)
+        techniques = await query.to_list(length=None)
     
-    techniques = await collection.find(query).to_list(1000)
+    techniques, next_cursor = plan.page(techniques)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return [Technique(**tech) for tech in techniques]
 
+@router.get("/techniques/graph")
+async def get_technique_graph():
+    """
+    Get the technique prerequisite graph: topological order, edges,
+    transitive prerequisites and any cycles or dangling references
+    """
+    db = await get_database()
+    await technique_catalog.ensure_loaded(db)
+    
+    return technique_catalog.graph()
+
 @router.get("/techniques/{technique_id}", response_model=Technique)
 async def get_technique_by_id(technique_id: str):
     """
@@ -108,6 +139,8 @@ async def create_technique(technique_data: TechniqueCreate):
     technique = Technique(**technique_data.dict())
     
     await collection.insert_one(technique.dict())
+    technique_index.upsert(technique.dict())
+    technique_catalog.upsert(technique.dict())
     return technique
 
 @router.get("/techniques/categories/stats")
@@ -150,6 +183,14 @@ async def get_technique_stats():
     
     return result[0]
 
+def check_body_character(character_id: str, body_character_id: Optional[str]):
+    """Reject requests whose body names a different character than the path"""
+    if body_character_id is not None and body_character_id != character_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="character_id in the body does not match the path"
+        )
+
 @router.post("/characters/{character_id}/learn-technique")
 async def learn_technique(
     character_id: str,
@@ -159,6 +200,7 @@ async def learn_technique(
     """
     Character learns a new technique
     """
+    check_body_character(character_id, request.character_id)
     db = await get_database()
     
     # Check if technique exists
@@ -178,16 +220,32 @@ async def learn_technique(
         )
     
     # Check if technique is already learned
-    existing = await db.character_techniques.find_one({
-        "character_id": character_id,
-        "technique_id": request.technique_id
-    })
-    if existing:
+    learned_ids = {
+        ct["technique_id"] for ct in await db.character_techniques.find(
+            {"character_id": character_id}, {"_id": 0, "technique_id": 1}
+        ).to_list(length=None)
+    }
+    if request.technique_id in learned_ids:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Character already knows this technique"
         )
     
+    # Check prerequisites against the cached graph
+    await technique_catalog.ensure_loaded(db)
+    if request.technique_id in technique_catalog.blocked:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"This technique cannot be learned: {'; '.join(technique_catalog.block_reasons[request.technique_id])}"
+        )
+    missing = [p for p in technique.get("prerequisites", []) if p not in learned_ids]
+    if missing:
+        names = [technique_catalog.techniques.get(p, {}).get("name", p) for p in missing]
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Learn {', '.join(names)} first"
+        )
+    
     # Check position restrictions
     technique_obj = Technique(**technique)
     if (technique_obj.allowed_positions and 
@@ -203,45 +261,277 @@ async def learn_technique(
         technique_id=request.technique_id
     )
     
-    await db.character_techniques.insert_one(char_technique.dict())
+    try:
+        await db.character_techniques.insert_one(char_technique.dict())
+    except DuplicateKeyError:
+        # A concurrent request learned it after the check above
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Character already knows this technique"
+        )
     
     return {"message": "Technique learned successfully", "technique_name": technique["name"]}
 
-@router.get("/characters/{character_id}/techniques", response_model=List[dict])
-async def get_character_techniques(
+@router.get("/characters/{character_id}/learnable-techniques")
+async def get_learnable_techniques(
     character_id: str,
+    level: Optional[int] = Query(None, ge=1, description="Level to check against; defaults to the character's base level"),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Get all techniques learned by a character
+    Techniques a character can learn next given what it already knows,
+    plus the locked ones with the reasons they are locked
+    """
+    db = await get_database()
+    
+    character = await db.characters.find_one(
+        {"id": character_id}, {"_id": 0, "id": 1, "position": 1, "base_level": 1, "base_stats": 1}
+    )
+    if not character:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Character not found"
+        )
+    
+    learned_ids = {
+        ct["technique_id"] for ct in await db.character_techniques.find(
+            {"character_id": character_id}, {"_id": 0, "technique_id": 1}
+        ).to_list(length=None)
+    }
+    
+    await technique_catalog.ensure_loaded(db)
+    result = technique_catalog.learnable(character, level or character.get("base_level", 1), learned_ids)
+    
+    return {
+        "character_id": character_id,
+        "learned": sorted(learned_ids),
+        "learnable": result["learnable"],
+        "locked": result["locked"]
+    }
+
+async def apply_technique_batch(
+    db,
+    character_id: str,
+    learn: List[str],
+    equip: List[TechniqueSlotAssignment],
+    level: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Validate a batch of learn/equip operations against the cached catalog
+    and persist it with a single bulk_write; nothing is written if any
+    operation is invalid. Learned links are upserted, so a batch that races
+    a concurrent learn of the same technique, or is retried, stays idempotent
+    """
+    character = await db.characters.find_one(
+        {"id": character_id}, {"_id": 0, "id": 1, "position": 1, "base_level": 1, "base_stats": 1}
+    )
+    if not character:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Character not found"
+        )
+    
+    links = await db.character_techniques.find(
+        {"character_id": character_id}, {"_id": 0, "technique_id": 1, "is_equipped": 1, "slot": 1}
+    ).to_list(length=None)
+    learned = {link["technique_id"] for link in links}
+    
+    await technique_catalog.ensure_loaded(db)
+    check_level = level or character.get("base_level", 1)
+    errors = []
+    
+    # Learn in topological order so prerequisites in the same batch count
+    order = {technique_id: index for index, technique_id in enumerate(technique_catalog.order)}
+    to_learn = sorted(dict.fromkeys(learn), key=lambda technique_id: order.get(technique_id, len(order)))
+    new_links = []
+    for technique_id in to_learn:
+        technique = technique_catalog.techniques.get(technique_id)
+        if technique is None:
+            errors.append({"technique_id": technique_id, "reasons": ["Technique not found"]})
+            continue
+        if technique_id in learned:
+            errors.append({"technique_id": technique_id, "reasons": ["Character already knows this technique"]})
+            continue
+        reasons = technique_catalog.unmet_requirements(technique, character, check_level, learned)
+        if reasons:
+            errors.append({"technique_id": technique_id, "reasons": reasons})
+            continue
+        learned.add(technique_id)
+        new_links.append(CharacterTechnique(character_id=character_id, technique_id=technique_id))
+    
+    requested_slots = {}
+    for assignment in equip:
+        if assignment.technique_id not in learned:
+            errors.append({"technique_id": assignment.technique_id, "reasons": ["Technique must be learned before it can be equipped"]})
+        elif assignment.slot in requested_slots:
+            errors.append({"technique_id": assignment.technique_id, "reasons": [f"Slot {assignment.slot} assigned twice"]})
+        elif assignment.technique_id in requested_slots.values():
+            errors.append({"technique_id": assignment.technique_id, "reasons": ["Technique assigned to more than one slot"]})
+        else:
+            requested_slots[assignment.slot] = assignment.technique_id
+    
+    if errors:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "Technique batch rejected", "errors": errors}
+        )
+    
+    # Resulting equipped set: requested slots replace whatever held them before;
+    # current equips, including legacy ones without a valid slot, keep counting
+    equipped_by_technique = {link["technique_id"]: link.get("slot") for link in links if link.get("is_equipped")}
+    for slot, technique_id in requested_slots.items():
+        equipped_by_technique = {t: s for t, s in equipped_by_technique.items() if s != slot}
+        equipped_by_technique[technique_id] = slot
+    if len(equipped_by_technique) > MAX_TECHNIQUE_SLOTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A character can equip at most {MAX_TECHNIQUE_SLOTS} techniques"
+        )
+    
+    operations = []
+    for link in new_links:
+        document = link.dict()
+        update = {"$setOnInsert": document}
+        if link.technique_id in equipped_by_technique:
+            del document["is_equipped"], document["slot"]
+            update["$set"] = {"is_equipped": True, "slot": equipped_by_technique[link.technique_id]}
+        operations.append(UpdateOne(
+            {"character_id": character_id, "technique_id": link.technique_id}, update, upsert=True
+        ))
+    if requested_slots:
+        new_ids = {link.technique_id for link in new_links}
+        operations.append(UpdateMany(
+            {
+                "character_id": character_id,
+                "is_equipped": True,
+                "technique_id": {"$nin": list(equipped_by_technique)}
+            },
+            {"$set": {"is_equipped": False, "slot": None}}
+        ))
+        for slot, technique_id in requested_slots.items():
+            if technique_id not in new_ids:
+                operations.append(UpdateOne(
+                    {"character_id": character_id, "technique_id": technique_id},
+                    {"$set": {"is_equipped": True, "slot": slot}}
+                ))
+    
+    if operations:
+        try:
+            await db.character_techniques.bulk_write(operations, ordered=True)
+        except BulkWriteError as e:
+            # Two upserts of the same new link can still collide on the unique index
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Character already knows this technique; retry the batch"
+            )
+    
+    return {
+        "learned": [link.technique_id for link in new_links],
+        "equipped": {
+            str(slot): technique_id
+            for technique_id, slot in sorted(equipped_by_technique.items(), key=lambda item: item[1] or 0)
+            if slot
+        }
+    }
+
+@router.post("/characters/{character_id}/techniques:batch")
+async def batch_update_character_techniques(
+    character_id: str,
+    request: TechniqueBatchRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Learn and equip many techniques in one call
     """
     db = await get_database()
     
-    # Get character-technique relationships
-    char_techniques = await db.character_techniques.find({
-        "character_id": character_id
-    }).to_list(1000)
+    result = await apply_technique_batch(db, character_id, request.learn, request.equip, request.level)
+    return {"message": "Techniques updated successfully", **result}
+
+@router.post("/characters/{character_id}/equip-technique")
+async def equip_technique(
+    character_id: str,
+    request: EquipTechniqueRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Equip a learned technique into a slot (1-4)
+    """
+    check_body_character(character_id, request.character_id)
+    if request.slot < 1 or request.slot > MAX_TECHNIQUE_SLOTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Slot must be between 1 and {MAX_TECHNIQUE_SLOTS}"
+        )
+    
+    db = await get_database()
     
+    result = await apply_technique_batch(
+        db, character_id, [], [TechniqueSlotAssignment(technique_id=request.technique_id, slot=request.slot)]
+    )
+    return {"message": "Technique equipped successfully", **result}
+
+async def join_character_techniques(db, char_techniques: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Attach technique details to character-technique links with one $in query and a dict index"""
     if not char_techniques:
         return []
     
-    # Get technique details
-    technique_ids = [ct["technique_id"] for ct in char_techniques]
-    techniques = await db.techniques.find({
-        "id": {"$in": technique_ids}
-    }).to_list(1000)
-    
-    # Combine data
-    result = []
-    for char_tech in char_techniques:
-        technique = next((t for t in techniques if t["id"] == char_tech["technique_id"]), None)
-        if technique:
-            result.append({
-                "character_technique": char_tech,
-                "technique": technique
-            })
-    
-    return result
+    technique_ids = list({ct["technique_id"] for ct in char_techniques})
+    techniques = await db.techniques.find(
+        {"id": {"$in": technique_ids}}, {"_id": 0}
+    ).to_list(length=None)
+    techniques_by_id = {technique["id"]: technique for technique in techniques}
+    
+    return [
+        {"character_technique": char_tech, "technique": techniques_by_id[char_tech["technique_id"]]}
+        for char_tech in char_techniques
+        if char_tech["technique_id"] in techniques_by_id
+    ]
+
+@router.post("/characters/techniques:batch")
+async def get_character_techniques_batch(
+    request: CharacterTechniquesBatchRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get learned techniques for many characters (e.g. a whole roster) in one request
+    """
+    db = await get_database()
+    
+    character_ids = list(dict.fromkeys(request.character_ids))
+    char_techniques = await db.character_techniques.find(
+        {"character_id": {"$in": character_ids}}, {"_id": 0}
+    ).sort([("character_id", 1), ("learned_at", 1), ("id", 1)]).to_list(length=None)
+    
+    result = {character_id: [] for character_id in character_ids}
+    for entry in await join_character_techniques(db, char_techniques):
+        result[entry["character_technique"]["character_id"]].append(entry)
+    
+    return {"techniques": result}
+
+@router.get("/characters/{character_id}/techniques", response_model=List[dict])
+async def get_character_techniques(
+    character_id: str,
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, description="Page size; all techniques when omitted"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get all techniques learned by a character
+    """
+    db = await get_database()
+    
+    # Get character-technique relationships in a stable order so pages don't overlap
+    cursor = db.character_techniques.find(
+        {"character_id": character_id}, {"_id": 0}
+    ).sort([("learned_at", 1), ("id", 1)]).skip(skip)
+    if limit:
+        cursor = cursor.limit(limit)
+    char_techniques = await cursor.to_list(length=limit)
+    
+    return await join_character_techniques(db, char_techniques)
 
 @router.delete("/characters/{character_id}/techniques/{technique_id}")
 async def forget_technique(
@@ -7,9 +7,26 @@ from models.user import User
 from models.team import Team, TeamCreate, TeamUpdate, TeamComment, LikeRequest, CommentRequest, TeamRating, TeamSaveSlot, TeamRatingSubmission
 from routes.auth import get_current_user
 from database import get_database
+from services.search_index import team_index
+from services.team_scoring import score_team, SCORED_FIELDS
+from services.team_similarity import team_similarity, TEAM_VECTOR_PROJECTION
+from services.profile_sync import team_owner_snapshot
+from services.follow_graph import is_following as follows_user
+from services.activity_feed import record_activity
+from services.json_response import trusted_response
 
 router = APIRouter()
 
+async def scored_team_summary(db, team: dict) -> dict:
+    """Validate a team and return its derived summary, rejecting invalid lineups"""
+    summary, errors = await score_team(db, team)
+    if errors:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "Team rejected", "errors": errors}
+        )
+    return summary
+
 @router.post("/teams", response_model=Team)
 async def create_team(
     team_data: TeamCreate,
@@ -22,8 +39,7 @@ async def create_team(
     team_dict = {
         "id": team_id,
         "user_id": current_user.id,
-        "username": current_user.username,
-        "user_avatar": current_user.profile_picture,
+        **team_owner_snapshot(current_user.dict()),
         "name": team_data.name,
         "formation": team_data.formation,
         "players": team_data.players,
@@ -53,8 +69,13 @@ async def create_team(
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow()
     }
+    team_dict["summary"] = await scored_team_summary(db, team_dict)
     
     await db.teams.insert_one(team_dict)
+    team_index.upsert(team_dict)
+    team_similarity.upsert(team_dict)
+    if team_dict["is_public"]:
+        await record_activity(db, current_user.dict(), "team_published", team_dict)
     
     # Update user's total_teams count
     await db.users.update_one(
@@ -69,12 +90,9 @@ async def get_user_teams(current_user: User = Depends(get_current_user)):
     """Get all teams for the current user"""
     db = await get_database()
     
-    teams_cursor = db.teams.find({"user_id": current_user.id})
-    teams = []
-    async for team in teams_cursor:
-        teams.append(Team(**team))
+    teams = await db.teams.find({"user_id": current_user.id}).to_list(length=None)
     
-    return teams
+    return trusted_response(Team, teams)
 
 @router.get("/teams/{team_id}", response_model=Team)
 async def get_team(
@@ -112,6 +130,8 @@ async def update_team(
     
     update_data = team_update.dict(exclude_unset=True)
     update_data["updated_at"] = datetime.utcnow()
+    if any(field in update_data for field in SCORED_FIELDS):
+        update_data["summary"] = await scored_team_summary(db, {**existing_team, **update_data})
     
     await db.teams.update_one(
         {"id": team_id, "user_id": current_user.id},
@@ -119,6 +139,8 @@ async def update_team(
     )
     
     updated_team = await db.teams.find_one({"id": team_id})
+    team_index.upsert(updated_team)
+    team_similarity.upsert(updated_team)
     return Team(**updated_team)
 
 @router.delete("/teams/{team_id}")
@@ -135,6 +157,8 @@ async def delete_team(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Team not found"
         )
+    team_index.remove(team_id)
+    team_similarity.remove(team_id)
     
     # Update user's total_teams count
     await db.users.update_one(
@@ -160,12 +184,19 @@ async def get_community_teams(
     filter_query = {"is_public": True}
     
     if search:
-        search_regex = {"$regex": search, "$options": "i"}
-        filter_query["$or"] = [
-            {"name": search_regex},
-            {"username": search_regex},
-            {"formation": search_regex}
+        # Candidate teams come from the in-memory name/username/formation index;
+        # every match is kept since the page is sorted and offset afterwards
+        await team_index.ensure_loaded(db)
+        team_ids = [
+            hit["id"] for hit in team_index.search(
+                search,
+                limit=None,
+                predicate=lambda hit: not formation or hit.get("formation") == formation
+            )
         ]
+        if not team_ids:
+            return []
+        filter_query["id"] = {"$in": team_ids}
     
     if formation:
         filter_query["formation"] = formation
@@ -181,12 +212,47 @@ async def get_community_teams(
     else:
         sort_query = [("created_at", -1)]
     
-    teams_cursor = db.teams.find(filter_query).sort(sort_query).skip(offset).limit(limit)
-    teams = []
-    async for team in teams_cursor:
-        teams.append(Team(**team))
+    teams = await db.teams.find(filter_query).sort(sort_query).skip(offset).limit(limit).to_list(length=limit)
     
-    return teams
+    return trusted_response(Team, teams)
+
+@router.get("/teams/{team_id}/similar")
+async def get_similar_teams(
+    team_id: str,
+    limit: int = Query(10, ge=1, le=50, description="Number of similar teams to return"),
+    current_user: User = Depends(get_current_user)
+):
+    """Public teams most similar to a team by stats, elements, formation and roster"""
+    db = await get_database()
+    
+    team = await db.teams.find_one({"id": team_id}, {"_id": 0, "user_id": 1, **TEAM_VECTOR_PROJECTION})
+    if not team or (not team.get("is_public", False) and team.get("user_id") != current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Team not found"
+        )
+    
+    await team_similarity.ensure_loaded(db)
+    ranked = team_similarity.similar(team, limit=limit)
+    if not ranked:
+        return {"team_id": team_id, "similar": []}
+    
+    card_projection = {"_id": 0, "id": 1, "name": 1, "username": 1, "user_avatar": 1, "formation": 1,
+                       "likes": 1, "views": 1, "rating": 1, "summary": 1}
+    cards = await db.teams.find(
+        {"id": {"$in": [similar_id for similar_id, _ in ranked]}, "is_public": True},
+        card_projection
+    ).to_list(length=limit)
+    cards_by_id = {card["id"]: card for card in cards}
+    
+    return {
+        "team_id": team_id,
+        "similar": [
+            {**cards_by_id[similar_id], "similarity": similarity}
+            for similar_id, similarity in ranked
+            if similar_id in cards_by_id
+        ]
+    }
 
 @router.post("/teams/{team_id}/like")
 async def like_team(
@@ -264,6 +330,10 @@ async def comment_on_team(
         {"id": team_id},
         {"$push": {"comments": comment.dict()}}
     )
+    await record_activity(db, current_user.dict(), "team_commented", team, {
+        "comment_id": comment.id,
+        "excerpt": comment.content[:140]
+    })
 
     return {"message": "Comment added successfully", "comment": comment}
 
@@ -382,6 +452,17 @@ async def rate_team(
         }
     )
     
+    # Shown in the feeds of the owner's followers
+    owner = await db.users.find_one(
+        {"id": team["user_id"]},
+        {"_id": 0, "id": 1, "username": 1, "profile_picture": 1, "followers_count": 1}
+    )
+    if owner:
+        await record_activity(db, owner, "team_rated", team, {
+            "rated_by": current_user.username,
+            "average_rating": new_averages["average_rating"]
+        })
+    
     return {"message": "Team rated successfully", "rating": new_averages}
 
 @router.get("/save-slots")
@@ -500,21 +581,13 @@ async def get_team_details(
         # Get updated team document
         team_doc = await db.teams.find_one({"id": team_id})
     
-    # Get user information
-    user = await db.users.find_one({"id": team_doc["user_id"]})
-    if user:
-        team_doc["username"] = user["username"]
-        team_doc["user_avatar"] = user.get("profile_picture", "")
-    
     # Check if current user has liked this team (check in liked_by array)
     is_liked = current_user.id in team_doc.get("liked_by", [])
     
     # Check if current user is following team owner
     is_following = False
     if team_doc["user_id"] != current_user.id:
-        current_user_doc = await db.users.find_one({"id": current_user.id})
-        if current_user_doc:
-            is_following = team_doc["user_id"] in current_user_doc.get("following", [])
+        is_following = await follows_user(db, current_user.id, team_doc["user_id"])
     
     # Check if user can rate this team (not their own team)
     can_rate = team_doc["user_id"] != current_user.id
@@ -550,12 +623,6 @@ async def get_public_team_details(team_id: str):
     # Get updated team document
     team_doc = await db.teams.find_one({"id": team_id})
     
-    # Get user information
-    user = await db.users.find_one({"id": team_doc["user_id"]})
-    if user:
-        team_doc["username"] = user["username"]
-        team_doc["user_avatar"] = user.get("profile_picture", "")
-    
     # Convert to Team model to ensure proper serialization
     team = Team(**team_doc)
     
@@ -1,5 +1,10 @@
-from fastapi import APIRouter, Response
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Request, Response
+from typing import Optional, Tuple
+from collections import OrderedDict
+from io import BytesIO
+import asyncio
+import hashlib
+import threading
 
 try:
     from PIL import Image, ImageDraw, ImageFont
@@ -10,56 +15,123 @@ except Exception:
 
 router = APIRouter()
 
-@router.get("/placeholder/{width}/{height}")
-def placeholder_image(width: int, height: int, text: Optional[str] = None, bg: Optional[str] = None, fg: Optional[str] = None):
-    """
-    Simple dynamic placeholder image generator used by seeded data.
-    - width/height: image size
-    - text: optional text to render (defaults to WIDTHxHEIGHT)
-    - bg: optional background hex (e.g. 1e3a8a). Defaults to a blue tone
-    - fg: optional foreground/text hex. Defaults to white
-    """
-    # Fallback: if Pillow is not available, return a 1x1 transparent PNG
-    if Image is None:
-        # 1x1 PNG transparent
-        pixel = bytes([137,80,78,71,13,10,26,10,0,0,0,13,73,72,68,82,0,0,0,1,0,0,0,1,8,6,0,0,0,31,21,196,137,0,0,0,1,115,82,71,66,0,174,206,28,233,0,0,0,10,73,68,65,84,120,156,99,0,1,0,0,5,0,1,13,10,38,187,0,0,0,0,73,69,78,68,174,66,96,130])
-        return Response(content=pixel, media_type="image/png")
-
-    # Parse colors
-    def parse_hex(h: Optional[str], default: str) -> tuple[int,int,int]:
-        val = (h or default).lstrip('#')
-        if len(val) == 3:
-            val = ''.join(c*2 for c in val)
-        try:
-            return tuple(int(val[i:i+2], 16) for i in range(0, 6, 2))  # type: ignore
-        except Exception:
-            val = default.lstrip('#')
-            return tuple(int(val[i:i+2], 16) for i in range(0, 6, 2))  # type: ignore
+MAX_PLACEHOLDER_SIZE = 1024  # Largest width/height rendered, in pixels
+MAX_PLACEHOLDER_TEXT = 64
+PLACEHOLDER_CACHE_SIZE = 512  # Encoded PNGs kept in memory (most are well under 1 KB)
+# Output depends only on the URL, so browsers and CDNs may keep it forever
+PLACEHOLDER_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Sizes referenced by the seeded characters, equipment, coaches and techniques
+PREWARM_SIZES = [(30, 30), (40, 40), (50, 50), (80, 80), (150, 150)]
 
-    bg_rgb = parse_hex(bg, '#1e3a8a')  # blue-800
-    fg_rgb = parse_hex(fg, '#ffffff')  # white
+# 1x1 transparent PNG served when Pillow is not available
+TRANSPARENT_PIXEL = bytes([137,80,78,71,13,10,26,10,0,0,0,13,73,72,68,82,0,0,0,1,0,0,0,1,8,6,0,0,0,31,21,196,137,0,0,0,1,115,82,71,66,0,174,206,28,233,0,0,0,10,73,68,65,84,120,156,99,0,1,0,0,5,0,1,13,10,38,187,0,0,0,0,73,69,78,68,174,66,96,130])
 
-    img = Image.new('RGB', (max(1, width), max(1, height)), color=bg_rgb)
-    draw = ImageDraw.Draw(img)
+PlaceholderKey = Tuple[int, int, str, Tuple[int, int, int], Tuple[int, int, int]]
 
-    label = text or f"{width}x{height}"
+_placeholder_cache: "OrderedDict[PlaceholderKey, Tuple[bytes, str]]" = OrderedDict()
+_placeholder_lock = threading.Lock()
+_font = None
 
-    # Try to load a default font; fallback to simple text at top-left
-    font = None
+def parse_hex(h: Optional[str], default: str) -> Tuple[int, int, int]:
+    val = (h or default).lstrip('#')
+    if len(val) == 3:
+        val = ''.join(c*2 for c in val)
     try:
-        font = ImageFont.load_default()
+        return tuple(int(val[i:i+2], 16) for i in range(0, 6, 2))  # type: ignore
     except Exception:
-        font = None
+        val = default.lstrip('#')
+        return tuple(int(val[i:i+2], 16) for i in range(0, 6, 2))  # type: ignore
 
+def load_font():
+    """Default Pillow font, loaded once per process"""
+    global _font
+    if _font is None:
+        try:
+            _font = ImageFont.load_default()
+        except Exception:
+            _font = False
+    return _font or None
+
+def render_placeholder(key: PlaceholderKey) -> bytes:
+    """Render and PNG-encode one placeholder"""
+    width, height, label, bg_rgb, fg_rgb = key
+    img = Image.new('RGB', (width, height), color=bg_rgb)
+    draw = ImageDraw.Draw(img)
+
+    # Centered text with the default font; fallback to simple text at top-left
+    font = load_font()
     if font is not None:
         tw, th = draw.textbbox((0, 0), label, font=font)[2:]
         draw.text(((width - tw) / 2, (height - th) / 2), label, fill=fg_rgb, font=font)
     else:
         draw.text((4, 4), label, fill=fg_rgb)
 
-    # Return as PNG
-    from io import BytesIO
     buf = BytesIO()
-    img.save(buf, format='PNG')
-    buf.seek(0)
-    return Response(content=buf.read(), media_type="image/png")
\ No newline at end of file
+    img.save(buf, format='PNG', optimize=True)
+    return buf.getvalue()
+
+def cached_placeholder(key: PlaceholderKey) -> Optional[Tuple[bytes, str]]:
+    with _placeholder_lock:
+        entry = _placeholder_cache.get(key)
+        if entry is not None:
+            _placeholder_cache.move_to_end(key)
+        return entry
+
+def store_placeholder(key: PlaceholderKey, content: bytes) -> Tuple[bytes, str]:
+    entry = (content, '"' + hashlib.sha1(content).hexdigest() + '"')
+    with _placeholder_lock:
+        _placeholder_cache[key] = entry
+        _placeholder_cache.move_to_end(key)
+        while len(_placeholder_cache) > PLACEHOLDER_CACHE_SIZE:
+            _placeholder_cache.popitem(last=False)
+    return entry
+
+def placeholder_key(width: int, height: int, text: Optional[str], bg: Optional[str], fg: Optional[str]) -> PlaceholderKey:
+    """Normalized cache key, so equivalent colour spellings share one entry"""
+    return (
+        width,
+        height,
+        text or f"{width}x{height}",
+        parse_hex(bg, '#1e3a8a'),  # blue-800
+        parse_hex(fg, '#ffffff')   # white
+    )
+
+def warm_placeholder_cache(sizes=PREWARM_SIZES):
+    """Render the default placeholders for the given sizes ahead of the first request"""
+    if Image is None:
+        return
+    for width, height in sizes:
+        key = placeholder_key(width, height, None, None, None)
+        if cached_placeholder(key) is None:
+            store_placeholder(key, render_placeholder(key))
+
+@router.get("/placeholder/{width}/{height}")
+async def placeholder_image(request: Request, width: int, height: int, text: Optional[str] = None, bg: Optional[str] = None, fg: Optional[str] = None):
+    """
+    Simple dynamic placeholder image generator used by seeded data.
+    - width/height: image size (1-1024)
+    - text: optional text to render (defaults to WIDTHxHEIGHT)
+    - bg: optional background hex (e.g. 1e3a8a). Defaults to a blue tone
+    - fg: optional foreground/text hex. Defaults to white
+    Encoded PNGs are kept in an LRU cache and served with a strong ETag.
+    """
+    if not (1 <= width <= MAX_PLACEHOLDER_SIZE and 1 <= height <= MAX_PLACEHOLDER_SIZE):
+        raise HTTPException(status_code=400, detail=f"Width and height must be between 1 and {MAX_PLACEHOLDER_SIZE}")
+    if text is not None and len(text) > MAX_PLACEHOLDER_TEXT:
+        raise HTTPException(status_code=400, detail=f"Text must be at most {MAX_PLACEHOLDER_TEXT} characters")
+
+    # Fallback: if Pillow is not available, return a 1x1 transparent PNG
+    if Image is None:
+        return Response(content=TRANSPARENT_PIXEL, media_type="image/png")
+
+    key = placeholder_key(width, height, text, bg, fg)
+    entry = cached_placeholder(key)
+    if entry is None:
+        # Render off the event loop; concurrent misses for one key may both render, which is harmless
+        entry = store_placeholder(key, await asyncio.to_thread(render_placeholder, key))
+    content, etag = entry
+
+    headers = {"ETag": etag, "Cache-Control": PLACEHOLDER_CACHE_CONTROL}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type="image/png", headers=headers)
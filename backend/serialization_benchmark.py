@@ -0,0 +1,122 @@
+"""
+Micro-benchmark: per-item cost of serving list endpoints.
+
+Compares the previous path (Model(**doc) in the handler, then what
+FastAPI does with the result for a response_model: dump each model,
+validate the list again, serialize it and encode with stdlib JSON) with the
+trusted-document fast path rendered by orjson. Runs offline on synthetic
+documents shaped like the seeded catalog.
+
+Usage: python serialization_benchmark.py [items] [repeats]
+"""
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import List
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from models.character import Character
+from models.equipment import EquipmentItem
+from models.team import Team
+from services.json_response import APIResponse, trusted_documents
+
+STATS = ["kick", "control", "technique", "intelligence", "pressure", "agility", "physical"]
+
+
+def character_doc(i: int) -> dict:
+    return {
+        "_id": ObjectId(),
+        "id": str(uuid.uuid4()),
+        "name": f"Player {i}",
+        "nickname": f"P{i}",
+        "title": "Striker",
+        "base_level": 50,
+        "base_rarity": "Legendary",
+        "position": ["FW", "MF", "DF", "GK"][i % 4],
+        "element": ["Fire", "Earth", "Air", "Wood"][i % 4],
+        "jersey_number": i % 99,
+        "portrait": f"/api/placeholder/100/100?text=P{i}",
+        "base_stats": {stat: {"main": 80 + i % 20, "secondary": 60} for stat in STATS},
+        "description": "A synthetic player used for benchmarking.",
+        "hissatsu": [{"name": f"Shot {n}", "description": "Powerful shot", "type": "Shot"} for n in range(3)],
+        "team_passives": [{"name": "Captain", "description": "Boosts the team"}],
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow(),
+    }
+
+
+def equipment_doc(i: int) -> dict:
+    return {
+        "_id": ObjectId(),
+        "id": str(uuid.uuid4()),
+        "name": f"Boots {i}",
+        "rarity": "Epic",
+        "category": "Boots",
+        "stats": {"kick": 10, "agility": 5},
+        "description": "Synthetic equipment",
+        "created_at": datetime.utcnow(),
+    }
+
+
+def team_doc(i: int) -> dict:
+    return {
+        "_id": ObjectId(),
+        "id": str(uuid.uuid4()),
+        "name": f"Team {i}",
+        "user_id": str(uuid.uuid4()),
+        "username": f"coach{i}",
+        "formation": "4-4-2",
+        "players": [{"character_id": str(uuid.uuid4()), "position_id": f"pos{n}", "user_level": 99} for n in range(11)],
+        "bench_players": [{"character_id": str(uuid.uuid4()), "slot_id": f"bench{n}"} for n in range(5)],
+        "tags": ["attack", "fire"],
+        "likes": i,
+        "liked_by": [str(uuid.uuid4()) for _ in range(10)],
+        "comments": [
+            {"id": str(uuid.uuid4()), "user_id": "u", "username": "fan", "content": "Nice team", "created_at": datetime.utcnow()}
+            for _ in range(3)
+        ],
+        "detailed_rating": {"fun": 4.0, "total_ratings": 2, "average_rating": 4.0},
+        "summary": {"total": 5000, "average": 450.5, "stats": {stat: 700 for stat in STATS}},
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow(),
+    }
+
+
+def previous_path(model, adapter: TypeAdapter, docs: List[dict]) -> bytes:
+    items = [model(**doc) for doc in docs]
+    validated = adapter.validate_python([item.model_dump(by_alias=True) for item in items])
+    return JSONResponse(adapter.dump_python(validated, mode="json")).body
+
+
+def fast_path(model, docs: List[dict]) -> bytes:
+    return APIResponse(trusted_documents(model, docs)).body
+
+
+def per_item_us(fn, items: int, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best / items * 1e6
+
+
+def main():
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    print(f"{items} items, best of {repeats} runs, microseconds per item")
+    print(f"{'model':<16}{'before':>10}{'after':>10}{'speedup':>10}")
+    for model, make_doc in ((Character, character_doc), (EquipmentItem, equipment_doc), (Team, team_doc)):
+        docs = [make_doc(i) for i in range(items)]
+        adapter = TypeAdapter(List[model])
+        before = per_item_us(lambda: previous_path(model, adapter, docs), items, repeats)
+        after = per_item_us(lambda: fast_path(model, docs), items, repeats)
+        print(f"{model.__name__:<16}{before:>10.1f}{after:>10.1f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
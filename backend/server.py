@@ -1,8 +1,18 @@
 from fastapi import FastAPI
+import asyncio
+import logging
+import signal
 from fastapi.middleware.cors import CORSMiddleware
 from database import init_database
+from services.token_verifier import reload_signing_keys
+from services.rate_limit import RateLimitMiddleware
+from services.json_response import APIResponse
+from services.compression import CompressionMiddleware
 
-app = FastAPI(title="Inazuma Eleven API", version="1.0.0")
+# Service loggers (key reloads, background jobs) report at INFO alongside uvicorn's
+logging.basicConfig(level=logging.INFO, format="%(levelname)s:     %(name)s - %(message)s")
+
+app = FastAPI(title="Inazuma Eleven API", version="1.0.0", default_response_class=APIResponse)
 
 # Add CORS middleware
 # Tight CORS: allow only the frontend origin from env if provided, else fallback to preview host
@@ -18,6 +28,9 @@ else:
     # We cannot access it here server-side; keep empty to force strict mode and rely on same-origin.
     ALLOWED_ORIGINS = []
 
+# Added before CORS so 429 responses still carry CORS headers
+app.add_middleware(RateLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=ALLOWED_ORIGINS,
@@ -25,11 +38,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Retry-After"],
 )
 
+# Outermost: gzip/brotli for JSON and text bodies; images and precompressed catalogs pass through
+app.add_middleware(CompressionMiddleware)
+
 @app.on_event("startup")
 async def startup_event():
     await init_database()
+    # Render the placeholder sizes used by the seeded catalog before the first roster page asks for them
+    if os.environ.get('PLACEHOLDER_PREWARM', '1') != '0':
+        from routes.utils import warm_placeholder_cache
+        await asyncio.to_thread(warm_placeholder_cache)
+    # Recompute "who to follow" suggestions now and then periodically
+    if os.environ.get('FOLLOW_SUGGESTIONS_JOB', '1') != '0':
+        from database import get_database
+        from services.follow_suggestions import start_suggestion_job
+        start_suggestion_job(await get_database())
+    # `kill -HUP <pid>` re-reads the JWT signing keys after a rotation, without a restart
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, reload_signing_keys)
+    except (NotImplementedError, AttributeError):
+        pass  # No SIGHUP on this platform; use POST /api/internal/reload-keys
 
 @app.get("/")
 async def root():
@@ -41,7 +72,7 @@ async def status():
 
 # Include routers
 try:
-    from routes import auth, user_teams, community, teams, characters, equipment, constellations, techniques, utils, chat
+    from routes import auth, user_teams, community, teams, characters, equipment, constellations, techniques, utils, chat, search, compare, assets, internal
     app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
     app.include_router(user_teams.router, prefix="/api", tags=["user_teams"])
     app.include_router(community.router, prefix="/api/community", tags=["community"])
@@ -52,6 +83,10 @@ try:
     app.include_router(techniques.router, prefix="/api", tags=["techniques"])
     app.include_router(utils.router, prefix="/api", tags=["utils"])
     app.include_router(chat.router, prefix="/api", tags=["chat"])
+    app.include_router(search.router, prefix="/api", tags=["search"])
+    app.include_router(compare.router, prefix="/api", tags=["compare"])
+    app.include_router(assets.router, prefix="/api", tags=["assets"])
+    app.include_router(internal.router, prefix="/api/internal", tags=["internal"], include_in_schema=False)
 except Exception as e:
     print(f"Error importing routes: {e}")
 
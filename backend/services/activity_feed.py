@@ -0,0 +1,177 @@
+"""
+Activity feed of followed coaches with hybrid fan-out.
+
+Every activity is recorded once in `activities`. For accounts below
+FANOUT_FOLLOWER_LIMIT followers it is also pushed, in the background,
+into each follower's capped inbox document (`feed_inbox`, newest first,
+at most INBOX_SIZE items). Activities of high-follower accounts are not
+fanned out; readers merge them in from `activities` with one range
+query over the few such accounts they follow. Items are shown only while
+their team is still public, checked with one $in lookup on teams. A feed
+page is therefore one inbox read, at most one indexed range query and
+one team lookup, however many accounts a user follows.
+"""
+import asyncio
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from services.background import spawn
+from services.periodic_index import PeriodicIndex
+
+INBOX_SIZE = 500  # Items kept per user inbox
+FANOUT_FOLLOWER_LIMIT = 10000  # Accounts with more followers are merged on read
+FANOUT_BATCH_SIZE = 1000
+ACTIVITY_TTL_DAYS = 90
+CELEBRITY_REFRESH_SECONDS = 60
+
+ACTIVITY_INDEXES = [
+    ([("actor_id", 1), ("created_at", -1), ("id", -1)], {}),
+    ([("created_at", 1)], {"expireAfterSeconds": ACTIVITY_TTL_DAYS * 24 * 3600}),
+]
+
+class _CelebrityCache(PeriodicIndex):
+    """Ids of accounts whose activities are merged on read, refreshed periodically"""
+
+    refresh_seconds = CELEBRITY_REFRESH_SECONDS
+
+    def __init__(self):
+        super().__init__()
+        self.ids: List[str] = []
+
+    async def _load(self, db):
+        # Served by the followers_count index
+        docs = await db.users.find(
+            {"followers_count": {"$gte": FANOUT_FOLLOWER_LIMIT}},
+            {"_id": 0, "id": 1}
+        ).to_list(length=None)
+        self.ids = [doc["id"] for doc in docs]
+
+    async def get(self, db) -> List[str]:
+        await self.ensure_loaded(db)
+        return self.ids
+
+
+celebrities = _CelebrityCache()
+
+
+def encode_feed_cursor(item: Dict[str, Any]) -> str:
+    return f"{item['created_at'].isoformat()}|{item['id']}"
+
+
+def decode_feed_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        created_at, activity_id = cursor.split("|", 1)
+        return datetime.fromisoformat(created_at), activity_id
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+
+def _sort_key(item: Dict[str, Any]):
+    return item["created_at"], item["id"]
+
+
+async def record_activity(db, actor: Dict[str, Any], activity_type: str, team: Dict[str, Any], data: Optional[Dict[str, Any]] = None):
+    """
+    Record an activity by `actor` (a user document or model dict) about a
+    team, and schedule its fan-out to the actor's followers' inboxes.
+    """
+    activity = {
+        "id": str(uuid.uuid4()),
+        "type": activity_type,
+        "actor_id": actor["id"],
+        "actor_username": actor.get("username"),
+        "actor_avatar": actor.get("profile_picture"),
+        "team_id": team["id"],
+        "team_name": team.get("name"),
+        "data": data or {},
+        "created_at": datetime.utcnow()
+    }
+    await db.activities.insert_one(dict(activity))
+
+    if actor.get("followers_count", 0) < FANOUT_FOLLOWER_LIMIT:
+        spawn(fan_out(db, activity))
+    return activity
+
+
+async def fan_out(db, activity: Dict[str, Any]) -> int:
+    """Push an activity onto every follower's capped inbox, newest first"""
+    push = {"$push": {"items": {"$each": [activity], "$position": 0, "$slice": INBOX_SIZE}}}
+    delivered = 0
+    batch: List[UpdateOne] = []
+    edges = db.follows.find({"followee_id": activity["actor_id"]}, {"_id": 0, "follower_id": 1})
+    async for edge in edges:
+        batch.append(UpdateOne({"user_id": edge["follower_id"]}, push, upsert=True))
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            await db.feed_inbox.bulk_write(batch, ordered=False)
+            delivered += len(batch)
+            batch = []
+    if batch:
+        await db.feed_inbox.bulk_write(batch, ordered=False)
+        delivered += len(batch)
+    return delivered
+
+
+async def visible_activities(db, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Items whose team still exists and is public, with one $in lookup.
+    Activities are snapshots, and a team may have been made private or
+    deleted since it was recorded.
+    """
+    team_ids = list({item["team_id"] for item in items})
+    visible = {
+        team["id"]
+        async for team in db.teams.find({"id": {"$in": team_ids}, "is_public": True}, {"_id": 0, "id": 1})
+    }
+    return [item for item in items if item["team_id"] in visible]
+
+
+async def read_feed(db, user_id: str, cursor: Optional[str], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of a user's feed, newest first; returns (items, next cursor)"""
+    after = decode_feed_cursor(cursor) if cursor else None
+
+    celebrity_ids = await celebrities.get(db)
+    inbox, followed_celebrities = await asyncio.gather(
+        db.feed_inbox.find_one({"user_id": user_id}, {"_id": 0, "items": 1}),
+        db.follows.find(
+            {"follower_id": user_id, "followee_id": {"$in": celebrity_ids}},
+            {"_id": 0, "followee_id": 1}
+        ).to_list(length=None) if celebrity_ids else asyncio.sleep(0, [])
+    )
+    # Concurrent fan-outs can land slightly out of order, so sort rather than trust push order
+    inbox_items = sorted((inbox or {}).get("items", []), key=_sort_key, reverse=True)
+    followed_ids = [edge["followee_id"] for edge in followed_celebrities]
+
+    # Usually one round; another batch is read only when hidden teams left the page short
+    items: List[Dict[str, Any]] = []
+    position = after
+    while len(items) <= limit:
+        wanted = limit + 1 - len(items)
+        batch = [item for item in inbox_items if position is None or _sort_key(item) < position][:wanted]
+        if followed_ids:
+            query: Dict[str, Any] = {"actor_id": {"$in": followed_ids}}
+            if position is not None:
+                query["$or"] = [
+                    {"created_at": {"$lt": position[0]}},
+                    {"created_at": position[0], "id": {"$lt": position[1]}}
+                ]
+            merged = await db.activities.find(query, {"_id": 0}).sort(
+                [("created_at", -1), ("id", -1)]
+            ).limit(wanted).to_list(length=wanted)
+            # An account may have crossed the threshold after its activity was fanned out
+            by_id = {item["id"]: item for item in batch + merged}
+            batch = sorted(by_id.values(), key=_sort_key, reverse=True)[:wanted]
+        if not batch:
+            break
+        items.extend(await visible_activities(db, batch))
+        if len(batch) < wanted:
+            break
+        position = _sort_key(batch[-1])
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_feed_cursor(items[-1])
+    return items, next_cursor
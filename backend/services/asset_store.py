@@ -0,0 +1,238 @@
+"""
+Content-addressed image assets.
+
+Uploaded images (data URLs or raw base64) are decoded once, validated and
+resized by Pillow into fixed square thumbnails in a process pool, then
+written to a filesystem or GridFS backend under the SHA-256 of the
+original bytes. Documents store only the asset URL, so user and team
+documents no longer carry inline images.
+
+Configuration:
+- ASSET_BACKEND: "filesystem" (default) or "gridfs"
+- ASSET_DIR: filesystem root, defaults to backend/uploads/assets
+- ASSET_WORKERS: image processing processes, defaults to 2
+"""
+import asyncio
+import base64
+import binascii
+import hashlib
+import io
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+logger = logging.getLogger(__name__)
+
+ASSET_URL_PREFIX = "/api/assets/"
+THUMBNAIL_SIZES = {"sm": 64, "md": 128, "lg": 256}
+DEFAULT_THUMBNAIL = "md"  # Size stored in documents
+MAX_IMAGE_BYTES = 5 * 1024 * 1024
+MAX_IMAGE_PIXELS = 4096 * 4096
+THUMBNAIL_FORMAT = "WEBP" if features.check("webp") else "PNG"
+
+# Matches image fields holding inline data rather than a URL
+INLINE_IMAGE_FILTER = {"$nin": [None, ""], "$not": {"$regex": "^(/|https?://)"}}
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+class InvalidImageError(ValueError):
+    """Upload is not a decodable image within the size limits"""
+
+
+def decode_image_data(value: str) -> bytes:
+    """Bytes of a data URL (data:image/png;base64,...) or bare base64 string"""
+    if value.startswith("data:"):
+        header, _, value = value.partition(",")
+        if ";base64" not in header:
+            raise InvalidImageError("Image data URLs must be base64 encoded")
+    try:
+        raw = base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        raise InvalidImageError("Image is not valid base64")
+    if len(raw) > MAX_IMAGE_BYTES:
+        raise InvalidImageError(f"Image exceeds {MAX_IMAGE_BYTES // (1024 * 1024)} MB")
+    return raw
+
+
+def render_thumbnails(raw: bytes) -> Dict[str, bytes]:
+    """Center-cropped square thumbnails for every size; runs in a worker process"""
+    try:
+        with Image.open(io.BytesIO(raw)) as image:
+            if image.width * image.height > MAX_IMAGE_PIXELS:
+                raise InvalidImageError("Image dimensions are too large")
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise InvalidImageError("File is not a supported image")
+
+    thumbnails = {}
+    for name, size in THUMBNAIL_SIZES.items():
+        thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        buf = io.BytesIO()
+        thumbnail.save(buf, format=THUMBNAIL_FORMAT, quality=85)
+        thumbnails[name] = buf.getvalue()
+    return thumbnails
+
+
+def media_type(data: bytes) -> str:
+    """Content type from the stored bytes' signature"""
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    return "application/octet-stream"
+
+
+class FilesystemAssetBackend:
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    async def exists(self, key: str) -> bool:
+        return await asyncio.to_thread(self._path(key).exists)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            return await asyncio.to_thread(path.read_bytes)
+        except FileNotFoundError:
+            return None
+
+    def _write(self, key: str, data: bytes):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent)
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.replace(tmp_path, path)
+
+    async def put(self, key: str, data: bytes):
+        await asyncio.to_thread(self._write, key, data)
+
+
+class GridFSAssetBackend:
+    def __init__(self, db):
+        from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+        self.bucket = AsyncIOMotorGridFSBucket(db, bucket_name="assets")
+
+    async def exists(self, key: str) -> bool:
+        return bool(await self.bucket.find({"filename": key}, limit=1).to_list(length=1))
+
+    async def get(self, key: str) -> Optional[bytes]:
+        from gridfs.errors import NoFile
+        try:
+            stream = await self.bucket.open_download_stream_by_name(key)
+        except NoFile:
+            return None
+        return await stream.read()
+
+    async def put(self, key: str, data: bytes):
+        await self.bucket.upload_from_stream(key, data, metadata={"content_type": media_type(data)})
+
+
+_backend = None
+
+
+def get_backend(db):
+    global _backend
+    if _backend is None:
+        if os.environ.get("ASSET_BACKEND", "filesystem") == "gridfs":
+            _backend = GridFSAssetBackend(db)
+        else:
+            default_root = Path(__file__).resolve().parent.parent / "uploads" / "assets"
+            _backend = FilesystemAssetBackend(os.environ.get("ASSET_DIR") or str(default_root))
+    return _backend
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=int(os.environ.get("ASSET_WORKERS", "2")))
+    return _executor
+
+
+def asset_key(digest: str, size: str) -> str:
+    return f"{digest[:2]}/{digest}/{size}"
+
+
+def asset_url(digest: str, size: str = DEFAULT_THUMBNAIL) -> str:
+    return f"{ASSET_URL_PREFIX}{digest}/{size}"
+
+
+def is_inline_image(value: Optional[str]) -> bool:
+    """Whether a stored image field still holds image data rather than a URL"""
+    if not value:
+        return False
+    return not value.startswith(("/", "http://", "https://"))
+
+
+async def store_image(db, value: str) -> str:
+    """Decode, thumbnail and store an uploaded image; returns its asset URL"""
+    raw = decode_image_data(value)
+    digest = hashlib.sha256(raw).hexdigest()
+    backend = get_backend(db)
+
+    # Same bytes, same digest: an already stored image is not processed again
+    if not await backend.exists(asset_key(digest, DEFAULT_THUMBNAIL)):
+        loop = asyncio.get_running_loop()
+        thumbnails = await loop.run_in_executor(_get_executor(), render_thumbnails, raw)
+        # The default size is written last, so its presence means the set is complete
+        for size in sorted(thumbnails, key=lambda name: name == DEFAULT_THUMBNAIL):
+            await backend.put(asset_key(digest, size), thumbnails[size])
+
+    return asset_url(digest)
+
+
+async def resolve_image_field(db, value: Optional[str]) -> Optional[str]:
+    """Asset URL for an image field: inline images are stored, URLs pass through"""
+    if not is_inline_image(value):
+        return value
+    return await store_image(db, value)
+
+
+async def load_asset(db, digest: str, size: str) -> Optional[bytes]:
+    return await get_backend(db).get(asset_key(digest, size))
+
+
+async def migrate_inline_profile_pictures(db) -> int:
+    """
+    Move base64 profile pictures still stored on users into the asset store.
+    Pictures that don't decode are logged and left inline.
+    """
+    migrated = 0
+    cursor = db.users.find(
+        {"profile_picture": INLINE_IMAGE_FILTER},
+        {"_id": 0, "id": 1, "profile_picture": 1}
+    )
+    async for user in cursor:
+        try:
+            url = await store_image(db, user["profile_picture"])
+        except InvalidImageError:
+            # Keep the original data; it may still be recoverable by hand
+            logger.warning("Skipping profile picture of user %s: not a readable image", user["id"])
+            continue
+        await db.users.update_one({"id": user["id"]}, {"$set": {"profile_picture": url}})
+        await db.teams.update_many({"user_id": user["id"]}, {"$set": {"user_avatar": url}})
+        migrated += 1
+
+    # Teams still carrying an inline copy of an owner picture that has since changed
+    stale_owners = await db.teams.distinct("user_id", {"user_avatar": INLINE_IMAGE_FILTER})
+    for user_id in stale_owners:
+        user = await db.users.find_one({"id": user_id}, {"_id": 0, "profile_picture": 1})
+        picture = (user or {}).get("profile_picture")
+        if is_inline_image(picture):
+            continue  # Skipped above; its teams keep their copy too
+        await db.teams.update_many(
+            {"user_id": user_id, "user_avatar": INLINE_IMAGE_FILTER},
+            {"$set": {"user_avatar": picture}}
+        )
+    return migrated
@@ -0,0 +1,19 @@
+"""
+Fire-and-forget background tasks.
+
+The event loop only keeps weak references to tasks, so a task nobody
+holds can be garbage collected before it finishes. spawn() keeps each
+task referenced until it is done.
+"""
+import asyncio
+from typing import Any, Coroutine
+
+_running_tasks = set()
+
+
+def spawn(coro: Coroutine[Any, Any, Any]) -> asyncio.Task:
+    """Schedule `coro` on the running loop, kept referenced until it finishes"""
+    task = asyncio.create_task(coro)
+    _running_tasks.add(task)
+    task.add_done_callback(_running_tasks.discard)
+    return task
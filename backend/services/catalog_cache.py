@@ -0,0 +1,92 @@
+"""
+Cached, precompressed catalog responses.
+
+Catalog lists (characters, equipment, formations, tactics, coaches) change
+rarely but are fetched on every team builder visit. Each rendered body
+is kept together with its gzip and brotli encodings, compressed once at
+maximum level when the entry is built, and the encoding matching the
+request's Accept-Encoding is served as-is. Entries belong to a
+collection version: write routes call invalidate(collection), and entries
+expire after the shared REFRESH_SECONDS like the in-memory indexes.
+Responses carry an ETag so unchanged catalogs answer 304.
+"""
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from fastapi import Request, Response
+
+from services.compression import compress, negotiate_encoding, supported_encodings
+from services.json_response import APIResponse
+from services.periodic_index import REFRESH_SECONDS
+
+CATALOG_CACHE_SIZE = 256  # Rendered pages kept, across all collections and query parameters
+CATALOG_CACHE_CONTROL = "no-cache"  # Revalidate with the ETag on every use
+
+
+class CachedBody:
+    """A rendered body with every supported encoding of it"""
+
+    def __init__(self, raw: bytes):
+        self.etag = f'"{hashlib.sha1(raw).hexdigest()}"'
+        self.encodings: Dict[Optional[str], bytes] = {None: raw}
+        for encoding in supported_encodings():
+            self.encodings[encoding] = compress(raw, encoding, precompress=True)
+
+
+class CatalogResponseCache:
+    def __init__(self, max_entries: int = CATALOG_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.versions: Dict[str, int] = {}
+        # (collection, key) -> (collection version, loaded_at, CachedBody)
+        self._entries: OrderedDict = OrderedDict()
+
+    def invalidate(self, collection: str):
+        """Drop every cached response built from `collection`"""
+        self.versions[collection] = self.versions.get(collection, 0) + 1
+
+    def _cached(self, collection: str, key: Hashable) -> Optional[CachedBody]:
+        entry = self._entries.get((collection, key))
+        if entry is None:
+            return None
+        version, loaded_at, body = entry
+        if version != self.versions.get(collection, 0) or time.monotonic() - loaded_at >= REFRESH_SECONDS:
+            del self._entries[(collection, key)]
+            return None
+        self._entries.move_to_end((collection, key))
+        return body
+
+    async def respond(
+        self,
+        request: Request,
+        collection: str,
+        key: Hashable,
+        load: Callable[[], Awaitable[Any]]
+    ) -> Response:
+        """
+        Serve the cached response for (collection, key), building it from
+        `load()` (JSON-able content) on a miss.
+        """
+        body = self._cached(collection, key)
+        if body is None:
+            version = self.versions.get(collection, 0)
+            raw = APIResponse(await load()).body
+            # Concurrent misses for one key may both build, which is harmless
+            body = await asyncio.to_thread(CachedBody, raw)
+            self._entries[(collection, key)] = (version, time.monotonic(), body)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        headers = {"ETag": body.etag, "Cache-Control": CATALOG_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+        if body.etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+            return Response(status_code=304, headers=headers)
+
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body.encodings[encoding], media_type="application/json", headers=headers)
+
+
+catalog_responses = CatalogResponseCache()
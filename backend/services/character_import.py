@@ -0,0 +1,297 @@
+"""
+Vectorized character roster import.
+
+Columns are normalized and coerced on the whole DataFrame, invalid rows are
+collected into a per-row error report, and the remaining rows are written
+with a single unordered bulk upsert keyed on character name.
+
+Large CSV files go through import jobs instead: the upload is spooled to
+disk and parsed in fixed-size chunks on a worker thread, with each chunk
+written by its own bulk upsert and progress recorded on the job document.
+"""
+import asyncio
+import io
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List
+
+import pandas as pd
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from services.background import spawn
+from services.search_index import character_index
+from services.catalog_cache import catalog_responses
+from services.facet_index import character_facets
+from services.stat_engine import stat_catalog
+
+IMPORT_CHUNK_SIZE = 5000  # Rows parsed and written per bulk_write in streaming imports
+JOB_ERROR_LIMIT = 100  # Row errors kept on a job document
+
+STAT_NAMES = ["kick", "control", "technique", "intelligence", "pressure", "agility", "physical"]
+
+# Spreadsheet headers that map onto a differently named Character field
+COLUMN_ALIASES = {
+    "level": "base_level",
+    "rarity": "base_rarity",
+    "jersey": "jersey_number",
+}
+
+TEXT_DEFAULTS = {
+    "title": "Player",
+    "base_rarity": "Common",
+    "position": "MF",
+    "element": "Fire",
+    "description": "A talented player",
+}
+
+HISSATSU_DEFAULTS = [
+    ("Basic Shot", "A basic shooting technique", "Shot"),
+    ("Basic Dribble", "A basic dribbling technique", "Dribble"),
+    ("Basic Pass", "A basic passing technique", "Pass"),
+]
+
+PASSIVE_DEFAULTS = [
+    ("Team Spirit", "Boosts team morale"),
+    ("Leadership", "Enhances team coordination"),
+    ("Focus", "Improves concentration"),
+    ("Determination", "Never gives up"),
+    ("Synergy", "Works well with teammates"),
+]
+
+
+def read_roster_file(content: bytes, filename: str) -> pd.DataFrame:
+    """Parse an uploaded Excel/CSV roster into a DataFrame"""
+    if filename.endswith('.csv'):
+        return pd.read_csv(io.BytesIO(content), encoding='utf-8')
+    return pd.read_excel(io.BytesIO(content))
+
+
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Lower-case headers and map known aliases onto Character field names"""
+    df = df.rename(columns=lambda column: str(column).strip().lower().replace(" ", "_"))
+    aliases = {
+        alias: field for alias, field in COLUMN_ALIASES.items()
+        if alias in df.columns and field not in df.columns
+    }
+    return df.rename(columns=aliases)
+
+
+def prepare_roster_frame(df: pd.DataFrame, row_offset: int = 0):
+    """
+    Normalize, coerce and validate a roster DataFrame in bulk.
+
+    Returns (frame, errors) where frame holds one clean row per valid input row,
+    indexed by 1-based file row number, and errors maps row number -> messages.
+    """
+    df = normalize_columns(df).reset_index(drop=True)
+    df.index = pd.RangeIndex(row_offset + 1, row_offset + 1 + len(df))
+    errors: Dict[int, List[str]] = {}
+
+    def flag(mask: pd.Series, message: str):
+        for row in mask[mask].index:
+            errors.setdefault(int(row), []).append(message)
+
+    def text(column: str, default) -> pd.Series:
+        if column not in df.columns:
+            values = pd.Series(pd.NA, index=df.index, dtype="string")
+        else:
+            values = df[column].astype("string").str.strip().replace("", pd.NA)
+        return values.fillna(default)
+
+    def integer(column: str, default) -> pd.Series:
+        if column not in df.columns:
+            return pd.Series(default, index=df.index).astype("int64")
+        raw = df[column]
+        values = pd.to_numeric(raw, errors="coerce")
+        flag(raw.notna() & (values.isna() | (values % 1 != 0)), f"{column} must be an integer")
+        return values.fillna(default).fillna(0).astype("int64")
+
+    frame = pd.DataFrame(index=df.index)
+    frame["name"] = text("name", pd.Series([f"Character {row - 1}" for row in df.index], index=df.index))
+    frame["nickname"] = text("nickname", frame["name"])
+    for column, default in TEXT_DEFAULTS.items():
+        frame[column] = text(column, default)
+
+    frame["base_level"] = integer("base_level", 1)
+    frame["jersey_number"] = integer("jersey_number", pd.Series(df.index, index=df.index))
+    flag(frame["base_level"] < 1, "base_level must be at least 1")
+
+    for stat in STAT_NAMES:
+        frame[stat] = integer(stat, 50)
+        frame[f"{stat}_secondary"] = integer(f"{stat}_secondary", 100)
+        flag((frame[stat] < 0) | (frame[f"{stat}_secondary"] < 0), f"{stat} must not be negative")
+
+    for number, (name, description, _) in enumerate(HISSATSU_DEFAULTS, start=1):
+        frame[f"hissatsu_{number}"] = text(f"hissatsu_{number}", name)
+        frame[f"hissatsu_{number}_desc"] = text(f"hissatsu_{number}_desc", description)
+
+    for number, (name, description) in enumerate(PASSIVE_DEFAULTS, start=1):
+        frame[f"passive_{number}"] = text(f"passive_{number}", name)
+        frame[f"passive_{number}_desc"] = text(f"passive_{number}_desc", description)
+
+    frame = frame.drop(index=list(errors.keys()))
+    # Later rows win when a file lists the same character twice, as sequential upserts would;
+    # the rows they override are reported so every row is either imported or an error
+    overridden = frame["name"].duplicated(keep="last")
+    if overridden.any():
+        winners = {name: int(row) for row, name in frame["name"].items()}
+        for row, name in frame.loc[overridden, "name"].items():
+            errors.setdefault(int(row), []).append(f"duplicate name, overridden by row {winners[name]}")
+    frame = frame[~overridden]
+    return frame, errors
+
+
+def frame_to_documents(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Shape clean roster rows into character documents (without id/created_at)"""
+    documents = []
+    for row, record in zip(frame.index, frame.to_dict("records")):
+        documents.append({
+            "_row": int(row),
+            "name": record["name"],
+            "nickname": record["nickname"],
+            "title": record["title"],
+            "base_level": record["base_level"],
+            "base_rarity": record["base_rarity"],
+            "position": record["position"],
+            "element": record["element"],
+            "jersey_number": record["jersey_number"],
+            "description": record["description"],
+            "portrait": None,
+            "team_logo": None,
+            "base_stats": {
+                stat: {"main": record[stat], "secondary": record[f"{stat}_secondary"]}
+                for stat in STAT_NAMES
+            },
+            "hissatsu": [
+                {
+                    "name": record[f"hissatsu_{number}"],
+                    "description": record[f"hissatsu_{number}_desc"],
+                    "type": hissatsu_type,
+                    "icon": None
+                }
+                for number, (_, _, hissatsu_type) in enumerate(HISSATSU_DEFAULTS, start=1)
+            ],
+            "team_passives": [
+                {
+                    "name": record[f"passive_{number}"],
+                    "description": record[f"passive_{number}_desc"],
+                    "icon": None
+                }
+                for number in range(1, len(PASSIVE_DEFAULTS) + 1)
+            ],
+        })
+    return documents
+
+
+async def upsert_characters(db, documents: List[Dict[str, Any]], errors: Dict[int, List[str]]) -> Dict[str, int]:
+    """Write character documents with one unordered bulk upsert keyed on name"""
+    if not documents:
+        return {"inserted": 0, "updated": 0}
+
+    now = datetime.utcnow()
+    rows = [document.pop("_row") for document in documents]
+    operations = [
+        UpdateOne(
+            {"name": document["name"]},
+            {
+                "$set": {**document, "updated_at": now},
+                # Existing characters keep their id so teams and pools stay linked
+                "$setOnInsert": {"id": str(uuid.uuid4()), "created_at": now}
+            },
+            upsert=True
+        )
+        for document in documents
+    ]
+
+    try:
+        result = await db.characters.bulk_write(operations, ordered=False)
+        return {"inserted": result.upserted_count, "updated": result.matched_count}
+    except BulkWriteError as e:
+        for write_error in e.details.get("writeErrors", []):
+            errors.setdefault(rows[write_error["index"]], []).append(write_error.get("errmsg", "Write failed"))
+        return {"inserted": e.details.get("nUpserted", 0), "updated": e.details.get("nMatched", 0)}
+
+
+def format_error_report(errors: Dict[int, List[str]]) -> List[Dict[str, Any]]:
+    """Flatten row -> messages into a list sorted by row number"""
+    return [{"row": row, "errors": messages} for row, messages in sorted(errors.items())]
+
+
+def start_import_job(db, job_id: str, path: str):
+    """Schedule a streaming import of a spooled CSV file"""
+    spawn(run_import_job(db, job_id, path))
+
+
+async def run_import_job(db, job_id: str, path: str):
+    """Parse a spooled CSV in chunks off the event loop and upsert each chunk"""
+    await db.import_jobs.update_one(
+        {"id": job_id},
+        {"$set": {"status": "running", "updated_at": datetime.utcnow()}}
+    )
+
+    handle = None
+    try:
+        handle = open(path, "rb")
+        reader = pd.read_csv(handle, encoding="utf-8", chunksize=IMPORT_CHUNK_SIZE)
+        row_offset = 0
+        stored_errors = 0
+
+        def next_chunk(offset: int):
+            chunk = next(reader, None)
+            if chunk is None:
+                return None
+            return prepare_roster_frame(chunk, row_offset=offset), len(chunk)
+
+        while True:
+            prepared = await asyncio.to_thread(next_chunk, row_offset)
+            if prepared is None:
+                break
+            (frame, errors), chunk_rows = prepared
+            row_offset += chunk_rows
+
+            counts = await upsert_characters(db, frame_to_documents(frame), errors)
+
+            update = {
+                "$inc": {
+                    "rows_processed": chunk_rows,
+                    "inserted_count": counts["inserted"],
+                    "updated_count": counts["updated"],
+                    "error_count": len(errors)
+                },
+                "$set": {"bytes_processed": handle.tell(), "updated_at": datetime.utcnow()}
+            }
+            report = format_error_report(errors)[:JOB_ERROR_LIMIT - stored_errors]
+            if report:
+                stored_errors += len(report)
+                update["$push"] = {"errors": {"$each": report}}
+            await db.import_jobs.update_one({"id": job_id}, update)
+
+        await db.import_jobs.update_one(
+            {"id": job_id},
+            {"$set": {
+                "status": "completed",
+                "bytes_processed": os.path.getsize(path),
+                "updated_at": datetime.utcnow(),
+                "finished_at": datetime.utcnow()
+            }}
+        )
+    except Exception as e:
+        await db.import_jobs.update_one(
+            {"id": job_id},
+            {"$set": {
+                "status": "failed",
+                "detail": f"Error processing file: {str(e)}",
+                "updated_at": datetime.utcnow(),
+                "finished_at": datetime.utcnow()
+            }}
+        )
+    finally:
+        character_index.invalidate()
+        catalog_responses.invalidate("characters")
+        character_facets.invalidate()
+        stat_catalog.invalidate()
+        if handle is not None:
+            handle.close()
+        os.remove(path)
@@ -0,0 +1,173 @@
+"""
+Response compression.
+
+CompressionMiddleware negotiates brotli or gzip from Accept-Encoding and
+compresses text and JSON bodies above a per-route minimum size. Images
+(placeholder PNGs, WebP assets) are already compressed and pass through
+untouched, as does any response that already carries a Content-Encoding,
+such as the precompressed catalog bodies from services/catalog_cache.py.
+Streaming responses are compressed chunk by chunk.
+
+Brotli is used when the `brotli` package is installed, otherwise gzip.
+"""
+import gzip
+import re
+import zlib
+from typing import List, Optional, Pattern, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None  # type: ignore
+
+MIN_COMPRESS_SIZE = 1024  # Bytes; smaller bodies gain less than the headers cost
+GZIP_LEVEL = 6  # Per-request compression: fast, most of the gain
+BROTLI_QUALITY = 4
+PRECOMPRESS_GZIP_LEVEL = 9  # Compressed once per cached version, so spend the CPU
+PRECOMPRESS_BROTLI_QUALITY = 11
+
+# Minimum body size per path, first match wins; None never compresses
+ROUTE_MIN_SIZES: List[Tuple[Pattern, Optional[int]]] = [
+    (re.compile(r"^/api/(placeholder|assets)/"), None),
+    # Team builder catalogs and feeds are always worth compressing
+    (re.compile(r"^/api/(characters|equipment|techniques|teams/(formations|tactics|coaches))(/|$)"), 512),
+    (re.compile(r"^/api/community/"), 512),
+]
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def supported_encodings() -> List[str]:
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred supported encoding from an Accept-Encoding header, None for identity"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in supported_encodings():
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        # Ties keep the earlier, better-compressing encoding
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str, precompress: bool = False) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=PRECOMPRESS_BROTLI_QUALITY if precompress else BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=PRECOMPRESS_GZIP_LEVEL if precompress else GZIP_LEVEL, mtime=0)
+
+
+def min_size_for(path: str, default: int = MIN_COMPRESS_SIZE) -> Optional[int]:
+    for pattern, min_size in ROUTE_MIN_SIZES:
+        if pattern.match(path):
+            return min_size
+    return default
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            self._flush = self._compressor.finish
+            self._process = self._compressor.process
+        else:
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._flush = self._compressor.flush
+            self._process = self._compressor.compress
+
+    def process(self, chunk: bytes) -> bytes:
+        return self._process(chunk)
+
+    def finish(self) -> bytes:
+        return self._flush()
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing eligible responses with the negotiated encoding"""
+
+    def __init__(self, app, minimum_size: int = MIN_COMPRESS_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        min_size = min_size_for(scope["path"], self.minimum_size)
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", "")) if min_size is not None else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSender(send, encoding, min_size).send)
+
+
+class _CompressingSender:
+    def __init__(self, send, encoding: str, min_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.min_size = min_size
+        self._start = None
+        self._mode = None  # "passthrough", "stream" once the first body chunk decides
+        self._compressor: Optional[_StreamCompressor] = None
+
+    def _eligible(self, headers: Headers) -> bool:
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self._start = message
+            return
+        if message["type"] != "http.response.body" or self._mode == "passthrough":
+            await self._send(message)
+            return
+
+        if self._mode == "stream":
+            body = self._compressor.process(message.get("body", b""))
+            if not message.get("more_body", False):
+                body += self._compressor.finish()
+            await self._send({**message, "body": body})
+            return
+
+        # First body chunk: decide how this response is sent
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        headers = MutableHeaders(raw=list(self._start["headers"]))
+        if not self._eligible(headers) or (not more_body and len(body) < self.min_size):
+            self._mode = "passthrough"
+            await self._send(self._start)
+            await self._send(message)
+            return
+
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if more_body:
+            self._mode = "stream"
+            self._compressor = _StreamCompressor(self.encoding)
+            del headers["Content-Length"]
+            body = self._compressor.process(body)
+        else:
+            body = compress(body, self.encoding)
+            headers["Content-Length"] = str(len(body))
+        await self._send({**self._start, "headers": headers.raw})
+        await self._send({**message, "body": body})
@@ -0,0 +1,144 @@
+"""
+In-memory facet index over the character catalog.
+
+Every character gets a slot number, and each facet value (position, element,
+rarity) keeps a Python int used as a bitset of slots. Filtering is a chain
+of bitwise ANDs and counts are popcounts, so a browse request can return a
+filtered result set and every facet count without an aggregation query.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+from services.periodic_index import PeriodicIndex
+
+# API facet name -> character document field
+FACET_FIELDS = {
+    "position": "position",
+    "element": "element",
+    "rarity": "base_rarity",
+}
+
+
+class FacetIndex(PeriodicIndex):
+    """Bitset-per-value facet index for characters"""
+
+    def __init__(self):
+        super().__init__()
+        self._reset()
+
+    def _reset(self):
+        self._slots: Dict[str, int] = {}                 # character id -> slot
+        self._slot_ids: List[Optional[str]] = []         # slot -> character id
+        self._slot_names: List[str] = []                 # slot -> name, for stable ordering
+        self._slot_values: List[Dict[str, Any]] = []     # slot -> facet values
+        self._free_slots: List[int] = []
+        self._live = 0
+        self._bitsets: Dict[str, Dict[Any, int]] = {facet: {} for facet in FACET_FIELDS}
+
+    async def _load(self, db):
+        projection = {"_id": 0, "id": 1, "name": 1, **{field: 1 for field in FACET_FIELDS.values()}}
+        docs = await db.characters.find({}, projection).to_list(length=None)
+        self._reset()
+        for doc in docs:
+            self.upsert(doc)
+
+    def upsert(self, doc: Dict[str, Any]):
+        self.remove(doc["id"])
+
+        if self._free_slots:
+            slot = self._free_slots.pop()
+        else:
+            slot = len(self._slot_ids)
+            self._slot_ids.append(None)
+            self._slot_names.append("")
+            self._slot_values.append({})
+
+        bit = 1 << slot
+        values = {facet: doc.get(field) for facet, field in FACET_FIELDS.items()}
+        self._slots[doc["id"]] = slot
+        self._slot_ids[slot] = doc["id"]
+        self._slot_names[slot] = doc.get("name", "")
+        self._slot_values[slot] = values
+        self._live |= bit
+        for facet, value in values.items():
+            bitsets = self._bitsets[facet]
+            bitsets[value] = bitsets.get(value, 0) | bit
+
+    def remove(self, character_id: str):
+        slot = self._slots.pop(character_id, None)
+        if slot is None:
+            return
+        bit = 1 << slot
+        for facet, value in self._slot_values[slot].items():
+            bitsets = self._bitsets[facet]
+            bitsets[value] &= ~bit
+            if not bitsets[value]:
+                del bitsets[value]
+        self._live &= ~bit
+        self._slot_ids[slot] = None
+        self._slot_values[slot] = {}
+        self._free_slots.append(slot)
+
+    def bitset_for_ids(self, character_ids: Iterable[str]) -> int:
+        """Bitset of the given characters, e.g. search hits to intersect with facets"""
+        bits = 0
+        for character_id in character_ids:
+            slot = self._slots.get(character_id)
+            if slot is not None:
+                bits |= 1 << slot
+        return bits
+
+    def _facet_bits(self, facet: str, values: List[Any]) -> int:
+        bits = 0
+        for value in values:
+            bits |= self._bitsets[facet].get(value, 0)
+        return bits
+
+    def query(self, filters: Dict[str, List[Any]], restrict: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Apply facet filters (OR within a facet, AND across facets).
+        Counts for each facet ignore that facet's own filter so multi-select
+        UIs can show how many results every other value would give.
+        """
+        base = self._live if restrict is None else self._live & restrict
+        facet_bits = {facet: self._facet_bits(facet, values) for facet, values in filters.items() if values}
+
+        matched = base
+        for bits in facet_bits.values():
+            matched &= bits
+
+        counts: Dict[str, Dict[Any, int]] = {}
+        for facet, bitsets in self._bitsets.items():
+            others = base
+            for other_facet, bits in facet_bits.items():
+                if other_facet != facet:
+                    others &= bits
+            counts[facet] = {
+                value: (bits & others).bit_count()
+                for value, bits in bitsets.items()
+                if bits & others
+            }
+
+        return {"bits": matched, "total": matched.bit_count(), "counts": counts}
+
+    def ids(self, bits: int) -> List[str]:
+        """Character ids in a bitset, ordered by name"""
+        slots = []
+        while bits:
+            lowest = bits & -bits
+            slots.append(lowest.bit_length() - 1)
+            bits ^= lowest
+        slots.sort(key=lambda s: self._slot_names[s])
+        return [self._slot_ids[s] for s in slots]
+
+    def totals(self) -> Dict[str, Any]:
+        """Unfiltered catalog size and per-value counts"""
+        return {
+            "total": self._live.bit_count(),
+            "counts": {
+                facet: {value: bits.bit_count() for value, bits in bitsets.items()}
+                for facet, bitsets in self._bitsets.items()
+            }
+        }
+
+
+character_facets = FacetIndex()
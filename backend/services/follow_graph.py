@@ -0,0 +1,187 @@
+"""
+Follow graph stored as edges.
+
+Each follow is one document in `follows` (follower_id, followee_id,
+created_at). A unique index on the pair backs follow checks and a reverse
+index serves follower lookups. Users carry denormalized followers_count /
+following_count counters updated with $inc alongside every edge write, so
+profiles and leaderboards never load or measure id arrays.
+"""
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+FOLLOW_INDEXES = [
+    ([("follower_id", 1), ("followee_id", 1)], {"unique": True}),
+    # Listing who a user follows / who follows a user, newest first
+    ([("follower_id", 1), ("created_at", -1), ("followee_id", 1)], {}),
+    ([("followee_id", 1), ("created_at", -1), ("follower_id", 1)], {}),
+]
+
+
+async def _adjust_counters(db, follower_id: str, followee_id: str, delta: int):
+    await asyncio.gather(
+        db.users.update_one({"id": follower_id}, {"$inc": {"following_count": delta}}),
+        db.users.update_one({"id": followee_id}, {"$inc": {"followers_count": delta}})
+    )
+
+
+async def follow(db, follower_id: str, followee_id: str) -> bool:
+    """Create a follow edge; False when it already existed"""
+    try:
+        await db.follows.insert_one({
+            "follower_id": follower_id,
+            "followee_id": followee_id,
+            "created_at": datetime.utcnow()
+        })
+    except DuplicateKeyError:
+        return False
+    await _adjust_counters(db, follower_id, followee_id, 1)
+    return True
+
+
+async def unfollow(db, follower_id: str, followee_id: str) -> bool:
+    """Remove a follow edge; False when there was none"""
+    result = await db.follows.delete_one({"follower_id": follower_id, "followee_id": followee_id})
+    if result.deleted_count == 0:
+        return False
+    await _adjust_counters(db, follower_id, followee_id, -1)
+    return True
+
+
+async def is_following(db, follower_id: str, followee_id: str) -> bool:
+    edge = await db.follows.find_one(
+        {"follower_id": follower_id, "followee_id": followee_id},
+        {"_id": 1}
+    )
+    return edge is not None
+
+
+async def relationships(db, user_id: str, other_ids: List[str]) -> Dict[str, Dict[str, bool]]:
+    """
+    Follow and block flags between a user and up to a page of other users.
+    Four indexed queries run concurrently regardless of how many ids are asked.
+    """
+    other_ids = list(dict.fromkeys(other_ids))
+    following, followed_by, others, own = await asyncio.gather(
+        db.follows.find(
+            {"follower_id": user_id, "followee_id": {"$in": other_ids}},
+            {"_id": 0, "followee_id": 1}
+        ).to_list(length=None),
+        db.follows.find(
+            {"follower_id": {"$in": other_ids}, "followee_id": user_id},
+            {"_id": 0, "follower_id": 1}
+        ).to_list(length=None),
+        # $elemMatch projects at most our own id out of each user's block list
+        db.users.find(
+            {"id": {"$in": other_ids}},
+            {"_id": 0, "id": 1, "blocked_users": {"$elemMatch": {"$eq": user_id}}}
+        ).to_list(length=None),
+        db.users.find_one({"id": user_id}, {"_id": 0, "blocked_users": 1})
+    )
+
+    following_set = {edge["followee_id"] for edge in following}
+    followed_by_set = {edge["follower_id"] for edge in followed_by}
+    blocked_by_set = {user["id"] for user in others if user.get("blocked_users")}
+    existing = {user["id"] for user in others}
+    blocked_set = set((own or {}).get("blocked_users") or [])
+
+    return {
+        other_id: {
+            "exists": other_id in existing,
+            "is_following": other_id in following_set,
+            "followed_by": other_id in followed_by_set,
+            "blocked": other_id in blocked_set,
+            "blocked_by": other_id in blocked_by_set,
+            "can_follow": other_id in existing and other_id != user_id
+        }
+        for other_id in other_ids
+    }
+
+
+def encode_edge_cursor(created_at: datetime, user_id: str) -> str:
+    return f"{created_at.isoformat()}|{user_id}"
+
+
+def decode_edge_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        created_at, user_id = cursor.split("|", 1)
+        return datetime.fromisoformat(created_at), user_id
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+
+async def edge_page(db, user_id: str, direction: str, cursor: Optional[str], limit: int) -> Tuple[List[str], Optional[str]]:
+    """
+    One page of a user's followers or followees, newest follow first.
+    Keyset-paginated on (created_at, other user id) so it is served by the
+    listing indexes at any depth. Returns (user ids, next cursor).
+    """
+    own_field, other_field = ("followee_id", "follower_id") if direction == "followers" else ("follower_id", "followee_id")
+    query: Dict[str, Any] = {own_field: user_id}
+    if cursor:
+        created_at, last_id = decode_edge_cursor(cursor)
+        query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, other_field: {"$gt": last_id}}
+        ]
+
+    edges = await db.follows.find(query, {"_id": 0, other_field: 1, "created_at": 1}).sort(
+        [("created_at", -1), (other_field, 1)]
+    ).limit(limit + 1).to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(edges) > limit:
+        edges = edges[:limit]
+        next_cursor = encode_edge_cursor(edges[-1]["created_at"], edges[-1][other_field])
+    return [edge[other_field] for edge in edges], next_cursor
+
+
+async def migrate_follow_arrays(db) -> int:
+    """
+    Convert legacy followers/following arrays on users into edges, then
+    recompute both counters from the edges and drop the arrays.
+    """
+    legacy = {"$or": [{"followers": {"$exists": True}}, {"following": {"$exists": True}}]}
+    if await db.users.count_documents(legacy, limit=1) == 0:
+        return 0
+
+    now = datetime.utcnow()
+    pairs = set()
+    async for user in db.users.find(legacy, {"_id": 0, "id": 1, "followers": 1, "following": 1}):
+        # Either side of a pair may have been recorded without the other
+        for followee_id in user.get("following") or []:
+            pairs.add((user["id"], followee_id))
+        for follower_id in user.get("followers") or []:
+            pairs.add((follower_id, user["id"]))
+
+    pairs = {(follower_id, followee_id) for follower_id, followee_id in pairs if follower_id != followee_id}
+    if pairs:
+        try:
+            await db.follows.bulk_write([
+                InsertOne({"follower_id": follower_id, "followee_id": followee_id, "created_at": now})
+                for follower_id, followee_id in pairs
+            ], ordered=False)
+        except BulkWriteError as e:
+            # Edges that already exist are fine; anything else must stop the
+            # migration before the arrays are dropped below
+            details = e.details
+            if details.get("writeConcernErrors") or any(
+                error.get("code") != 11000 for error in details.get("writeErrors", [])
+            ):
+                raise
+
+    await db.users.update_many({}, {"$set": {"followers_count": 0, "following_count": 0}})
+    for field, counter in (("follower_id", "following_count"), ("followee_id", "followers_count")):
+        groups = await db.follows.aggregate([{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}]).to_list(length=None)
+        if groups:
+            await db.users.bulk_write([
+                UpdateOne({"id": group["_id"]}, {"$set": {counter: group["count"]}})
+                for group in groups
+            ], ordered=False)
+
+    await db.users.update_many(legacy, {"$unset": {"followers": "", "following": ""}})
+    return len(pairs)
@@ -0,0 +1,165 @@
+"""
+"Who to follow" suggestions from friends-of-friends.
+
+A periodic job loads the follow graph into a SciPy sparse adjacency
+matrix A (A[i, j] = 1 when i follows j). A @ A counts the two-step paths
+from each user to every other user; entries for the user themself and
+for accounts they already follow are dropped. Scores are boosted for a
+shared favorite element or position, and each user's top-k candidates
+are stored as one document with denormalized user cards, so serving
+suggestions is a single read.
+
+Every worker process starts the job, but each run first claims a lease
+document in `job_leases`; only the worker holding an unexpired lease
+recomputes, so the deployment does one run per interval.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import numpy as np
+from pymongo import ReplaceOne
+from pymongo.errors import DuplicateKeyError
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+SUGGESTIONS_PER_USER = 20
+SUGGESTION_INTERVAL_SECONDS = 3600
+ELEMENT_WEIGHT = 0.25  # Score multiplier bonus for a shared favorite element
+POSITION_WEIGHT = 0.15  # Score multiplier bonus for a shared favorite position
+WRITE_BATCH_SIZE = 1000
+JOB_LEASE_ID = "follow_suggestions"
+
+CARD_FIELDS = ["id", "username", "profile_picture", "coach_level", "favorite_element", "favorite_position", "followers_count"]
+
+# Periodic job task, kept referenced while it runs
+_job = None
+# Identifies this process as the lease holder
+_worker_id = str(uuid.uuid4())
+
+
+def _codes(values: List[Any]) -> np.ndarray:
+    """Integer code per value, -1 for missing, so equality checks vectorize"""
+    codes: Dict[Any, int] = {}
+    return np.array([codes.setdefault(value, len(codes)) if value else -1 for value in values], dtype=np.int64)
+
+
+def rank_suggestions(
+    edges: List[Dict[str, str]],
+    users: List[Dict[str, Any]],
+    k: int = SUGGESTIONS_PER_USER
+) -> Dict[int, List[tuple]]:
+    """
+    Top-k friends-of-friends per user index: {row: [(column, score, mutual_count)]}.
+    Pure CPU work, run off the event loop.
+    """
+    index = {user["id"]: row for row, user in enumerate(users)}
+    n = len(users)
+    pairs = [(index[e["follower_id"]], index[e["followee_id"]]) for e in edges
+             if e["follower_id"] in index and e["followee_id"] in index]
+    if not pairs:
+        return {}
+
+    rows, cols = np.array(pairs, dtype=np.int64).T
+    adjacency = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=(n, n))
+    adjacency.sum_duplicates()
+    adjacency.data[:] = 1.0
+
+    paths = (adjacency @ adjacency).tocsr()
+    # Drop accounts already followed, then self-loops (A -> B -> A)
+    paths = paths - paths.multiply(adjacency)
+    paths.setdiag(0)
+    paths.eliminate_zeros()
+    paths = paths.tocoo()
+    if paths.nnz == 0:
+        return {}
+
+    elements = _codes([user.get("favorite_element") for user in users])
+    positions = _codes([user.get("favorite_position") for user in users])
+    same_element = (elements[paths.row] == elements[paths.col]) & (elements[paths.row] >= 0)
+    same_position = (positions[paths.row] == positions[paths.col]) & (positions[paths.row] >= 0)
+    scores = paths.data * (1.0 + ELEMENT_WEIGHT * same_element + POSITION_WEIGHT * same_position)
+
+    # Group by user, best score first, and keep the first k of each group
+    order = np.lexsort((-scores, paths.row))
+    sorted_rows = paths.row[order]
+    group_start = np.searchsorted(sorted_rows, sorted_rows, side="left")
+    keep = order[np.arange(len(order)) - group_start < k]
+
+    ranked: Dict[int, List[tuple]] = {}
+    for position in keep:
+        ranked.setdefault(int(paths.row[position]), []).append(
+            (int(paths.col[position]), round(float(scores[position]), 4), int(paths.data[position]))
+        )
+    return ranked
+
+
+async def compute_suggestions(db) -> int:
+    """Recompute and store suggestions for every user; returns users with suggestions"""
+    started_at = datetime.utcnow()
+    users, edges = await asyncio.gather(
+        db.users.find({}, {"_id": 0, **{field: 1 for field in CARD_FIELDS}}).to_list(length=None),
+        db.follows.find({}, {"_id": 0, "follower_id": 1, "followee_id": 1}).to_list(length=None)
+    )
+    ranked = await asyncio.to_thread(rank_suggestions, edges, users)
+
+    batch = []
+    for row, candidates in ranked.items():
+        batch.append(ReplaceOne(
+            {"user_id": users[row]["id"]},
+            {
+                "user_id": users[row]["id"],
+                "suggestions": [
+                    {**{field: users[column].get(field) for field in CARD_FIELDS}, "score": score, "mutual_count": mutual}
+                    for column, score, mutual in candidates
+                ],
+                "computed_at": started_at
+            },
+            upsert=True
+        ))
+        if len(batch) >= WRITE_BATCH_SIZE:
+            await db.follow_suggestions.bulk_write(batch, ordered=False)
+            batch = []
+    if batch:
+        await db.follow_suggestions.bulk_write(batch, ordered=False)
+
+    # Users who no longer have any candidates
+    await db.follow_suggestions.delete_many({"computed_at": {"$lt": started_at}})
+    return len(ranked)
+
+
+async def acquire_job_lease(db) -> bool:
+    """
+    Claim the next interval's run. The upsert only matches an expired
+    lease; while another worker holds a live one it collides on _id.
+    """
+    now = datetime.utcnow()
+    try:
+        await db.job_leases.update_one(
+            {"_id": JOB_LEASE_ID, "expires_at": {"$lte": now}},
+            {"$set": {"owner": _worker_id, "expires_at": now + timedelta(seconds=SUGGESTION_INTERVAL_SECONDS)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return False
+    return True
+
+
+async def _run_periodically(db):
+    while True:
+        try:
+            if await acquire_job_lease(db):
+                await compute_suggestions(db)
+        except Exception:
+            logger.exception("Follow suggestion job failed")
+        await asyncio.sleep(SUGGESTION_INTERVAL_SECONDS)
+
+
+def start_suggestion_job(db):
+    """Start the periodic suggestion job once per process"""
+    global _job
+    if _job is None or _job.done():
+        _job = asyncio.create_task(_run_periodically(db))
@@ -0,0 +1,89 @@
+"""
+JSON responses rendered with orjson.
+
+APIResponse is the app's default response class. trusted_response()
+serves documents read from our own collections without validating them
+again: returning Model(**doc) from a handler with a response_model means
+FastAPI validates every item twice (once building it, once against the
+response_model) before encoding it. Documents were validated when they
+were written, so the fast path only picks the model's fields and fills
+in defaults, recursing into nested models, and hands the result to
+orjson. (model_construct would keep stray keys such as Mongo's _id and
+skip defaults of nested models.)
+"""
+import functools
+import typing
+from typing import Any, Iterable, List, Optional, Tuple, Type
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+def _default(value: Any):
+    # Defaults filled in by model_construct can be model instances
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class APIResponse(ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+
+
+def _nested_model(annotation) -> Tuple[Optional[Type[BaseModel]], bool]:
+    """(model class, is a list of it) for fields holding nested models"""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+    origin = typing.get_origin(annotation)
+    args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+    if origin in (list, List) and len(args) == 1:
+        nested, _ = _nested_model(args[0])
+        return nested, nested is not None
+    if origin is typing.Union and len(args) == 1:
+        return _nested_model(args[0])
+    return None, False
+
+
+@functools.lru_cache(maxsize=None)
+def _field_plan(model: Type[BaseModel]):
+    return [
+        (name, field, *_nested_model(field.annotation))
+        for name, field in model.model_fields.items()
+    ]
+
+
+def _shape(model: Type[BaseModel], doc: dict) -> dict:
+    shaped = {}
+    for name, field, nested, is_list in _field_plan(model):
+        if name in doc:
+            value = doc[name]
+            if nested is not None and value is not None:
+                if is_list:
+                    value = [_shape(nested, item) if isinstance(item, dict) else item for item in value]
+                elif isinstance(value, dict):
+                    value = _shape(nested, value)
+        elif field.is_required():
+            continue
+        else:
+            value = field.get_default(call_default_factory=True)
+        shaped[name] = value
+    return shaped
+
+
+def trusted_documents(model: Type[BaseModel], docs: Iterable[dict]) -> List[dict]:
+    """`model`-shaped dicts from trusted documents: known fields only, defaults filled"""
+    return [_shape(model, doc) for doc in docs]
+
+
+def trusted_response(model: Type[BaseModel], docs: Iterable[dict]) -> APIResponse:
+    """Serve trusted documents as a list of `model`, skipping response_model validation"""
+    return APIResponse(trusted_documents(model, docs))
@@ -0,0 +1,46 @@
+"""
+Base class for the in-memory indexes and caches built from collections.
+
+Each worker keeps its own copy. Writes made through this worker are
+applied in place by the subclass (upsert/remove) or force a reload with
+invalidate(); writes made by other workers are picked up by the full
+reload every `refresh_seconds`.
+"""
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+
+REFRESH_SECONDS = 300  # Full rebuild interval, picks up writes made by other workers
+
+
+class PeriodicIndex(ABC):
+    """Loads on first use and reloads when stale; subclasses implement _load(db)"""
+
+    refresh_seconds = REFRESH_SECONDS
+
+    def __init__(self):
+        self.loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def is_fresh(self) -> bool:
+        """Whether the cached data can answer reads without a reload"""
+        return self.loaded_at is not None and time.monotonic() - self.loaded_at < self.refresh_seconds
+
+    async def ensure_loaded(self, db):
+        """Load on first use and reload when stale"""
+        if self.is_fresh():
+            return
+        async with self._lock:
+            if self.is_fresh():
+                return
+            await self._load(db)
+            self.loaded_at = time.monotonic()
+
+    @abstractmethod
+    async def _load(self, db):
+        """Replace the cached data with a fresh read from `db`"""
+
+    def invalidate(self):
+        """Force a reload on next use, e.g. after a bulk import"""
+        self.loaded_at = None
@@ -0,0 +1,72 @@
+"""
+Fan-out of owner profile snapshots to teams.
+
+Teams carry a copy of their owner's username and avatar so list and
+detail reads never join against users. When a profile changes, the
+user's profile_version is bumped and a background task rewrites every
+team of that owner in one update_many. Teams record the version their
+snapshot came from, so a slow, older fan-out can never overwrite a newer
+one. The rewritten public teams are then re-indexed for team search, which
+matches on the owner's username.
+"""
+from services.background import spawn
+from services.search_index import team_index
+
+# Profile fields copied onto teams: user field -> team field
+TEAM_SNAPSHOT_FIELDS = {
+    "username": "username",
+    "profile_picture": "user_avatar",
+}
+
+def snapshot_changed(before: dict, update: dict) -> bool:
+    """Whether an update touches any profile field copied onto teams"""
+    return any(field in update and update[field] != before.get(field) for field in TEAM_SNAPSHOT_FIELDS)
+
+
+def team_owner_snapshot(user: dict) -> dict:
+    """Team fields holding a copy of the owner's profile"""
+    snapshot = {team_field: user.get(user_field) for user_field, team_field in TEAM_SNAPSHOT_FIELDS.items()}
+    snapshot["owner_profile_version"] = user.get("profile_version", 0)
+    return snapshot
+
+
+async def sync_owner_profile(db, user_id: str) -> int:
+    """Copy a user's current profile snapshot onto every team that holds an older one"""
+    user = await db.users.find_one(
+        {"id": user_id},
+        {"_id": 0, "profile_version": 1, **{field: 1 for field in TEAM_SNAPSHOT_FIELDS}}
+    )
+    if user is None:
+        return 0
+    snapshot = team_owner_snapshot(user)
+    result = await db.teams.update_many(
+        {"user_id": user_id, "$or": [
+            {"owner_profile_version": {"$lt": snapshot["owner_profile_version"]}},
+            {"owner_profile_version": {"$exists": False}}
+        ]},
+        {"$set": snapshot}
+    )
+    return result.modified_count
+
+
+async def sync_and_reindex_owner_teams(db, user_id: str) -> int:
+    """Fan out a profile change, then refresh this worker's search entries for the owner's teams"""
+    synced = await sync_owner_profile(db, user_id)
+    if synced:
+        async for team in db.teams.find({"user_id": user_id, **team_index.query}, team_index.projection):
+            team_index.upsert(team)
+    return synced
+
+
+def start_owner_profile_sync(db, user_id: str):
+    """Schedule the team fan-out for a changed profile"""
+    spawn(sync_and_reindex_owner_teams(db, user_id))
+
+
+async def backfill_team_owner_snapshots(db) -> int:
+    """Sync owners of teams created before snapshots were versioned"""
+    owner_ids = await db.teams.distinct("user_id", {"owner_profile_version": {"$exists": False}})
+    synced = 0
+    for user_id in owner_ids:
+        synced += await sync_owner_profile(db, user_id)
+    return synced
@@ -0,0 +1,235 @@
+"""
+Rate limiting for abuse-prone endpoints.
+
+RateLimitMiddleware matches each request against RATE_LIMIT_POLICIES and
+counts it under "<policy>:<user id or client IP>" with a sliding-window
+counter: the current and previous fixed windows are kept per key, and
+the previous window is weighted by how much of it still overlaps the
+sliding window. That is O(1) time and memory per key. Rejected requests
+get a 429 with a Retry-After header.
+
+Backends:
+- InMemoryRateLimitBackend (default): per process, at most
+  RATE_LIMIT_MAX_KEYS keys with least-recently-used keys evicted
+- MongoRateLimitBackend: counters shared by every worker, one document
+  per key and window, removed by a TTL index
+
+Configuration:
+- RATE_LIMIT_ENABLED: "0" disables limiting
+- RATE_LIMIT_BACKEND: "memory" (default) or "mongo"
+- TRUSTED_PROXY_HOPS: number of our own proxies in front of the app that
+  append to X-Forwarded-For (default 0: the header is ignored and the
+  connection's peer address is used)
+"""
+import asyncio
+import math
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Optional, Pattern
+
+import jwt
+from pymongo.errors import DuplicateKeyError
+from starlette.responses import JSONResponse
+
+from services.token_verifier import token_verifier
+
+RATE_LIMIT_MAX_KEYS = 100000
+TRUSTED_PROXY_HOPS = int(os.environ.get("TRUSTED_PROXY_HOPS", "0"))
+
+RATE_LIMIT_INDEXES = [
+    ([("expires_at", 1)], {"expireAfterSeconds": 0}),
+]
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    name: str
+    method: str
+    path: Pattern
+    limit: int  # Requests allowed per window
+    window: int  # Seconds
+    key: str = "user"  # "user" (falls back to IP when anonymous) or "ip"
+
+
+RATE_LIMIT_POLICIES: List[RateLimitPolicy] = [
+    # Each attempt costs a bcrypt round
+    RateLimitPolicy("login", "POST", re.compile(r"^/api/auth/login$"), limit=10, window=60, key="ip"),
+    RateLimitPolicy("register", "POST", re.compile(r"^/api/auth/register$"), limit=5, window=3600, key="ip"),
+    RateLimitPolicy("send_message", "POST", re.compile(r"^/api/chat/conversations/[^/]+/messages$"), limit=30, window=60),
+    RateLimitPolicy("comment_on_team", "POST", re.compile(r"^/api/teams/[^/]+/comment$"), limit=10, window=60),
+    RateLimitPolicy("pull_gacha", "POST", re.compile(r"^/api/constellations/pull$"), limit=20, window=60),
+]
+
+
+def sliding_window_retry_after(previous: int, current: int, fraction: float, limit: int, window: int) -> float:
+    """
+    Seconds until one more request fits, 0 when it fits now. `current`
+    counts earlier requests in the current window, `fraction` is how far
+    into that window we are.
+    """
+    if previous * (1 - fraction) + current + 1 <= limit:
+        return 0.0
+    if current + 1 <= limit:
+        # Wait for enough of the previous window to slide out
+        needed_fraction = 1 - (limit - 1 - current) / previous
+        return (needed_fraction - fraction) * window
+    # Wait for the next window, where this window becomes the previous one
+    needed_fraction = 1 - (limit - 1) / current if current else 0.0
+    return (1 - fraction + max(needed_fraction, 0.0)) * window
+
+
+class InMemoryRateLimitBackend:
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        # key -> [window index, count in that window, count in the window before]
+        self._counters: OrderedDict = OrderedDict()
+
+    async def hit(self, key: str, limit: int, window: int) -> float:
+        now = time.monotonic()
+        index = int(now // window)
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = [index, 0, 0]
+            self._counters[key] = counter
+            while len(self._counters) > self.max_keys:
+                self._counters.popitem(last=False)
+        else:
+            self._counters.move_to_end(key)
+            if counter[0] != index:
+                counter[2] = counter[1] if counter[0] == index - 1 else 0
+                counter[0], counter[1] = index, 0
+
+        retry_after = sliding_window_retry_after(counter[2], counter[1], now / window - index, limit, window)
+        if retry_after == 0:
+            counter[1] += 1
+        return retry_after
+
+
+class MongoRateLimitBackend:
+    """
+    Like the in-memory backend, only allowed requests are counted: the
+    counter is read first, and the increment is conditional on the count
+    still leaving room, so concurrent workers can't overshoot the limit.
+    """
+
+    def __init__(self, db):
+        self.collection = db.rate_limits
+
+    async def hit(self, key: str, limit: int, window: int) -> float:
+        now = time.time()
+        index = int(now // window)
+        fraction = now / window - index
+        current_id = f"{key}:{index}"
+        current, previous = await asyncio.gather(
+            self.collection.find_one({"_id": current_id}, {"count": 1}),
+            self.collection.find_one({"_id": f"{key}:{index - 1}"}, {"count": 1})
+        )
+        previous_count = (previous or {}).get("count", 0)
+        retry_after = sliding_window_retry_after(previous_count, (current or {}).get("count", 0), fraction, limit, window)
+        if retry_after > 0:
+            return retry_after
+
+        # Highest current count that still admits one more request
+        max_current = math.floor(limit - 1 - previous_count * (1 - fraction))
+        try:
+            await self.collection.update_one(
+                {"_id": current_id, "count": {"$lte": max_current}},
+                {"$inc": {"count": 1}, "$setOnInsert": {"expires_at": datetime.fromtimestamp((index + 2) * window, timezone.utc)}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # Another worker took the last slot between the read and the increment
+            current = await self.collection.find_one({"_id": current_id}, {"count": 1})
+            return sliding_window_retry_after(previous_count, (current or {}).get("count", 0), fraction, limit, window) or 1.0
+        return 0.0
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        if os.environ.get("RATE_LIMIT_BACKEND", "memory") == "mongo":
+            from database import db
+            _backend = MongoRateLimitBackend(db)
+        else:
+            _backend = InMemoryRateLimitBackend()
+    return _backend
+
+
+def client_ip(scope, trusted_hops: int = TRUSTED_PROXY_HOPS) -> str:
+    """
+    Client address for IP-keyed limits. X-Forwarded-For is only consulted
+    behind `trusted_hops` proxies: each appends the address it saw, so the
+    entry `trusted_hops` from the end was written by our outermost proxy and
+    everything before it may be forged by the client.
+    """
+    if trusted_hops > 0:
+        forwarded = [
+            entry.strip()
+            for name, value in scope.get("headers", []) if name == b"x-forwarded-for"
+            for entry in value.decode("latin-1").split(",") if entry.strip()
+        ]
+        if forwarded:
+            return forwarded[-min(trusted_hops, len(forwarded))]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def request_user_id(scope) -> Optional[str]:
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            try:
+                # Served from the verifier's claims cache on repeat requests
+                claims = token_verifier.verify(token)
+            except jwt.PyJWTError:
+                return None
+            return claims.get("sub") if claims.get("type") == "access" else None
+    return None
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying RATE_LIMIT_POLICIES; other requests pass straight through"""
+
+    def __init__(self, app, policies: Optional[List[RateLimitPolicy]] = None, backend=None):
+        self.app = app
+        self.policies = RATE_LIMIT_POLICIES if policies is None else policies
+        self.backend = backend
+        self.enabled = os.environ.get("RATE_LIMIT_ENABLED", "1") != "0"
+
+    def _match(self, scope) -> Optional[RateLimitPolicy]:
+        for policy in self.policies:
+            if scope["method"] == policy.method and policy.path.match(scope["path"]):
+                return policy
+        return None
+
+    async def __call__(self, scope, receive, send):
+        policy = self._match(scope) if self.enabled and scope["type"] == "http" else None
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        user_id = request_user_id(scope) if policy.key == "user" else None
+        identity = f"user:{user_id}" if user_id else f"ip:{client_ip(scope)}"
+        backend = self.backend or get_backend()
+        retry_after = await backend.hit(f"{policy.name}:{identity}", policy.limit, policy.window)
+        if retry_after > 0:
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests, please try again later"},
+                headers={
+                    "Retry-After": str(max(1, math.ceil(retry_after))),
+                    "RateLimit-Policy": f"{policy.limit};w={policy.window}"
+                }
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
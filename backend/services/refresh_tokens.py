@@ -0,0 +1,162 @@
+"""
+Refresh token store with rotation and token families.
+
+Every refresh token belongs to a family started at login or register;
+each rotation revokes the presented token and issues its successor in
+the same family. Rotation is a single find_one_and_update that only
+matches a live token, so two concurrent refreshes can't both succeed.
+Presenting a token that was already rotated means it was replayed, and
+the whole family is revoked with one update_many, except within
+REPLAY_GRACE_SECONDS of its rotation: a client firing parallel requests
+after its access token expired sends the same cookie several times, and
+the losers of that race only get a 401.
+
+Documents expire through a TTL index on expires_at. Revoked jtis are
+also remembered in a bounded in-memory cache until they expire, so
+repeated attempts with a dead token are answered without a database
+round trip.
+"""
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+
+REFRESH_TOKEN_INDEXES = [
+    ([("jti", 1)], {"unique": True}),
+    ([("family_id", 1)], {}),
+    # Documents are removed once the token could no longer be used anyway
+    ([("expires_at", 1)], {"expireAfterSeconds": 0}),
+]
+
+REVOKED_CACHE_SIZE = 10000
+REPLAY_GRACE_SECONDS = 10  # Reuse this soon after a rotation is a concurrent refresh, not theft
+
+# Rotation outcomes
+ROTATED = "rotated"
+REPLAYED = "replayed"
+RACED = "raced"  # Rotated moments ago by a concurrent refresh; the family stays live
+INVALID = "invalid"
+
+# Negative cache states
+_SUPERSEDED = "superseded"  # Rotated away; presenting it again is a replay
+_DEAD = "dead"  # Its family is revoked; nothing left to do
+
+
+class RevokedTokenCache:
+    """Bounded LRU of revoked jtis -> (state, family id, expiry epoch, revocation epoch)"""
+
+    def __init__(self, max_size: int = REVOKED_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, jti: str) -> Optional[tuple]:
+        entry = self._entries.get(jti)
+        if entry is None:
+            return None
+        if entry[2] <= time.time():
+            del self._entries[jti]
+            return None
+        self._entries.move_to_end(jti)
+        return entry
+
+    def add(self, jti: str, state: str, family_id: Optional[str], expires_at: datetime):
+        self._entries[jti] = (state, family_id, _epoch(expires_at), time.time())
+        self._entries.move_to_end(jti)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def mark_dead(self, jti: str):
+        entry = self._entries.get(jti)
+        if entry is not None:
+            self._entries[jti] = (_DEAD, *entry[1:])
+
+    def clear(self):
+        self._entries.clear()
+
+
+revoked_tokens = RevokedTokenCache()
+
+
+def _epoch(value: datetime) -> float:
+    # Motor returns naive UTC datetimes
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+async def store_refresh_token(db, jti: str, user_id: str, expires_at: datetime, family_id: Optional[str] = None):
+    """Record a newly issued token; a token without a family starts one"""
+    await db.refresh_tokens.insert_one({
+        "jti": jti,
+        "user_id": user_id,
+        "family_id": family_id or jti,
+        "expires_at": expires_at,
+        "revoked": False,
+        "created_at": datetime.now(timezone.utc)
+    })
+
+
+async def revoke_family(db, family_id: str) -> int:
+    result = await db.refresh_tokens.update_many(
+        {"family_id": family_id, "revoked": False},
+        {"$set": {"revoked": True, "revoked_at": datetime.now(timezone.utc)}}
+    )
+    return result.modified_count
+
+
+async def rotate_refresh_token(db, jti: str, user_id: str, new_jti: str, new_expires_at: datetime) -> str:
+    """
+    Revoke a live token and record its successor in the same family.
+    Returns ROTATED, REPLAYED (the family has been revoked), RACED or INVALID.
+    """
+    cached = revoked_tokens.get(jti)
+    if cached is not None:
+        state, family_id, _, revoked_at = cached
+        if state == _DEAD:
+            return INVALID
+        if time.time() - revoked_at < REPLAY_GRACE_SECONDS:
+            return RACED
+        await revoke_family(db, family_id)
+        revoked_tokens.mark_dead(jti)
+        return REPLAYED
+
+    now = datetime.now(timezone.utc)
+    old = await db.refresh_tokens.find_one_and_update(
+        {"jti": jti, "user_id": user_id, "revoked": False, "expires_at": {"$gt": now}},
+        {"$set": {"revoked": True, "revoked_at": now, "replaced_by": new_jti}},
+        projection={"_id": 0, "family_id": 1, "expires_at": 1}
+    )
+    if old is not None:
+        # Tokens stored before families existed start their own
+        family_id = old.get("family_id") or jti
+        await store_refresh_token(db, new_jti, user_id, new_expires_at, family_id)
+        revoked_tokens.add(jti, _SUPERSEDED, family_id, old["expires_at"])
+        return ROTATED
+
+    # Not live: find out whether it is a replay of a rotated token
+    doc = await db.refresh_tokens.find_one(
+        {"jti": jti, "user_id": user_id},
+        {"_id": 0, "family_id": 1, "expires_at": 1, "revoked": 1, "revoked_at": 1, "replaced_by": 1}
+    )
+    if doc is None or not doc.get("revoked"):
+        return INVALID
+    if doc.get("replaced_by") and doc.get("revoked_at") and time.time() - _epoch(doc["revoked_at"]) < REPLAY_GRACE_SECONDS:
+        return RACED
+    family_id = doc.get("family_id") or jti
+    await revoke_family(db, family_id)
+    revoked_tokens.add(jti, _DEAD, family_id, doc["expires_at"])
+    return REPLAYED
+
+
+async def revoke_refresh_token(db, jti: str):
+    """Revoke a token and the rest of its family, e.g. on logout"""
+    doc = await db.refresh_tokens.find_one_and_update(
+        {"jti": jti},
+        {"$set": {"revoked": True, "revoked_at": datetime.now(timezone.utc)}},
+        projection={"_id": 0, "family_id": 1, "expires_at": 1}
+    )
+    if doc is None:
+        return
+    family_id = doc.get("family_id") or jti
+    await revoke_family(db, family_id)
+    revoked_tokens.add(jti, _DEAD, family_id, doc["expires_at"])
@@ -0,0 +1,258 @@
+"""
+In-memory search over character, technique and team names.
+
+Indexed text is split into normalized tokens. Tokens are kept in a sorted
+list for prefix lookups and in a trigram posting map for typo-tolerant
+matching, so searches never scan MongoDB or compile user-supplied regexes.
+Indexes are loaded lazily, updated by the write routes, and rebuilt
+periodically so other workers' writes are picked up.
+"""
+import bisect
+import re
+import unicodedata
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from services.periodic_index import PeriodicIndex
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+PREFIX_EXPANSION_LIMIT = 200  # Max indexed tokens a single query prefix expands to
+FUZZY_THRESHOLD = 0.5  # Minimum trigram Dice similarity for a typo match
+PREFIX_SCORE = 0.9
+FUZZY_SCORE = 0.8
+
+
+def normalize(text: str) -> str:
+    """Lower-case and strip accents so 'Éclair' matches 'eclair'"""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(normalize(text))
+
+
+def trigrams(token: str) -> Set[str]:
+    padded = f"${token}$"
+    return {padded[i:i + 3] for i in range(max(1, len(padded) - 2))}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance, giving up once it exceeds `limit`"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous_previous: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class SearchIndex(PeriodicIndex):
+    """Token/trigram index over one collection"""
+
+    def __init__(
+        self,
+        collection: str,
+        query: Dict[str, Any],
+        projection: Dict[str, int],
+        texts: Callable[[Dict[str, Any]], List[Tuple[str, float]]],
+        payload: Callable[[Dict[str, Any]], Dict[str, Any]],
+        include: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ):
+        self.collection = collection
+        self.query = query
+        self.projection = projection
+        self.texts = texts
+        self.payload = payload
+        self.include = include or (lambda doc: True)
+        super().__init__()
+        self._reset()
+
+    def _reset(self):
+        self._entries: Dict[str, Dict[str, Any]] = {}   # id -> {"tokens": {token: weight}, "label": str, "payload": dict}
+        self._token_ids: Dict[str, Set[str]] = {}        # token -> ids
+        self._sorted_tokens: List[str] = []
+        self._trigram_tokens: Dict[str, Set[str]] = {}   # trigram -> tokens
+
+    async def _load(self, db):
+        docs = await db[self.collection].find(self.query, self.projection).to_list(length=None)
+        self._reset()
+        for doc in docs:
+            self.upsert(doc)
+
+    def upsert(self, doc: Dict[str, Any]):
+        """Add or replace a document; documents failing `include` are removed"""
+        doc_id = doc["id"]
+        self.remove(doc_id)
+        if not self.include(doc):
+            return
+
+        texts = self.texts(doc)
+        tokens: Dict[str, float] = {}
+        for text, weight in texts:
+            for token in tokenize(text):
+                tokens[token] = max(weight, tokens.get(token, 0.0))
+
+        self._entries[doc_id] = {
+            "tokens": tokens,
+            "label": normalize(texts[0][0]) if texts else "",
+            "payload": self.payload(doc)
+        }
+        for token in tokens:
+            ids = self._token_ids.get(token)
+            if ids is None:
+                ids = self._token_ids[token] = set()
+                bisect.insort(self._sorted_tokens, token)
+                for gram in trigrams(token):
+                    self._trigram_tokens.setdefault(gram, set()).add(token)
+            ids.add(doc_id)
+
+    def remove(self, doc_id: str):
+        entry = self._entries.pop(doc_id, None)
+        if entry is None:
+            return
+        for token in entry["tokens"]:
+            ids = self._token_ids[token]
+            ids.discard(doc_id)
+            if ids:
+                continue
+            del self._token_ids[token]
+            del self._sorted_tokens[bisect.bisect_left(self._sorted_tokens, token)]
+            for gram in trigrams(token):
+                grams = self._trigram_tokens[gram]
+                grams.discard(token)
+                if not grams:
+                    del self._trigram_tokens[gram]
+
+    def _matching_tokens(self, query_token: str) -> Dict[str, float]:
+        """Indexed tokens matching a query token exactly, by prefix or by trigram similarity"""
+        matches: Dict[str, float] = {}
+
+        start = bisect.bisect_left(self._sorted_tokens, query_token)
+        for token in self._sorted_tokens[start:start + PREFIX_EXPANSION_LIMIT]:
+            if not token.startswith(query_token):
+                break
+            matches[token] = 1.0 if token == query_token else PREFIX_SCORE
+
+        if len(query_token) >= 3:
+            query_grams = trigrams(query_token)
+            shared: Dict[str, int] = {}
+            for gram in query_grams:
+                for token in self._trigram_tokens.get(gram, ()):
+                    shared[token] = shared.get(token, 0) + 1
+            # Short tokens share few trigrams after a typo, so fall back to edit distance
+            max_edits = 1 if len(query_token) <= 5 else 2
+            for token, count in shared.items():
+                similarity = 2 * count / (len(query_grams) + len(trigrams(token)))
+                if similarity < FUZZY_THRESHOLD:
+                    if edit_distance(query_token, token[:len(query_token) + max_edits], max_edits) > max_edits:
+                        continue
+                    similarity = FUZZY_THRESHOLD
+                matches[token] = max(matches.get(token, 0.0), similarity * FUZZY_SCORE)
+
+        return matches
+
+    def search(
+        self,
+        query: str,
+        limit: Optional[int] = 10,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Rank documents matching every query token (limit=None for all of them).
+        Returns payload dicts with an added "score", best first.
+        """
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+
+        scores: Optional[Dict[str, float]] = None
+        for query_token in dict.fromkeys(query_tokens):
+            token_scores: Dict[str, float] = {}
+            for token, similarity in self._matching_tokens(query_token).items():
+                for doc_id in self._token_ids[token]:
+                    score = similarity * self._entries[doc_id]["tokens"][token]
+                    if score > token_scores.get(doc_id, 0.0):
+                        token_scores[doc_id] = score
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {doc_id: scores[doc_id] + score for doc_id, score in token_scores.items() if doc_id in scores}
+            if not scores:
+                return []
+
+        normalized_query = " ".join(query_tokens)
+        ranked = []
+        for doc_id, score in scores.items():
+            entry = self._entries[doc_id]
+            if predicate is not None and not predicate(entry["payload"]):
+                continue
+            if entry["label"].startswith(normalized_query):
+                score += 1.0
+            ranked.append((-score, entry["label"], doc_id))
+
+        ranked.sort()
+        return [
+            {**self._entries[doc_id]["payload"], "score": round(-negative_score, 4)}
+            for negative_score, _, doc_id in ranked[:limit]
+        ]
+
+
+character_index = SearchIndex(
+    "characters",
+    query={},
+    projection={"_id": 0, "id": 1, "name": 1, "nickname": 1, "position": 1, "element": 1, "base_rarity": 1, "portrait": 1},
+    texts=lambda doc: [(doc.get("name", ""), 1.0), (doc.get("nickname", ""), 1.0)],
+    payload=lambda doc: {
+        "id": doc["id"],
+        "name": doc.get("name"),
+        "nickname": doc.get("nickname"),
+        "position": doc.get("position"),
+        "element": doc.get("element"),
+        "base_rarity": doc.get("base_rarity"),
+        "portrait": doc.get("portrait")
+    }
+)
+
+technique_index = SearchIndex(
+    "techniques",
+    query={},
+    projection={"_id": 0, "id": 1, "name": 1, "description": 1, "technique_type": 1, "category": 1, "element": 1, "power": 1},
+    texts=lambda doc: [(doc.get("name", ""), 1.0), (doc.get("description", ""), 0.3)],
+    payload=lambda doc: {
+        "id": doc["id"],
+        "name": doc.get("name"),
+        "technique_type": doc.get("technique_type"),
+        "category": doc.get("category"),
+        "element": doc.get("element"),
+        "power": doc.get("power")
+    }
+)
+
+team_index = SearchIndex(
+    "teams",
+    query={"is_public": True},
+    projection={"_id": 0, "id": 1, "name": 1, "username": 1, "formation": 1, "is_public": 1},
+    texts=lambda doc: [(doc.get("name", ""), 1.0), (doc.get("username") or "", 0.6), (doc.get("formation") or "", 0.6)],
+    payload=lambda doc: {
+        "id": doc["id"],
+        "name": doc.get("name"),
+        "username": doc.get("username"),
+        "formation": doc.get("formation")
+    },
+    include=lambda doc: doc.get("is_public", False)
+)
+
+search_indexes = {
+    "characters": character_index,
+    "techniques": technique_index,
+    "teams": team_index,
+}
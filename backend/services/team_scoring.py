@@ -0,0 +1,216 @@
+"""
+Save-time validation and scoring for user teams.
+
+Players are checked against the formation's positions and the character
+catalog, equipment and coach references are resolved from their
+collections, and the team's aggregate stats are computed once. The derived
+summary is stored on the team document so feeds, comparisons and detail
+pages read precomputed numbers instead of re-deriving them per request.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from services.background import spawn
+from services.technique_catalog import character_stat
+
+logger = logging.getLogger(__name__)
+
+TEAM_STATS = ["kick", "control", "technique", "intelligence", "pressure", "agility", "physical"]
+MAX_BENCH_PLAYERS = 5
+SUMMARY_VERSION = 1  # Bump when the summary shape or scoring rules change
+BACKFILL_BATCH_SIZE = 200  # Teams scored concurrently and written per bulk_write
+
+# Team fields the summary is derived from; updates touching any of them rescore the team
+SCORED_FIELDS = ("formation", "players", "bench_players", "coach")
+
+
+def _ref_id(value: Any) -> Optional[str]:
+    """Catalog id of a referenced item; the builder sends numeric ids for some items"""
+    if isinstance(value, dict):
+        value = value.get("id")
+    return None if value is None or value == "" else str(value)
+
+
+def _equipment_ids(player: Dict[str, Any]) -> List[str]:
+    equipment = player.get("user_equipment") or player.get("equipment") or {}
+    return [item_id for item_id in (_ref_id(item) for item in equipment.values() if item) if item_id]
+
+
+async def _load_references(db, team: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Dict[str, Dict], Dict[str, Dict], Optional[Dict[str, Any]]]:
+    """Formation, characters, equipment and coach for a team, fetched concurrently"""
+    members = (team.get("players") or []) + (team.get("bench_players") or [])
+    character_ids = list({_ref_id(p.get("character_id")) for p in members} - {None})
+    equipment_ids = list({item_id for p in members for item_id in _equipment_ids(p)})
+    formation_ref = str(team.get("formation") or "")
+    coach_id = _ref_id(team.get("coach"))
+
+    character_projection = {"_id": 0, "id": 1, "name": 1, "position": 1, "element": 1, "base_stats": 1}
+    formation, characters, equipment, coach = await asyncio.gather(
+        db.formations.find_one({"$or": [{"id": formation_ref}, {"name": formation_ref}]}, {"_id": 0}),
+        db.characters.find({"id": {"$in": character_ids}}, character_projection).to_list(length=None),
+        db.equipment.find({"id": {"$in": equipment_ids}}, {"_id": 0, "id": 1, "stats": 1}).to_list(length=None),
+        db.coaches.find_one({"id": coach_id}, {"_id": 0, "id": 1, "bonuses": 1}) if coach_id else asyncio.sleep(0)
+    )
+    return (
+        formation,
+        {doc["id"]: doc for doc in characters},
+        {doc["id"]: doc for doc in equipment},
+        coach
+    )
+
+
+def _player_stats(character: Dict[str, Any], equipment_stats: List[Dict[str, Any]], coach_bonus: Dict[str, Any]) -> Dict[str, int]:
+    stats = {stat: character_stat(character, stat) for stat in TEAM_STATS}
+    for bonus in equipment_stats + [coach_bonus]:
+        for stat, value in bonus.items():
+            if stat in stats and isinstance(value, (int, float)):
+                stats[stat] += value
+    return stats
+
+
+async def score_team(db, team: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Validate a team document and compute its summary.
+    Returns (summary, errors); the summary is None when any error was found.
+    """
+    formation, characters, equipment, coach = await _load_references(db, team)
+    players = team.get("players") or []
+    bench = team.get("bench_players") or []
+    errors: List[Dict[str, Any]] = []
+
+    if formation is None:
+        errors.append({"field": "formation", "reasons": [f"Unknown formation '{team.get('formation')}'"]})
+    if team.get("coach") and coach is None:
+        errors.append({"field": "coach", "reasons": [f"Unknown coach '{_ref_id(team.get('coach'))}'"]})
+    if len(bench) > MAX_BENCH_PLAYERS:
+        errors.append({"field": "bench_players", "reasons": [f"At most {MAX_BENCH_PLAYERS} bench players allowed"]})
+
+    positions = {p["id"]: p.get("position") for p in (formation or {}).get("positions", [])}
+    coach_bonus = ((coach or {}).get("bonuses") or {}).get("teamStats") or {}
+
+    seen_slots = set()
+    seen_characters = set()
+    scored = []  # (character, slot position, stats) for starters
+    for field, members, slot_key in (("players", players, "position_id"), ("bench_players", bench, "slot_id")):
+        for member in members:
+            slot = member.get(slot_key)
+            character_id = _ref_id(member.get("character_id"))
+            reasons = []
+
+            character = characters.get(character_id)
+            if character is None:
+                reasons.append(f"Unknown character '{character_id}'")
+            elif character_id in seen_characters:
+                reasons.append("Character is already in the team")
+
+            if not slot:
+                reasons.append(f"Missing {slot_key}")
+            elif slot in seen_slots:
+                reasons.append(f"Slot '{slot}' assigned twice")
+            elif field == "players" and formation is not None and slot not in positions:
+                reasons.append(f"Formation has no position '{slot}'")
+
+            item_ids = _equipment_ids(member)
+            unknown_items = [item_id for item_id in item_ids if item_id not in equipment]
+            if unknown_items:
+                reasons.append(f"Unknown equipment: {', '.join(unknown_items)}")
+
+            if reasons:
+                errors.append({"field": field, "slot": slot, "character_id": character_id, "reasons": reasons})
+                continue
+
+            seen_slots.add(slot)
+            seen_characters.add(character_id)
+            if field == "players":
+                equipment_stats = [equipment[item_id].get("stats") or {} for item_id in item_ids]
+                scored.append((character, positions.get(slot), _player_stats(character, equipment_stats, coach_bonus)))
+
+    if errors:
+        return None, errors
+
+    totals = {stat: 0 for stat in TEAM_STATS}
+    elements: Dict[str, int] = {}
+    played_positions: Dict[str, int] = {}
+    out_of_position = 0
+    for character, slot_position, stats in scored:
+        for stat, value in stats.items():
+            totals[stat] += value
+        element = character.get("element") or "Unknown"
+        elements[element] = elements.get(element, 0) + 1
+        played_positions[slot_position] = played_positions.get(slot_position, 0) + 1
+        if character.get("position") != slot_position:
+            out_of_position += 1
+
+    required_positions: Dict[str, int] = {}
+    for position in positions.values():
+        required_positions[position] = required_positions.get(position, 0) + 1
+
+    total = sum(totals.values())
+    player_count = len(scored)
+    return {
+        "version": SUMMARY_VERSION,
+        "player_count": player_count,
+        "bench_count": len(bench),
+        "stats": totals,
+        "total": total,
+        # Same per-stat average the team builder shows
+        "average": round(total / player_count / len(TEAM_STATS)) if player_count else 0,
+        "coach_bonus": {stat: value for stat, value in coach_bonus.items() if stat in totals},
+        "element_distribution": elements,
+        "position_balance": {
+            "required": required_positions,
+            "filled": played_positions,
+            "empty_slots": len(positions) - player_count,
+            "out_of_position": out_of_position
+        }
+    }, []
+
+
+def start_summary_backfill(db):
+    """Schedule the summary backfill so startup doesn't wait on it"""
+    spawn(_run_summary_backfill(db))
+
+
+async def _run_summary_backfill(db):
+    try:
+        scored = await backfill_team_summaries(db)
+    except Exception:
+        logger.exception("Team summary backfill failed")
+        return
+    if scored:
+        logger.info("Backfilled summaries for %d teams", scored)
+
+
+async def backfill_team_summaries(db) -> int:
+    """
+    Score teams saved before summaries existed or under an older
+    SUMMARY_VERSION. Teams that no longer validate get a null summary, so
+    they are not retried on every startup and compare as unscored.
+
+    Teams are scored a batch at a time and written with one bulk_write per
+    batch. Each write re-checks staleness, so a team saved while the
+    backfill runs keeps the summary its save computed.
+    """
+    stale = {"$or": [{"summary": {"$exists": False}}, {"summary.version": {"$lt": SUMMARY_VERSION}}]}
+    scored = 0
+    batch: List[Dict[str, Any]] = []
+    async for team in db.teams.find(stale, {"_id": 0}):
+        batch.append(team)
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            scored += await _write_summaries(db, batch, stale)
+            batch = []
+    if batch:
+        scored += await _write_summaries(db, batch, stale)
+    return scored
+
+
+async def _write_summaries(db, teams: List[Dict[str, Any]], stale: Dict[str, Any]) -> int:
+    results = await asyncio.gather(*(score_team(db, team) for team in teams))
+    await db.teams.bulk_write([
+        UpdateOne({"id": team["id"], **stale}, {"$set": {"summary": summary}})
+        for team, (summary, _) in zip(teams, results)
+    ], ordered=False)
+    return len(teams)
@@ -0,0 +1,152 @@
+"""
+Vector index for "teams like this" lookups.
+
+Each public team is embedded as a fixed-length vector made of four blocks:
+per-player average stats, element mix, a hashed formation one-hot and a
+hashed multiset of its characters. Blocks are normalized separately and
+weighted so no single block dominates, then the whole row is scaled to
+unit length. Rows live in one float32 matrix, so top-k cosine similarity
+is a single matrix-vector product.
+"""
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.periodic_index import PeriodicIndex
+from services.team_scoring import TEAM_STATS
+
+ELEMENTS = ["fire", "wind", "wood", "earth", "lightning", "void"]  # Anything else shares an "other" column
+FORMATION_BUCKETS = 32
+CHARACTER_BUCKETS = 128
+
+# Relative weight of each block in the cosine similarity
+BLOCK_WEIGHTS = {
+    "stats": 1.0,
+    "elements": 0.6,
+    "formation": 0.5,
+    "characters": 1.0,
+}
+
+STATS_SLICE = slice(0, len(TEAM_STATS))
+ELEMENTS_SLICE = slice(STATS_SLICE.stop, STATS_SLICE.stop + len(ELEMENTS) + 1)
+FORMATION_SLICE = slice(ELEMENTS_SLICE.stop, ELEMENTS_SLICE.stop + FORMATION_BUCKETS)
+CHARACTERS_SLICE = slice(FORMATION_SLICE.stop, FORMATION_SLICE.stop + CHARACTER_BUCKETS)
+VECTOR_SIZE = CHARACTERS_SLICE.stop
+
+TEAM_VECTOR_PROJECTION = {"_id": 0, "id": 1, "is_public": 1, "formation": 1, "players.character_id": 1, "summary": 1}
+
+
+def _bucket(value: Any, buckets: int) -> int:
+    """Stable hash bucket; Python's hash() is salted per process"""
+    return zlib.crc32(str(value).encode()) % buckets
+
+
+def _set_block(vector: np.ndarray, block: slice, values: np.ndarray, weight: float):
+    norm = np.linalg.norm(values)
+    if norm > 0:
+        vector[block] = values / norm * weight
+
+
+def team_vector(team: Dict[str, Any]) -> np.ndarray:
+    """Unit-length embedding of a team document"""
+    vector = np.zeros(VECTOR_SIZE, dtype=np.float32)
+    summary = team.get("summary") or {}
+
+    player_count = summary.get("player_count") or 0
+    if player_count:
+        stats = summary.get("stats") or {}
+        averages = np.array([stats.get(stat, 0) / player_count for stat in TEAM_STATS], dtype=np.float32)
+        # Center on the team's own mean so the block captures its stat profile, not its raw power
+        _set_block(vector, STATS_SLICE, averages - averages.mean(), BLOCK_WEIGHTS["stats"])
+
+    elements = np.zeros(len(ELEMENTS) + 1, dtype=np.float32)
+    for element, count in (summary.get("element_distribution") or {}).items():
+        element = str(element).lower()
+        elements[ELEMENTS.index(element) if element in ELEMENTS else len(ELEMENTS)] += count
+    _set_block(vector, ELEMENTS_SLICE, elements, BLOCK_WEIGHTS["elements"])
+
+    if team.get("formation"):
+        formation = np.zeros(FORMATION_BUCKETS, dtype=np.float32)
+        formation[_bucket(team["formation"], FORMATION_BUCKETS)] = 1.0
+        _set_block(vector, FORMATION_SLICE, formation, BLOCK_WEIGHTS["formation"])
+
+    characters = np.zeros(CHARACTER_BUCKETS, dtype=np.float32)
+    for player in team.get("players") or []:
+        if player.get("character_id") is not None:
+            characters[_bucket(player["character_id"], CHARACTER_BUCKETS)] += 1.0
+    _set_block(vector, CHARACTERS_SLICE, characters, BLOCK_WEIGHTS["characters"])
+
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class TeamSimilarityIndex(PeriodicIndex):
+    """Row-per-team matrix of public team embeddings"""
+
+    def __init__(self):
+        super().__init__()
+        self._reset()
+
+    def _reset(self, capacity: int = 64):
+        self._matrix = np.zeros((capacity, VECTOR_SIZE), dtype=np.float32)
+        self._live = np.zeros(capacity, dtype=bool)
+        self._rows: Dict[str, int] = {}             # team id -> row
+        self._row_ids: List[Optional[str]] = [None] * capacity
+        self._free_rows: List[int] = list(range(capacity - 1, -1, -1))
+
+    async def _load(self, db):
+        docs = await db.teams.find({"is_public": True}, TEAM_VECTOR_PROJECTION).to_list(length=None)
+        self._reset(max(64, len(docs)))
+        for doc in docs:
+            self.upsert(doc)
+
+    def _grow(self):
+        capacity = len(self._row_ids)
+        self._matrix = np.vstack([self._matrix, np.zeros((capacity, VECTOR_SIZE), dtype=np.float32)])
+        self._live = np.concatenate([self._live, np.zeros(capacity, dtype=bool)])
+        self._row_ids.extend([None] * capacity)
+        self._free_rows.extend(range(2 * capacity - 1, capacity - 1, -1))
+
+    def upsert(self, doc: Dict[str, Any]):
+        """Add or replace a team; private teams are removed"""
+        if not doc.get("is_public", False):
+            self.remove(doc["id"])
+            return
+        row = self._rows.get(doc["id"])
+        if row is None:
+            if not self._free_rows:
+                self._grow()
+            row = self._free_rows.pop()
+            self._rows[doc["id"]] = row
+            self._row_ids[row] = doc["id"]
+        self._matrix[row] = team_vector(doc)
+        self._live[row] = True
+
+    def remove(self, team_id: str):
+        row = self._rows.pop(team_id, None)
+        if row is None:
+            return
+        self._matrix[row] = 0.0
+        self._live[row] = False
+        self._row_ids[row] = None
+        self._free_rows.append(row)
+
+    def similar(self, team: Dict[str, Any], limit: int = 10) -> List[Tuple[str, float]]:
+        """Top-k public teams by cosine similarity to `team`, excluding itself"""
+        scores = self._matrix @ team_vector(team)
+        scores[~self._live] = -np.inf
+        own_row = self._rows.get(team.get("id"))
+        if own_row is not None:
+            scores[own_row] = -np.inf
+
+        candidates = int(self._live.sum()) - (1 if own_row is not None else 0)
+        limit = min(limit, candidates)
+        if limit <= 0:
+            return []
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self._row_ids[row], round(float(scores[row]), 4)) for row in top]
+
+
+team_similarity = TeamSimilarityIndex()
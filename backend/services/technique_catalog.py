@@ -0,0 +1,195 @@
+"""
+Cached technique catalog and prerequisite graph.
+
+The catalog is loaded once per worker and the prerequisite DAG is derived
+from it: topological order (Kahn's algorithm), the techniques caught in
+cycles or depending on unknown ids, and each technique's transitive
+prerequisite closure. Learnability checks then run entirely in memory.
+"""
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set
+
+from services.periodic_index import PeriodicIndex
+
+
+def character_stat(character: Dict[str, Any], stat: str) -> int:
+    """Main value of a character base stat (0 when missing)"""
+    return (character.get("base_stats", {}).get(stat) or {}).get("main", 0)
+
+
+class TechniqueCatalog(PeriodicIndex):
+    """In-memory technique catalog with a cached prerequisite graph"""
+
+    def __init__(self):
+        super().__init__()
+        self.techniques: Dict[str, Dict[str, Any]] = {}
+        self._build_graph()
+
+    async def _load(self, db):
+        docs = await db.techniques.find({}, {"_id": 0}).to_list(length=None)
+        self.techniques = {doc["id"]: doc for doc in docs}
+        self._build_graph()
+
+    def upsert(self, doc: Dict[str, Any]):
+        """Add or replace one technique and re-derive the graph"""
+        self.techniques[doc["id"]] = {key: value for key, value in doc.items() if key != "_id"}
+        self._build_graph()
+
+    def _build_graph(self):
+        prerequisites = {
+            technique_id: list(dict.fromkeys(technique.get("prerequisites") or []))
+            for technique_id, technique in self.techniques.items()
+        }
+
+        # Techniques requiring an unknown id can never be learned, nor can anything after them
+        self.missing: Dict[str, List[str]] = {
+            technique_id: [p for p in prereqs if p not in self.techniques]
+            for technique_id, prereqs in prerequisites.items()
+            if any(p not in self.techniques for p in prereqs)
+        }
+
+        dependents: Dict[str, List[str]] = {technique_id: [] for technique_id in self.techniques}
+        indegree: Dict[str, int] = {}
+        for technique_id, prereqs in prerequisites.items():
+            known = [p for p in prereqs if p in self.techniques]
+            indegree[technique_id] = len(known)
+            for prereq in known:
+                dependents[prereq].append(technique_id)
+
+        ready = sorted(technique_id for technique_id, degree in indegree.items() if degree == 0)
+        order: List[str] = []
+        while ready:
+            technique_id = ready.pop()
+            order.append(technique_id)
+            for dependent in dependents[technique_id]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    ready.append(dependent)
+
+        self.order = order
+        self.cyclic: Set[str] = {technique_id for technique_id, degree in indegree.items() if degree > 0}
+        self.dependents = dependents
+        self.prerequisites = prerequisites
+
+        # Closure in topological order: every prerequisite's closure is already known
+        closure: Dict[str, FrozenSet[str]] = {}
+        for technique_id in order:
+            ancestors: Set[str] = set()
+            for prereq in prerequisites[technique_id]:
+                if prereq in self.techniques:
+                    ancestors.add(prereq)
+                    ancestors |= closure[prereq]
+            closure[technique_id] = frozenset(ancestors)
+        self.closure = closure
+
+        # Techniques left over by Kahn's algorithm are on a cycle or after one
+        in_cycle = {technique_id for technique_id in self.cyclic if self._reaches_itself(technique_id)}
+        # Everything after a technique with an unknown prerequisite, cycles included
+        after_missing: Set[str] = set()
+        pending = list(self.missing)
+        while pending:
+            technique_id = pending.pop()
+            if technique_id not in after_missing:
+                after_missing.add(technique_id)
+                pending.extend(dependents[technique_id])
+
+        self.block_reasons: Dict[str, List[str]] = {}
+        for technique_id in self.cyclic | after_missing:
+            reasons = []
+            if technique_id in in_cycle:
+                reasons.append("Prerequisite cycle")
+            elif technique_id in self.cyclic:
+                reasons.append("Depends on a technique in a prerequisite cycle")
+            if technique_id in after_missing:
+                reasons.append("Depends on a technique that does not exist")
+            self.block_reasons[technique_id] = reasons
+        self.blocked: Set[str] = set(self.block_reasons)
+
+        self.by_position: Dict[Optional[str], List[str]] = {None: []}
+        for technique_id in order + sorted(self.cyclic):
+            allowed = self.techniques[technique_id].get("allowed_positions") or []
+            if not allowed:
+                self.by_position[None].append(technique_id)
+            for position in allowed:
+                self.by_position.setdefault(position, []).append(technique_id)
+
+    def _reaches_itself(self, technique_id: str) -> bool:
+        """Whether following prerequisites from a technique leads back to it"""
+        seen: Set[str] = set()
+        pending = [p for p in self.prerequisites[technique_id] if p in self.cyclic]
+        while pending:
+            prereq = pending.pop()
+            if prereq == technique_id:
+                return True
+            if prereq not in seen:
+                seen.add(prereq)
+                pending.extend(p for p in self.prerequisites[prereq] if p in self.cyclic)
+        return False
+
+    def unmet_requirements(
+        self,
+        technique: Dict[str, Any],
+        character: Dict[str, Any],
+        level: int,
+        learned: Iterable[str]
+    ) -> List[str]:
+        """Reasons a character cannot learn a technique; empty when learnable"""
+        learned = learned if isinstance(learned, (set, frozenset)) else set(learned)
+        technique_id = technique["id"]
+        reasons = []
+
+        reasons.extend(self.block_reasons.get(technique_id, []))
+
+        allowed = technique.get("allowed_positions") or []
+        if allowed and character.get("position") not in allowed:
+            reasons.append(f"Only {', '.join(allowed)} players can learn this technique")
+
+        if level < technique.get("min_level", 1):
+            reasons.append(f"Requires level {technique.get('min_level', 1)}")
+
+        for stat, required in (technique.get("stat_requirements") or {}).items():
+            if character_stat(character, stat) < required:
+                reasons.append(f"Requires {stat} {required}")
+
+        missing = [p for p in self.prerequisites.get(technique_id, []) if p not in learned]
+        if missing:
+            names = [self.techniques[p]["name"] if p in self.techniques else p for p in missing]
+            reasons.append(f"Requires {', '.join(names)}")
+
+        return reasons
+
+    def learnable(self, character: Dict[str, Any], level: int, learned: Set[str]) -> Dict[str, Any]:
+        """Split the techniques a character's position allows into learnable and locked"""
+        position = character.get("position")
+        candidates = self.by_position[None] + self.by_position.get(position, [])
+
+        learnable = []
+        locked = []
+        for technique_id in candidates:
+            if technique_id in learned:
+                continue
+            technique = self.techniques[technique_id]
+            reasons = self.unmet_requirements(technique, character, level, learned)
+            if reasons:
+                locked.append({"technique_id": technique_id, "reasons": reasons})
+            else:
+                learnable.append(technique)
+
+        return {"learnable": learnable, "locked": locked}
+
+    def graph(self) -> Dict[str, Any]:
+        """Serializable view of the prerequisite graph"""
+        return {
+            "order": self.order,
+            "edges": [
+                [prereq, technique_id]
+                for technique_id, prereqs in self.prerequisites.items()
+                for prereq in prereqs
+                if prereq in self.techniques
+            ],
+            "closure": {technique_id: sorted(ancestors) for technique_id, ancestors in self.closure.items() if ancestors},
+            "cycles": sorted(self.cyclic),
+            "missing_prerequisites": self.missing
+        }
+
+
+technique_catalog = TechniqueCatalog()
@@ -0,0 +1,221 @@
+"""
+Filter/sort planner for the technique listing.
+
+Filters are composed as independent clauses under `$and` (so position and
+search no longer overwrite each other's `$or`), the best-matching compound
+index is picked as a hint, and keyset cursors page through power/name/id
+orderings. The same plan can be evaluated against the in-memory technique
+catalog, so warm workers answer listings without a query.
+"""
+import base64
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Compound indexes created at startup; equality fields first, then the sort key
+TECHNIQUE_INDEXES: List[List[Tuple[str, int]]] = [
+    [("category", 1), ("element", 1), ("power", -1), ("id", 1)],
+    [("element", 1), ("power", -1), ("id", 1)],
+    [("technique_type", 1), ("power", -1), ("id", 1)],
+    [("power", -1), ("id", 1)],
+]
+
+EQUALITY_FILTERS = ["technique_type", "category", "element", "rarity"]
+SORT_FIELDS = {"power": -1, "name": 1}  # sort_by -> default direction
+SORT_VALUE_TYPES = {"power": (int, float), "name": (str,)}  # Cursor value type per sort field
+
+
+def encode_cursor(value: Any) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Any:
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+class TechniqueQueryPlan:
+    """A composed technique filter with its sort, hint and pagination"""
+
+    def __init__(
+        self,
+        filters: Dict[str, Any],
+        position: Optional[str] = None,
+        min_power: Optional[int] = None,
+        max_power: Optional[int] = None,
+        ranked_ids: Optional[List[str]] = None,
+        sort_by: Optional[str] = None,
+        order: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None
+    ):
+        if sort_by is not None and sort_by not in SORT_FIELDS:
+            raise ValueError(f"sort_by must be one of: {', '.join(SORT_FIELDS)}")
+        if order is not None and order not in ("asc", "desc"):
+            raise ValueError("order must be asc or desc")
+
+        self.limit = limit
+        self.ranked_ids = ranked_ids
+        self.clauses: List[Dict[str, Any]] = []
+        self.predicates: List[Callable[[Dict[str, Any]], bool]] = []
+        self.equality = {field: filters[field] for field in EQUALITY_FILTERS if filters.get(field) is not None}
+
+        for field, value in self.equality.items():
+            self.clauses.append({field: value})
+            self.predicates.append(lambda doc, field=field, value=value: doc.get(field) == value)
+
+        if min_power is not None or max_power is not None:
+            power_range = {}
+            if min_power is not None:
+                power_range["$gte"] = min_power
+            if max_power is not None:
+                power_range["$lte"] = max_power
+            self.clauses.append({"power": power_range})
+            self.predicates.append(lambda doc: (
+                (min_power is None or doc.get("power", 0) >= min_power) and
+                (max_power is None or doc.get("power", 0) <= max_power)
+            ))
+
+        if position:
+            # Empty allowed_positions means every position may learn the technique
+            self.clauses.append({"$or": [{"allowed_positions": []}, {"allowed_positions": position}]})
+            self.predicates.append(lambda doc: not doc.get("allowed_positions") or position in doc["allowed_positions"])
+
+        if ranked_ids is not None:
+            ranked = set(ranked_ids)
+            self.clauses.append({"id": {"$in": ranked_ids}})
+            self.predicates.append(lambda doc: doc["id"] in ranked)
+
+        # Relevance order when searching without an explicit sort; otherwise keyset order
+        self.by_relevance = ranked_ids is not None and sort_by is None
+        self.sort_field = sort_by
+        direction = SORT_FIELDS.get(sort_by, 1)
+        if order is not None:
+            direction = 1 if order == "asc" else -1
+        self.direction = direction
+        # Ties break on id opposite to the sort, so the (power -1, id 1)
+        # indexes serve both directions (walked backwards for ascending)
+        self.id_order = -direction if sort_by else 1
+        self.paginated = limit is not None or cursor is not None
+
+        self.offset = 0
+        self.after: Optional[List[Any]] = None
+        if cursor:
+            self._apply_cursor(decode_cursor(cursor))
+
+    def _apply_cursor(self, position_in_order: Any):
+        """Accept only cursors shaped like the ones page() issues for this ordering"""
+        if not isinstance(position_in_order, dict):
+            raise ValueError("Invalid cursor")
+        if self.by_relevance:
+            offset = position_in_order.get("offset")
+            if not isinstance(offset, int) or isinstance(offset, bool) or offset < 0:
+                raise ValueError("Invalid cursor")
+            self.offset = offset
+            return
+
+        after = position_in_order.get("after")
+        if not isinstance(after, list) or len(after) != (2 if self.sort_field else 1):
+            raise ValueError("Invalid cursor")
+        if not isinstance(after[-1], str):
+            raise ValueError("Invalid cursor")
+        if self.sort_field:
+            value = after[0]
+            if isinstance(value, bool) or not isinstance(value, SORT_VALUE_TYPES[self.sort_field]):
+                raise ValueError("Invalid cursor")
+        self.after = after
+
+    @property
+    def sort(self) -> Optional[List[Tuple[str, int]]]:
+        if self.by_relevance or not (self.paginated or self.sort_field):
+            return None
+        if self.sort_field:
+            return [(self.sort_field, self.direction), ("id", self.id_order)]
+        return [("id", 1)]
+
+    def _keyset_clause(self) -> Optional[Dict[str, Any]]:
+        if self.after is None:
+            return None
+        if not self.sort_field:
+            return {"id": {"$gt": self.after[-1]}}
+        value, last_id = self.after
+        comparison = "$gt" if self.direction == 1 else "$lt"
+        id_comparison = "$gt" if self.id_order == 1 else "$lt"
+        return {"$or": [
+            {self.sort_field: {comparison: value}},
+            {self.sort_field: value, "id": {id_comparison: last_id}}
+        ]}
+
+    def mongo_filter(self) -> Dict[str, Any]:
+        clauses = list(self.clauses)
+        keyset = self._keyset_clause()
+        if keyset:
+            clauses.append(keyset)
+        if not clauses:
+            return {}
+        if len(clauses) == 1:
+            return clauses[0]
+        return {"$and": clauses}
+
+    def hint(self) -> Optional[List[Tuple[str, int]]]:
+        """Index whose equality prefix is fully constrained and whose next key serves the sort"""
+        best = None
+        best_score = 0
+        for index in TECHNIQUE_INDEXES:
+            prefix = 0
+            for field, _ in index:
+                if field not in self.equality:
+                    break
+                prefix += 1
+            # An index serves the sort when walked forwards or backwards
+            remaining = index[prefix:prefix + 2]
+            sort = self.sort or []
+            serves_sort = bool(self.sort_field) and remaining in (sort, [(field, -order) for field, order in sort])
+            score = prefix * 2 + (1 if serves_sort else 0)
+            if score > best_score:
+                best, best_score = index, score
+        return best
+
+    def matches(self, doc: Dict[str, Any]) -> bool:
+        return all(predicate(doc) for predicate in self.predicates)
+
+    def _sort_docs(self, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if self.by_relevance:
+            rank = {technique_id: index for index, technique_id in enumerate(self.ranked_ids)}
+            return sorted(docs, key=lambda doc: rank[doc["id"]])
+        if self.sort_field:
+            docs = sorted(docs, key=lambda doc: doc["id"], reverse=self.id_order == -1)
+            return sorted(docs, key=lambda doc: doc.get(self.sort_field), reverse=self.direction == -1)
+        if self.paginated:
+            return sorted(docs, key=lambda doc: doc["id"])
+        return docs
+
+    def _after_cursor(self, doc: Dict[str, Any]) -> bool:
+        if self.after is None:
+            return True
+        if not self.sort_field:
+            return doc["id"] > self.after[-1]
+        value, last_id = self.after
+        current = doc.get(self.sort_field)
+        if current == value:
+            return doc["id"] > last_id if self.id_order == 1 else doc["id"] < last_id
+        return current > value if self.direction == 1 else current < value
+
+    def page(self, docs: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Order, apply cursor/limit and build the next cursor. `docs` may hold
+        one more item than the page to detect whether a next page exists.
+        """
+        docs = self._sort_docs([doc for doc in docs if self._after_cursor(doc)])
+        if self.by_relevance:
+            docs = docs[self.offset:]
+        if self.limit is None or len(docs) <= self.limit:
+            return docs, None
+
+        docs = docs[:self.limit]
+        if self.by_relevance:
+            return docs, encode_cursor({"offset": self.offset + self.limit})
+        last = docs[-1]
+        after = [last.get(self.sort_field), last["id"]] if self.sort_field else [last["id"]]
+        return docs, encode_cursor({"after": after})
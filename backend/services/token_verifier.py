@@ -0,0 +1,162 @@
+"""
+JWT signing and verification with a decoded-claims cache.
+
+Access tokens live for 30 minutes and are presented on every request, so
+verified claims are cached in a bounded LRU keyed by the SHA-256 of the
+token. A cached entry is served until the token's own `exp`, which skips
+the signature check and JSON decoding on repeat requests.
+
+Keys are identified by a `kid` header, so the signing key can be rotated
+while older keys keep verifying the tokens already issued. Configuration:
+- JWT_KEYS: comma separated "kid:secret" pairs
+- JWT_ACTIVE_KID: kid used to sign new tokens, defaults to the first pair
+- JWT_SECRET_KEY: single key used when JWT_KEYS is unset (kid "default")
+Tokens without a kid header, issued before rotation, verify with the
+"default" key when present, otherwise with the active key.
+
+reload_signing_keys() re-reads .env and the keys without a restart (the
+server calls it on SIGHUP and from the internal reload endpoint). Cached
+claims remember the kid that verified them, and entries whose key was
+removed or changed are evicted on reload.
+"""
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import jwt
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+ALGORITHM = "HS256"
+DEFAULT_KID = "default"
+DEFAULT_SECRET_KEY = "your-secret-key-here-change-in-production"
+CLAIMS_CACHE_SIZE = 10000
+
+
+def load_signing_keys() -> tuple:
+    """({kid: secret}, active kid) from the environment"""
+    keys: Dict[str, str] = {}
+    for pair in filter(None, (part.strip() for part in os.environ.get("JWT_KEYS", "").split(","))):
+        kid, sep, secret = pair.partition(":")
+        if not sep or not kid or not secret:
+            raise ValueError("JWT_KEYS entries must look like kid:secret")
+        keys[kid] = secret
+    if not keys:
+        keys[DEFAULT_KID] = os.environ.get("JWT_SECRET_KEY") or DEFAULT_SECRET_KEY
+
+    active_kid = os.environ.get("JWT_ACTIVE_KID") or next(iter(keys))
+    if active_kid not in keys:
+        raise ValueError(f"JWT_ACTIVE_KID {active_kid!r} is not one of JWT_KEYS")
+    return keys, active_kid
+
+
+class TokenVerifier:
+    """Signs tokens with the active key and verifies them through an LRU of claims"""
+
+    def __init__(self, max_size: int = CLAIMS_CACHE_SIZE):
+        self.max_size = max_size
+        self._keys: Optional[Dict[str, str]] = None
+        self._active_kid: Optional[str] = None
+        self._claims: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def _ensure_keys(self):
+        # Loaded lazily so .env has been read by the time keys are needed
+        if self._keys is None:
+            self._keys, self._active_kid = load_signing_keys()
+
+    def reload_keys(self) -> int:
+        """
+        Re-read keys from the environment and evict cached claims verified
+        with a key that is gone or has a new secret. Returns the number of
+        evicted entries.
+        """
+        previous = self._keys or {}
+        self._keys, self._active_kid = load_signing_keys()
+        stale = [
+            key for key, (_, _, kid) in self._claims.items()
+            if self._keys.get(kid) is None or self._keys[kid] != previous.get(kid)
+        ]
+        for key in stale:
+            del self._claims[key]
+        return len(stale)
+
+    def sign(self, payload: Dict[str, Any]) -> str:
+        self._ensure_keys()
+        return jwt.encode(
+            payload,
+            self._keys[self._active_kid],
+            algorithm=ALGORITHM,
+            headers={"kid": self._active_kid}
+        )
+
+    def _decode(self, token: str) -> tuple:
+        """(claims, kid of the key that verified them)"""
+        self._ensure_keys()
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is None:
+            kid = DEFAULT_KID if DEFAULT_KID in self._keys else self._active_kid
+        secret = self._keys.get(kid)
+        if secret is None:
+            raise jwt.InvalidTokenError("Unknown signing key")
+        return jwt.decode(token, secret, algorithms=[ALGORITHM]), kid
+
+    def verify(self, token: str, cache: bool = True) -> Dict[str, Any]:
+        """
+        Claims of a valid token; raises jwt.PyJWTError otherwise. Single-use
+        tokens (refresh tokens) should pass cache=False.
+        The returned dict is shared with the cache and must not be mutated.
+        """
+        if not cache:
+            return self._decode(token)[0]
+
+        key = hashlib.sha256(token.encode("utf-8")).digest()
+        entry = self._claims.get(key)
+        if entry is not None:
+            claims, expires_at, _ = entry
+            if expires_at is None or time.time() < expires_at:
+                self._claims.move_to_end(key)
+                self.hits += 1
+                return claims
+            del self._claims[key]
+            self.expired += 1
+            raise jwt.ExpiredSignatureError("Signature has expired")
+
+        self.misses += 1
+        claims, kid = self._decode(token)
+        self._claims[key] = (claims, claims.get("exp"), kid)
+        while len(self._claims) > self.max_size:
+            self._claims.popitem(last=False)
+        return claims
+
+    def clear(self):
+        self._claims.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.expired
+        return {
+            "size": len(self._claims),
+            "active_kid": self._active_kid,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+token_verifier = TokenVerifier()
+
+
+def reload_signing_keys() -> int:
+    """Re-read .env and reload the signing keys; returns the evicted cache entries"""
+    load_dotenv(override=True)
+    evicted = token_verifier.reload_keys()
+    logger.info("Reloaded JWT signing keys (active kid %r), evicted %d cached tokens", token_verifier.stats()["active_kid"], evicted)
+    return evicted
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Cursor Pagination Test Suite
+Tests cursor pagination of gacha history, technique listings and follower listings:
+every page chain returns each item exactly once, in order, and bad cursors give 400
+"""
+import requests
+import unittest
+import random
+import string
+
+# Get the backend URL from the frontend .env file
+with open('/app/frontend/.env', 'r') as f:
+    for line in f:
+        if line.startswith('REACT_APP_BACKEND_URL='):
+            BACKEND_URL = line.strip().split('=')[1].strip('"\'')
+            break
+
+# Ensure the URL doesn't have trailing slash
+if BACKEND_URL.endswith('/'):
+    BACKEND_URL = BACKEND_URL[:-1]
+
+# Add the /api prefix
+API_URL = f"{BACKEND_URL}/api"
+
+print(f"Testing Cursor Pagination at: {API_URL}")
+
+def generate_random_string(length=8):
+    """Generate a random string of fixed length"""
+    letters = string.ascii_lowercase
+    return ''.join(random.choice(letters) for i in range(length))
+
+def register_user(prefix):
+    """Register a new user and return (auth headers, user id)"""
+    random_suffix = generate_random_string()
+    response = requests.post(f"{API_URL}/auth/register", json={
+        "username": f"{prefix}_{random_suffix}",
+        "email": f"{prefix}_{random_suffix}@example.com",
+        "password": "PagingTest123!"
+    })
+    assert response.status_code == 200, f"Registration failed: {response.text}"
+    data = response.json()
+    return {"Authorization": f"Bearer {data['access_token']}"}, data["user"]["id"]
+
+class CursorPaginationTest(unittest.TestCase):
+    """Cursor pagination tests"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Register a coach and two followers shared by every test"""
+        cls.headers, cls.user_id = register_user("paging")
+        cls.followers = [register_user("pagingfan") for _ in range(2)]
+
+    def collect_body_pages(self, url, items_key, limit, headers):
+        """Follow next_cursor links in the response body, returning the pages"""
+        pages = []
+        cursor = None
+        while True:
+            params = {"limit": limit}
+            if cursor:
+                params["cursor"] = cursor
+            response = requests.get(url, params=params, headers=headers)
+            self.assertEqual(response.status_code, 200, f"Page request failed: {response.text}")
+            data = response.json()
+            pages.append(data[items_key])
+            cursor = data.get("next_cursor")
+            if not cursor:
+                return pages
+            self.assertLess(len(pages), 100, "Cursor chain does not terminate")
+
+    def test_01_gacha_history_pagination(self):
+        """Test GET /api/constellations/history pages through every pull once, newest first"""
+        print("\n=== 1. GACHA HISTORY PAGINATION ===")
+
+        response = requests.get(f"{API_URL}/constellations/")
+        self.assertEqual(response.status_code, 200, f"Failed to list constellations: {response.text}")
+        constellations = response.json()
+        self.assertTrue(constellations, "No constellations available")
+
+        # New users start with 50 Kizuna Stars: one 10-pull
+        response = requests.post(f"{API_URL}/constellations/pull", headers=self.headers, json={
+            "constellation_id": constellations[0]["id"],
+            "pull_count": 10,
+            "platform_bonuses": {}
+        })
+        self.assertEqual(response.status_code, 200, f"Pull failed: {response.text}")
+
+        pages = self.collect_body_pages(f"{API_URL}/constellations/history", "pulls", 3, self.headers)
+        pulls = [pull for page in pages for pull in page]
+        ids = [pull["id"] for pull in pulls]
+
+        self.assertEqual(len(pages), 4, "10 pulls in pages of 3 should take 4 pages")
+        self.assertEqual(len(ids), 10, "Every pull should be returned")
+        self.assertEqual(len(set(ids)), len(ids), "Pulls repeated across pages")
+        keys = [(pull["pull_timestamp"], pull["id"]) for pull in pulls]
+        self.assertEqual(keys, sorted(keys, reverse=True), "Pulls are not newest first")
+
+        response = requests.get(f"{API_URL}/constellations/history", params={"cursor": "garbage"}, headers=self.headers)
+        self.assertEqual(response.status_code, 400, "Invalid cursor should return 400")
+
+        print(f"✅ {len(ids)} pulls over {len(pages)} pages, no duplicates")
+
+    def check_technique_pages(self, params):
+        """Page through /api/techniques/ and compare with the unpaginated listing"""
+        response = requests.get(f"{API_URL}/techniques/", params=params)
+        self.assertEqual(response.status_code, 200, f"Failed to list techniques: {response.text}")
+        expected = [technique["id"] for technique in response.json()]
+        if "sort_by" not in params:
+            # Unpaginated listings come in storage order, pages in id order
+            expected.sort()
+
+        ids = []
+        cursor = None
+        page_count = 0
+        while True:
+            page_params = {**params, "limit": 4}
+            if cursor:
+                page_params["cursor"] = cursor
+            response = requests.get(f"{API_URL}/techniques/", params=page_params)
+            self.assertEqual(response.status_code, 200, f"Page request failed: {response.text}")
+            page = response.json()
+            self.assertLessEqual(len(page), 4, "Page larger than the limit")
+            ids.extend(technique["id"] for technique in page)
+            page_count += 1
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+            self.assertLess(page_count, 500, "Cursor chain does not terminate")
+
+        self.assertEqual(len(set(ids)), len(ids), f"Techniques repeated across pages for {params}")
+        self.assertEqual(ids, expected, f"Paged order differs from the full listing for {params}")
+        return len(ids), page_count
+
+    def test_02_technique_pagination(self):
+        """Test GET /api/techniques/ cursor pagination for every sort order"""
+        print("\n=== 2. TECHNIQUE PAGINATION ===")
+
+        for params in (
+            {},
+            {"sort_by": "power"},
+            {"sort_by": "power", "order": "asc"},
+            {"sort_by": "name"},
+            {"sort_by": "name", "order": "desc"},
+        ):
+            count, page_count = self.check_technique_pages(params)
+            print(f"   - {params or 'default order'}: {count} techniques over {page_count} pages")
+
+        for cursor in ("garbage", "abc|def"):
+            response = requests.get(f"{API_URL}/techniques/", params={"sort_by": "power", "limit": 4, "cursor": cursor})
+            self.assertEqual(response.status_code, 400, f"Invalid cursor {cursor!r} should return 400")
+
+        print(f"✅ Technique pages match the full listing, no duplicates")
+
+    def test_03_follower_pagination(self):
+        """Test GET /api/community/followers and /users/{id}/followers pagination"""
+        print("\n=== 3. FOLLOWER PAGINATION ===")
+
+        for follower_headers, _ in self.followers:
+            response = requests.post(f"{API_URL}/community/follow", headers=follower_headers, json={"user_id": self.user_id})
+            self.assertEqual(response.status_code, 200, f"Follow failed: {response.text}")
+            self.assertTrue(response.json()["following"], "Follow toggled off instead of on")
+
+        expected = [user_id for _, user_id in reversed(self.followers)]  # Most recent first
+        for url in (f"{API_URL}/community/followers", f"{API_URL}/community/users/{self.user_id}/followers"):
+            pages = self.collect_body_pages(url, "followers", 1, self.headers)
+            ids = [card["id"] for page in pages for card in page]
+            self.assertEqual(ids, expected, f"Unexpected followers from {url}")
+
+        # The followers follow one user each
+        follower_headers, _ = self.followers[0]
+        pages = self.collect_body_pages(f"{API_URL}/community/following", "following", 1, follower_headers)
+        self.assertEqual([card["id"] for page in pages for card in page], [self.user_id], "Unexpected following list")
+
+        response = requests.get(f"{API_URL}/community/followers", params={"cursor": "garbage"}, headers=self.headers)
+        self.assertEqual(response.status_code, 400, "Invalid cursor should return 400")
+
+        print(f"✅ {len(expected)} followers paged one at a time, most recent first")
+
+def run_cursor_pagination_tests():
+    """Run all cursor pagination tests"""
+    print("=" * 60)
+    print("CURSOR PAGINATION TEST")
+    print("=" * 60)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(CursorPaginationTest)
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+
+    total_tests = result.testsRun
+    failures = len(result.failures)
+    errors = len(result.errors)
+    success_count = total_tests - failures - errors
+
+    print("\n" + "=" * 60)
+    print(f"Total Tests: {total_tests}")
+    print(f"Successful: {success_count}")
+    print(f"Failures: {failures}")
+    print(f"Errors: {errors}")
+
+    if success_count == total_tests:
+        print("\n🎉 ALL CURSOR PAGINATION TESTS PASSED!")
+        return True
+    else:
+        print(f"\n❌ {failures + errors} CURSOR PAGINATION TESTS FAILED!")
+        return False
+
+if __name__ == "__main__":
+    success = run_cursor_pagination_tests()
+    exit(0 if success else 1)
@@ -7,7 +7,7 @@ import { logoColors } from '../styles/colors';
 import { MessageSquare, X, ArrowLeft } from 'lucide-react';
 
 const ChatBubble = () => {
-  const { user, listConversations, getMessages, sendMessage, loadFollowing, startConversation } = useAuth();
+  const { user, listConversations, getMessages, sendMessage, loadAllFollowing, startConversation } = useAuth();
 
   const [open, setOpen] = useState(false);
   const [view, setView] = useState('list'); // 'list' | 'chat' | 'new'
@@ -39,7 +39,7 @@ const ChatBubble = () => {
     (async () => {
       const convos = await listConversations();
       if (convos?.success) setConversations(convos.conversations || []);
-      const fol = await loadFollowing();
+      const fol = await loadAllFollowing();
       if (fol?.success) setFollowing(fol.following || []);
     })();
 
@@ -52,7 +52,7 @@ const ChatBubble = () => {
     return () => {
       if (convPollRef.current) clearInterval(convPollRef.current);
     };
-  }, [open, listConversations, loadFollowing]);
+  }, [open, listConversations, loadAllFollowing]);
 
   useEffect(() => {
     if (endRef.current) endRef.current.scrollIntoView({ behavior: 'smooth' });
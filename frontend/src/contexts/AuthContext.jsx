@@ -28,6 +28,7 @@ export const AuthProvider = ({ children }) => {
   const [user, setUser] = useState(null);
   const [loading, setLoading] = useState(true);
   const refreshTimerRef = useRef(null);
+  const refreshInFlightRef = useRef(null);
 
   const backendUrl = process.env.REACT_APP_BACKEND_URL; // All endpoints must use /api prefix per ingress rules
 
@@ -71,7 +72,18 @@ export const AuthProvider = ({ children }) => {
     };
   }, []);
 
-  const refreshAccessToken = async () => {
+  // Single flight: the refresh cookie is single-use, so requests that hit a 401
+  // together must share one refresh instead of each presenting the same cookie
+  const refreshAccessToken = () => {
+    if (!refreshInFlightRef.current) {
+      refreshInFlightRef.current = performRefresh().finally(() => {
+        refreshInFlightRef.current = null;
+      });
+    }
+    return refreshInFlightRef.current;
+  };
+
+  const performRefresh = async () => {
     try {
       const res = await fetch(`${backendUrl}/api/auth/refresh`, {
         method: 'POST',
@@ -465,40 +477,55 @@ export const AuthProvider = ({ children }) => {
     }
   };
 
-  const loadFollowers = async (userId = null) => {
+  const loadFollowers = async (userId = null, cursor = null) => {
     try {
       const endpoint = userId ? `/api/community/users/${userId}/followers` : `/api/community/followers`;
-      const response = await fetch(`${backendUrl}${endpoint}`, {
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+      const response = await fetch(`${backendUrl}${endpoint}${query}`, {
         headers: { 'Authorization': `Bearer ${user.token}` },
       });
       if (!response.ok) {
         throw new Error('Followers load failed');
       }
       const data = await response.json();
-      return { success: true, followers: data.followers };
+      return { success: true, followers: data.followers, nextCursor: data.next_cursor };
     } catch (error) {
       console.error('Followers load error:', error);
       return { success: false, error: error.message };
     }
   };
 
-  const loadFollowing = async (userId = null) => {
+  const loadFollowing = async (userId = null, cursor = null) => {
     try {
       const endpoint = userId ? `/api/community/users/${userId}/following` : `/api/community/following`;
-      const response = await fetch(`${backendUrl}${endpoint}`, {
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+      const response = await fetch(`${backendUrl}${endpoint}${query}`, {
         headers: { 'Authorization': `Bearer ${user.token}` },
       });
       if (!response.ok) {
         throw new Error('Following load failed');
       }
       const data = await response.json();
-      return { success: true, following: data.following };
+      return { success: true, following: data.following, nextCursor: data.next_cursor };
     } catch (error) {
       console.error('Following load error:', error);
       return { success: false, error: error.message };
     }
   };
 
+  // Chat partner lists need every followed user, not just the first page
+  const loadAllFollowing = async () => {
+    const following = [];
+    let cursor = null;
+    do {
+      const result = await loadFollowing(null, cursor);
+      if (!result.success) return result;
+      following.push(...(result.following || []));
+      cursor = result.nextCursor;
+    } while (cursor);
+    return { success: true, following };
+  };
+
   const loadSaveSlots = async () => {
     try {
       const response = await makeAuthenticatedRequest(`${backendUrl}/api/save-slots`);
@@ -671,6 +698,7 @@ export const AuthProvider = ({ children }) => {
     loadCommunityStats,
     loadFollowers,
     loadFollowing,
+    loadAllFollowing,
     loadSaveSlots,
     createSaveSlot,
     clearSaveSlot,
@@ -9,7 +9,7 @@ import { logoColors } from '../styles/colors';
 import { MessageSquare, Send, ShieldBan, CheckCircle2, Bell } from 'lucide-react';
 
 const ChatPage = () => {
-  const { user, listConversations, startConversation, getMessages, sendMessage, loadFollowing, updateChatSettings, blockUser, unblockUser } = useAuth();
+  const { user, listConversations, startConversation, getMessages, sendMessage, loadAllFollowing, updateChatSettings, blockUser, unblockUser } = useAuth();
   const [following, setFollowing] = useState([]);
   const [conversations, setConversations] = useState([]);
   const [activeConvo, setActiveConvo] = useState(null);
@@ -27,7 +27,7 @@ const ChatPage = () => {
 
   useEffect(() => {
     (async () => {
-      const res = await loadFollowing();
+      const res = await loadAllFollowing();
       if (res?.success) setFollowing(res.following || []);
       const convos = await listConversations();
       if (convos?.success) setConversations(convos.conversations || []);
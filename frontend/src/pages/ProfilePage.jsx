@@ -42,8 +42,6 @@ const ProfilePage = () => {
     loading: authLoading, 
     updateProfile, 
     loadTeams, 
-    loadFollowers, 
-    loadFollowing, 
     updateTeam, 
     deleteTeam,
     loadUserProfile,
@@ -139,18 +137,13 @@ const ProfilePage = () => {
           setTeams([]);
         }
 
-        // Load followers/following for own profile
-        const followersResult = await loadFollowers();
-        const followingResult = await loadFollowing();
-        
+        // Follower lists are paginated, so counts come from the profile counters
         let followersCount = 0;
         let followingCount = 0;
-        
-        if (followersResult.success && followersResult.followers) {
-          followersCount = followersResult.followers.length;
-        }
-        if (followingResult.success && followingResult.following) {
-          followingCount = followingResult.following.length;
+        const ownProfileResult = user?.id ? await loadUserProfile(user.id) : null;
+        if (ownProfileResult?.success && ownProfileResult.user) {
+          followersCount = ownProfileResult.user.followers_count || 0;
+          followingCount = ownProfileResult.user.following_count || 0;
         }
         
         setStats(prev => ({
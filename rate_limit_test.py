@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Rate Limit Test Suite
+Tests that abuse-prone endpoints answer 429 with Retry-After once over their limit.
+Exhausts the login budget of this machine's IP for a minute, so run it last.
+"""
+import requests
+import unittest
+import random
+import string
+
+# Get the backend URL from the frontend .env file
+with open('/app/frontend/.env', 'r') as f:
+    for line in f:
+        if line.startswith('REACT_APP_BACKEND_URL='):
+            BACKEND_URL = line.strip().split('=')[1].strip('"\'')
+            break
+
+# Ensure the URL doesn't have trailing slash
+if BACKEND_URL.endswith('/'):
+    BACKEND_URL = BACKEND_URL[:-1]
+
+# Add the /api prefix
+API_URL = f"{BACKEND_URL}/api"
+
+LOGIN_LIMIT = 10  # Per IP per minute, see RATE_LIMIT_POLICIES
+
+print(f"Testing Rate Limits at: {API_URL}")
+
+def generate_random_string(length=8):
+    """Generate a random string of fixed length"""
+    letters = string.ascii_lowercase
+    return ''.join(random.choice(letters) for i in range(length))
+
+class RateLimitTest(unittest.TestCase):
+    """Rate limiting tests"""
+
+    def test_01_login_rate_limited(self):
+        """Test POST /api/auth/login returns 429 with Retry-After after too many attempts"""
+        print("\n=== 1. LOGIN RATE LIMIT ===")
+
+        login_data = {
+            "email": f"ratelimit_{generate_random_string()}@example.com",
+            "password": "wrongpassword"
+        }
+
+        # Earlier runs in the same minute may already have used part of the budget
+        statuses = []
+        for attempt in range(LOGIN_LIMIT + 1):
+            response = requests.post(f"{API_URL}/auth/login", json=login_data)
+            statuses.append(response.status_code)
+            if response.status_code == 429:
+                break
+
+        self.assertEqual(response.status_code, 429, f"No 429 after {len(statuses)} attempts: {statuses}")
+        self.assertTrue(all(code == 401 for code in statuses[:-1]), f"Unexpected statuses before the limit: {statuses}")
+
+        retry_after = response.headers.get("Retry-After")
+        self.assertIsNotNone(retry_after, "429 response without Retry-After")
+        self.assertTrue(retry_after.isdigit() and 1 <= int(retry_after) <= 60, f"Bad Retry-After: {retry_after}")
+        self.assertIn("detail", response.json(), "Error detail not returned")
+
+        # Rejected attempts are not counted, so the limit holds but doesn't extend itself
+        response = requests.post(f"{API_URL}/auth/login", json=login_data)
+        self.assertEqual(response.status_code, 429, "Requests over the limit should keep being rejected")
+
+        print(f"✅ Login limited after {len(statuses) - 1} attempts")
+        print(f"   - Retry-After: {retry_after}s")
+
+    def test_02_unlimited_endpoints_unaffected(self):
+        """Test endpoints without a policy are not limited"""
+        print("\n=== 2. ENDPOINTS WITHOUT A POLICY ===")
+
+        for attempt in range(LOGIN_LIMIT + 2):
+            response = requests.get(f"{API_URL}/teams/formations/")
+            self.assertNotEqual(response.status_code, 429, "Endpoint without a policy was rate limited")
+
+        print(f"✅ {LOGIN_LIMIT + 2} catalog requests served without limiting")
+
+def run_rate_limit_tests():
+    """Run all rate limit tests"""
+    print("=" * 60)
+    print("RATE LIMIT TEST")
+    print("=" * 60)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(RateLimitTest)
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+
+    total_tests = result.testsRun
+    failures = len(result.failures)
+    errors = len(result.errors)
+    success_count = total_tests - failures - errors
+
+    print("\n" + "=" * 60)
+    print(f"Total Tests: {total_tests}")
+    print(f"Successful: {success_count}")
+    print(f"Failures: {failures}")
+    print(f"Errors: {errors}")
+
+    if success_count == total_tests:
+        print("\n🎉 ALL RATE LIMIT TESTS PASSED!")
+        return True
+    else:
+        print(f"\n❌ {failures + errors} RATE LIMIT TESTS FAILED!")
+        return False
+
+if __name__ == "__main__":
+    success = run_rate_limit_tests()
+    exit(0 if success else 1)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Refresh Token Rotation Test Suite
+Tests refresh token rotation, replay detection and logout revocation
+"""
+import requests
+import time
+import unittest
+import random
+import string
+
+# Get the backend URL from the frontend .env file
+with open('/app/frontend/.env', 'r') as f:
+    for line in f:
+        if line.startswith('REACT_APP_BACKEND_URL='):
+            BACKEND_URL = line.strip().split('=')[1].strip('"\'')
+            break
+
+# Ensure the URL doesn't have trailing slash
+if BACKEND_URL.endswith('/'):
+    BACKEND_URL = BACKEND_URL[:-1]
+
+# Add the /api prefix
+API_URL = f"{BACKEND_URL}/api"
+
+REFRESH_COOKIE_NAME = "refresh_token"
+REPLAY_GRACE_SECONDS = 10  # See services/refresh_tokens.py
+
+print(f"Testing Refresh Token Rotation at: {API_URL}")
+
+def generate_random_string(length=8):
+    """Generate a random string of fixed length"""
+    letters = string.ascii_lowercase
+    return ''.join(random.choice(letters) for i in range(length))
+
+def refresh(refresh_token):
+    """POST /api/auth/refresh presenting the given refresh token cookie"""
+    # The cookie is Secure, so pass it explicitly instead of relying on a session
+    return requests.post(f"{API_URL}/auth/refresh", cookies={REFRESH_COOKIE_NAME: refresh_token})
+
+class RefreshTokenRotationTest(unittest.TestCase):
+    """Refresh token rotation and revocation tests"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Register one user shared by every test"""
+        random_suffix = generate_random_string()
+        cls.user_data = {
+            "username": f"rotation_{random_suffix}",
+            "email": f"rotation_{random_suffix}@example.com",
+            "password": "RotationTest123!"
+        }
+        response = requests.post(f"{API_URL}/auth/register", json=cls.user_data)
+        assert response.status_code == 200, f"Registration failed: {response.text}"
+        cls.register_refresh_token = response.cookies.get(REFRESH_COOKIE_NAME)
+        assert cls.register_refresh_token, "Registration did not set a refresh token cookie"
+
+    def login(self):
+        """Log in again and return the new refresh token"""
+        response = requests.post(f"{API_URL}/auth/login", json={
+            "email": self.user_data["email"],
+            "password": self.user_data["password"]
+        })
+        self.assertEqual(response.status_code, 200, f"Login failed: {response.text}")
+        token = response.cookies.get(REFRESH_COOKIE_NAME)
+        self.assertTrue(token, "Login did not set a refresh token cookie")
+        return token
+
+    def test_01_refresh_rotates_token(self):
+        """Test POST /api/auth/refresh issues a new access token and a new refresh token"""
+        print("\n=== 1. REFRESH ROTATES THE TOKEN ===")
+
+        old_token = self.login()
+        response = refresh(old_token)
+
+        self.assertEqual(response.status_code, 200, f"Refresh failed: {response.text}")
+        self.assertIn("access_token", response.json(), "Access token not returned")
+        new_token = response.cookies.get(REFRESH_COOKIE_NAME)
+        self.assertTrue(new_token, "Refresh did not set a new refresh token cookie")
+        self.assertNotEqual(new_token, old_token, "Refresh token was not rotated")
+
+        # The successor keeps working
+        response = refresh(new_token)
+        self.assertEqual(response.status_code, 200, f"Successor refresh failed: {response.text}")
+
+        print(f"✅ Refresh token rotated on every use")
+
+    def test_02_concurrent_refresh_keeps_session(self):
+        """Test a token reused right after its rotation (parallel refreshes) gets 401 without revoking the family"""
+        print("\n=== 2. CONCURRENT REFRESH KEEPS THE SESSION ===")
+
+        old_token = self.login()
+        response = refresh(old_token)
+        self.assertEqual(response.status_code, 200, f"Refresh failed: {response.text}")
+        new_token = response.cookies.get(REFRESH_COOKIE_NAME)
+
+        # A second request that raced the first one presents the same cookie
+        raced = refresh(old_token)
+        self.assertEqual(raced.status_code, 401, "Reused refresh token should be rejected")
+
+        # ...but the session it raced with keeps working
+        response = refresh(new_token)
+        self.assertEqual(response.status_code, 200, f"Successor refresh failed after a race: {response.text}")
+
+        print(f"✅ Raced refresh rejected, session kept")
+
+    def test_03_replay_revokes_family(self):
+        """Test replaying a rotated refresh token after the grace window revokes the whole token family"""
+        print("\n=== 3. REPLAY REVOKES THE FAMILY ===")
+
+        old_token = self.login()
+        response = refresh(old_token)
+        self.assertEqual(response.status_code, 200, f"Refresh failed: {response.text}")
+        new_token = response.cookies.get(REFRESH_COOKIE_NAME)
+
+        # Past the concurrent-refresh grace window, presenting the rotated token again looks like theft
+        time.sleep(REPLAY_GRACE_SECONDS + 1)
+        replay = refresh(old_token)
+        self.assertEqual(replay.status_code, 401, "Replayed refresh token should be rejected")
+
+        # ...so its successor, which the thief may hold, is revoked as well
+        response = refresh(new_token)
+        self.assertEqual(response.status_code, 401, "Successor of a replayed token should be revoked")
+
+        # Other sessions (token families) of the same user are unaffected
+        other_session = self.login()
+        response = refresh(other_session)
+        self.assertEqual(response.status_code, 200, f"Unrelated session refresh failed: {response.text}")
+
+        print(f"✅ Replay rejected and the token family revoked")
+        print(f"   - Other sessions keep working")
+
+    def test_04_logout_revokes_refresh_token(self):
+        """Test POST /api/auth/logout revokes the refresh token"""
+        print("\n=== 4. LOGOUT REVOKES THE REFRESH TOKEN ===")
+
+        token = self.login()
+        response = requests.post(f"{API_URL}/auth/logout", cookies={REFRESH_COOKIE_NAME: token})
+        self.assertEqual(response.status_code, 200, f"Logout failed: {response.text}")
+
+        response = refresh(token)
+        self.assertEqual(response.status_code, 401, "Refresh after logout should be rejected")
+
+        print(f"✅ Refresh rejected after logout")
+
+    def test_05_refresh_without_cookie(self):
+        """Test POST /api/auth/refresh without a refresh token"""
+        print("\n=== 5. REFRESH WITHOUT A COOKIE ===")
+
+        response = requests.post(f"{API_URL}/auth/refresh")
+        self.assertEqual(response.status_code, 401, "Refresh without a cookie should return 401")
+
+        response = refresh("not-a-jwt")
+        self.assertEqual(response.status_code, 401, "Malformed refresh token should return 401")
+
+        print(f"✅ Missing and malformed refresh tokens rejected")
+
+def run_refresh_rotation_tests():
+    """Run all refresh token rotation tests"""
+    print("=" * 60)
+    print("REFRESH TOKEN ROTATION TEST")
+    print("=" * 60)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(RefreshTokenRotationTest)
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+
+    total_tests = result.testsRun
+    failures = len(result.failures)
+    errors = len(result.errors)
+    success_count = total_tests - failures - errors
+
+    print("\n" + "=" * 60)
+    print(f"Total Tests: {total_tests}")
+    print(f"Successful: {success_count}")
+    print(f"Failures: {failures}")
+    print(f"Errors: {errors}")
+
+    if success_count == total_tests:
+        print("\n🎉 ALL REFRESH TOKEN ROTATION TESTS PASSED!")
+        return True
+    else:
+        print(f"\n❌ {failures + errors} REFRESH TOKEN ROTATION TESTS FAILED!")
+        return False
+
+if __name__ == "__main__":
+    success = run_refresh_rotation_tests()
+    exit(0 if success else 1)